@@ -14,6 +14,8 @@ TURQOISE = (64, 224, 208)
 
 # Spot class definition
 class Spot:
+	barrier_edits = 0 # Times any spot has become or stopped being a barrier, so anything worked out from the barriers knows when it is out of date
+
 	def __init__(self, row, col, width, total_rows):
 		self.row = row
 		self.col = col
@@ -50,29 +52,35 @@ class Spot:
 		return self.color == PURPLE
 
 	def reset(self):
-		self.color = WHITE
+		self.set_color(WHITE)
 
 	def make_closed(self):
-		self.color = RED
+		self.set_color(RED)
 
 	def make_open(self):
-		self.color = GREEN
+		self.set_color(GREEN)
 
 	def make_barrier(self):
-		self.color = BLACK
+		self.set_color(BLACK)
 
 	def make_start(self):
-		self.color = ORANGE
+		self.set_color(ORANGE)
 
 	def make_end(self):
-		self.color = TURQOISE
+		self.set_color(TURQOISE)
 
 	def make_path(self):
-		self.color = PURPLE
+		self.set_color(PURPLE)
+
+	def set_color(self, color):
+		# Counts the change in barrier_edits if the spot becomes or stops being a barrier
+		if (color == BLACK) != (self.color == BLACK):
+			Spot.barrier_edits += 1
+		self.color = color
 
-	def draw(self,win):
-		# Draws itself to the display
-		pygame.draw.rect(win, self.color, (self.x, self.y, self.width, self.width))
+	def draw(self, win, color = None):
+		# Draws itself to the display, a search context can give a different colour to show the search (see search_context.py)
+		pygame.draw.rect(win, self.color if color is None else color, (self.x, self.y, self.width, self.width))
 
 	def update_neighbours(self, grid):
 		# Initialize variable
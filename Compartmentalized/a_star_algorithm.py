@@ -2,6 +2,7 @@ import pygame
 import math
 from queue import PriorityQueue
 import Spot
+import search_context as sc
 
 
 ###################################################
@@ -22,12 +23,33 @@ def h(p1, p2, use_euclidean):
 
 
 
-def reconstruct_path(came_from, current, draw, start):
+def reconstruct_path(context, current, draw, start):
+	# Fills in the path of the search context, if there is a draw function the path is drawn one spot at a time
+	context.path = path_to(context.came_from, current)
+	for spot in reversed(context.path[:-1]):
+		if spot != start:
+			context.path_set.add(spot)
+		if draw is not None:
+			draw() # Can comment this function out if you do not want the path to be drawn one by one
+
+
+
+def path_to(came_from, current):
+	# Follows came_from back from the current spot and returns the spots of the path in order from the start,
+	# unlike reconstruct_path() this does not colour or draw anything
+	path = [current]
 	while current in came_from:
 		current = came_from[current]
-		if current != start:
-			current.make_path()
-		draw() # Can comment this function out if you do not want the path to be drawn one by one
+		path.append(current)
+
+	path.reverse()
+	return path
+
+
+
+def path_cost(path):
+	# Adds up the distances between each spot along the path
+	return sum(path[i].neighbours[path[i + 1]] for i in range(len(path) - 1))
 
 
 
@@ -36,31 +58,48 @@ def reconstruct_path(came_from, current, draw, start):
 #################################
 ### A* path finding algorithm ###
 #################################
-def a_star_pathfind(draw, grid, start, end, use_euclidean):
-	shortest_path = [] # What we are returning
+def a_star_pathfind(draw, grid, start, end, use_euclidean, heuristic = None, weight = 1, context = None):
+	# The search doesn't change the grid, everything it finds is kept in the context (see search_context.py) so that
+	# it can be drawn or inspected afterwards. draw can be None to run without a display
+	if context is None:
+		context = sc.SearchContext()
+
+	# A different heuristic (such as the landmark heuristic in landmarks.py) can be passed in, it is given the
+	# two positions in the same way as h() and otherwise we fall back to the Euclidean or Manhattan distance
+	if heuristic is None:
+		heuristic = lambda p1, p2: h(p1, p2, use_euclidean)
+
+	# Weighted A*: with a weight above 1 the search trusts the heuristic more and heads for the end quicker,
+	# as long as the heuristic never overestimates the path found is at most weight times longer than the shortest
+	if weight != 1:
+		unweighted = heuristic
+		heuristic = lambda p1, p2: weight * unweighted(p1, p2)
 
 	count = 0 # Used for tiebreakers when determining which spot to visit next
 	open_set = PriorityQueue()
 	open_set.put((0, count, start))
-	came_from = {} # Keeps track of our current path from the start to the current spot
+	came_from = context.came_from # Keeps track of our current path from the start to the current spot
 
 	# a spots g_score is the shortest determined path from the starting spot to this spot
-	g_score = {spot: float("inf") for row in grid for spot in row} # Initialize a hash to track the g_scores of the spots
+	# spots that haven't been reached are missing from the hash and count as infinity
+	g_score = context.g_score
 	g_score[start] = 0
 
 	# a spots f_score is the spots g_score + their Euclidean or Manhattan distance to the end spot
-	f_score = {spot: float("inf") for row in grid for spot in row}
-	f_score[start] = h(start.get_pos(), end.get_pos(), use_euclidean)
+	f_score = context.f_score
+	f_score[start] = heuristic(start.get_pos(), end.get_pos())
 
 	# because we are unable to see if a spot is in a PriorityQueue we use open_set_hash to track which ones are
-	open_set_hash = {start}
+	open_set_hash = context.open_set_hash
+	open_set_hash.add(start)
 
 	while not open_set.empty():
 
 		# If the user wants to exit before the algorithm has finished executing then they can quit
-		for event in pygame.event.get():
-			if event.type == pygame.QUIT:
-				pygame.quit()
+		if draw is not None:
+			for event in pygame.event.get():
+				if event.type == pygame.QUIT:
+					pygame.quit()
 
 		# We get our next spot determined by the spot with the minimum f_score and if this is tied than the minimum count
 		current = open_set.get()[2]
@@ -69,13 +108,8 @@ def a_star_pathfind(draw, grid, start, end, use_euclidean):
 
 		# If our current spot is the end spot than we have found the shortest path and we can construct our path
 		if current == end:
-			reconstruct_path(came_from, current, draw, start)
-			for row in grid:
-				for spot in row:
-					if spot.is_path():
-						shortest_path.append(spot)
-
-			return shortest_path
+			reconstruct_path(context, current, draw, start)
+			return context.path[1:-1] # The spots between the start and end
 
 		for neighbour in current.neighbours:
 			# Since we are traverse along a grid then our distances are all 1
@@ -84,13 +118,13 @@ def a_star_pathfind(draw, grid, start, end, use_euclidean):
 
 			# We then check if the path from the starting spot to the neighbour is shorter if it traverses through
 			# our current spot, if so it replaces the neighbours current g_score with the new temp_g_score
-			if temp_g_score < g_score[neighbour]:
+			if temp_g_score < g_score.get(neighbour, float("inf")):
 				# We update the information of the neighbour
 				came_from[neighbour] = current
 				g_score[neighbour] = temp_g_score
 				# It is unnecessary for use to check if the old f_score < the new f_score as h(neighbour, end) is 
 				# equal in both and since we know that temp_g_score < g_score then the new f_score < the old f_score
-				f_score[neighbour] = temp_g_score + h(neighbour.get_pos(), end.get_pos(), use_euclidean)
+				f_score[neighbour] = temp_g_score + heuristic(neighbour.get_pos(), end.get_pos())
 
 				# If the neighbour is not in the open set than we add the neighbour to the PriorityQueue (open_set) for it to be considered
 				# and if its f_score is every the lowest of all the elements then it will be explored
@@ -98,13 +132,14 @@ def a_star_pathfind(draw, grid, start, end, use_euclidean):
 					count += 1
 					open_set.put((f_score[neighbour], count, neighbour))
 					open_set_hash.add(neighbour)
-					neighbour.make_open()
 
-		draw() # Can comment this function out if you do not want the algorithm to be visualized as it goes
+		if draw is not None:
+			draw() # Can comment this function out if you do not want the algorithm to be visualized as it goes
 
 		# We have now traversed this spot and we will close it to prevent us revisiting it again and going into an infinite loop
+		context.expansions += 1
 		if current != start:
-			current.make_closed()
+			context.closed_set.add(current)
 
 	# If we have no more spots in the open_set then we have traversed to all possible spots and there is no path
-	return shortest_path
\ No newline at end of file
+	return []
\ No newline at end of file
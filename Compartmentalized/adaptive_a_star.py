@@ -0,0 +1,92 @@
+import math
+from array import array
+import a_star_algorithm as asg
+import search_context as sc
+import Spot as S
+import stepping_search as ss
+
+###########################################################
+#   Adaptive A*, a heuristic that gets better with every search on the same map
+#
+#	Once A* has found the end, every spot s it expanded is known to be at most g(end) - g(s) away from the end,
+#	and that is never less than the heuristic it was expanded with. Adaptive A* stores these values and uses
+#	the larger of the stored value and the normal h() in the next search, so searches towards the same goal
+#	(or a nearby one) expand fewer and fewer spots.
+#
+#	When the goal moves the stored values are still a lower bound once the old heuristic value of the new goal
+#	is taken off them, so rather than going through the whole table this amount is added to a running
+#	correction that is taken off every stored value as it is read.
+#
+#	The values only hold while the barriers stay the same, so the table remembers the grid it was learned on
+#	and the count of barrier edits at the time (Spot.barrier_edits), and starts again if either has changed.
+#	This is checked before every search without looking at the spots.
+#
+
+STEP_SIZE = 1000 # Expansions per step when there is nothing to draw
+
+###################################################
+### Class Definitions                           ###
+###################################################
+class AdaptiveHeuristic:
+	def __init__(self, grid, use_euclidean):
+		self.grid = grid
+		self.rows = len(grid)
+		self.use_euclidean = use_euclidean
+		self.barrier_edits = S.Spot.barrier_edits
+		self.reset()
+
+	def reset(self):
+		# Forgets everything that has been learned
+		self.learned = array('d', [-math.inf]) * (self.rows * self.rows) # Stored with the correction at the time added on
+		self.correction = 0
+		self.goal = None
+
+	def h(self, p1, p2):
+		# Used in place of h() by the search, p2 must be the goal passed to prepare()
+		learned = self.learned[p1[0] * self.rows + p1[1]] - self.correction
+		return max(asg.h(p1, p2, self.use_euclidean), learned)
+
+	def prepare(self, grid, goal_pos):
+		# Gets ready for a search towards goal_pos, called before every search. A new grid (ie. after the board is
+		# cleared) starts with no edits of its own so the grid is compared as well as the count
+		if grid is not self.grid or S.Spot.barrier_edits != self.barrier_edits:
+			self.grid = grid
+			self.rows = len(grid)
+			self.barrier_edits = S.Spot.barrier_edits
+			self.reset()
+
+		if self.goal is not None and goal_pos != self.goal:
+			self.correction += self.h(goal_pos, self.goal)
+		self.goal = goal_pos
+
+	def learn(self, context, start, end):
+		# Stores g(end) - g(s) for every spot the search expanded, only called when a path was found
+		goal_g = context.g_score[end]
+		for spot in context.closed_set:
+			row, col = spot.get_pos()
+			index = row * self.rows + col
+			self.learned[index] = max(self.learned[index], goal_g - context.g_score[spot] + self.correction)
+
+
+
+###################################################
+### Adaptive A* path finding                    ###
+###################################################
+def adaptive_a_star_pathfind(draw, grid, start, end, use_euclidean, adaptive, context = None):
+	# Same arguments and result as a_star_pathfind() plus adaptive, the AdaptiveHeuristic kept between searches on
+	# the same grid. The search is run with a SteppingSearch as the stored values are only a lower bound if every
+	# spot is expanded with its shortest g_score, which needs a spot to be queued again when its g_score drops
+	if context is None:
+		context = sc.SearchContext()
+
+	adaptive.prepare(grid, end.get_pos())
+	search = ss.SteppingSearch(grid, start, end, use_euclidean, heuristic = adaptive.h, context = context)
+	while not search.done:
+		search.step(1 if draw is not None else STEP_SIZE)
+		if draw is not None:
+			draw()
+
+	if not context.path:
+		return []
+	adaptive.learn(context, start, end)
+	return context.path[1:-1] # The spots between the start and end
@@ -0,0 +1,125 @@
+import heapq
+import time
+from collections import namedtuple
+import a_star_algorithm as asg
+
+###########################################################
+#   Anytime Repairing A* (ARA*)
+#
+#	For interactive use a good path found quickly is often worth more than the shortest path found late.
+#	ARA* starts with a large weight on the heuristic (see the weight argument of a_star_pathfind) which finds
+#	a first path very fast, then lowers the weight and repairs the search, reusing the g_scores it has already
+#	found instead of starting again, until either the weight reaches 1 or the time budget runs out.
+#
+#	Every path found comes with a bound on how much longer it can be than the shortest path.
+#	Nothing is coloured or drawn so this can be run without a display.
+#
+
+# path is the list of spots from start to end, cost is its length, weight is the weight that was used to find it
+# and bound is the most the path can be longer than the shortest path by (cost <= bound * shortest)
+AnytimeResult = namedtuple('AnytimeResult', ['path', 'cost', 'weight', 'bound'])
+
+DEADLINE_CHECK_INTERVAL = 32 # Number of expansions between each look at the clock
+
+
+###################################################
+### ARA* path finding algorithm                 ###
+###################################################
+def ara_star_pathfind(grid, start, end, use_euclidean, time_budget, initial_weight = 3, weight_step = 0.5, heuristic = None):
+	# Generator that yields an AnytimeResult every time a better path has been found. It stops once the
+	# shortest path is found or once time_budget seconds have passed. The neighbours must be updated beforehand
+	if heuristic is None:
+		heuristic = lambda p1, p2: asg.h(p1, p2, use_euclidean)
+
+	deadline = time.perf_counter() + time_budget
+	end_pos = end.get_pos()
+	h_cache = {} # The heuristic of a spot doesn't change between iterations so only calculate it once
+
+	def h_of(spot):
+		if spot not in h_cache:
+			h_cache[spot] = heuristic(spot.get_pos(), end_pos)
+		return h_cache[spot]
+
+	weight = initial_weight
+	g_score = {start: 0}
+	came_from = {}
+
+	count = 0
+	open_set = [(weight * h_of(start), count, start)]
+	open_set_hash = {start: open_set[0][0]} # Spot -> f_score it is currently queued with
+	closed_set = set()
+	incons_set = set() # Spots that improved after being closed, they are repaired in the next iteration
+	expansions = 0
+
+	def top_of_open():
+		# Throws away queue entries that have since been replaced with a lower f_score
+		while open_set and open_set_hash.get(open_set[0][2]) != open_set[0][0]:
+			heapq.heappop(open_set)
+		return open_set[0][0] if open_set else float("inf")
+
+	while True:
+		# Improve the path with the current weight
+		out_of_time = False
+		while g_score.get(end, float("inf")) > top_of_open():
+			expansions += 1
+			if expansions % DEADLINE_CHECK_INTERVAL == 0 and time.perf_counter() > deadline:
+				out_of_time = True
+				break
+
+			current = heapq.heappop(open_set)[2]
+			del open_set_hash[current]
+			closed_set.add(current)
+
+			for neighbour, distance in current.neighbours.items():
+				temp_g_score = g_score[current] + distance
+				if temp_g_score < g_score.get(neighbour, float("inf")):
+					came_from[neighbour] = current
+					g_score[neighbour] = temp_g_score
+
+					if neighbour in closed_set:
+						incons_set.add(neighbour)
+					else:
+						count += 1
+						f_score = temp_g_score + weight * h_of(neighbour)
+						open_set_hash[neighbour] = f_score
+						heapq.heappush(open_set, (f_score, count, neighbour))
+
+		if end not in g_score:
+			return # Either there is no path or we ran out of time before finding the first one
+
+		# The shortest path can't be shorter than the lowest unweighted f_score of any spot still waiting to be looked at
+		cost = g_score[end]
+		waiting = list(open_set_hash) + list(incons_set)
+		lower_bound = min([g_score[spot] + h_of(spot) for spot in waiting] + [cost])
+		bound = min(weight, cost / lower_bound) if lower_bound > 0 else 1
+
+		if not out_of_time:
+			yield AnytimeResult(asg.path_to(came_from, end), cost, weight, bound)
+
+		if out_of_time or weight <= 1 or time.perf_counter() > deadline:
+			return
+
+		# Lower the weight and put the inconsistent spots back into the open set ready for the next iteration
+		weight = max(1, weight - weight_step)
+		for spot in incons_set:
+			open_set_hash[spot] = None
+		incons_set = set()
+		closed_set = set()
+
+		open_set = []
+		for spot in open_set_hash:
+			count += 1
+			f_score = g_score[spot] + weight * h_of(spot)
+			open_set_hash[spot] = f_score
+			open_set.append((f_score, count, spot))
+		heapq.heapify(open_set)
+
+
+
+def anytime_pathfind(grid, start, end, use_euclidean, time_budget, initial_weight = 3, weight_step = 0.5, heuristic = None):
+	# Runs ARA* until the time budget is used up and returns the best AnytimeResult found, or None if no path was found
+	result = None
+	for result in ara_star_pathfind(grid, start, end, use_euclidean, time_budget, initial_weight, weight_step, heuristic):
+		pass
+
+	return result
@@ -0,0 +1,56 @@
+import asyncio
+import functools
+import barrier_grid as bg
+import stepping_search as ss
+
+###########################################################
+#   asyncio versions of the A* search
+#
+#	a_star_pathfind() runs the whole search in one go which blocks an asyncio event loop until it is done.
+#	a_star_pathfind_async() does the same search but hands control back to the event loop after every
+#	slice of expansions so other requests keep being served. Because it stops at every slice it can also
+#	be cancelled like any other task and given a timeout.
+#
+#	a_star_pathfind_in_executor() instead runs the search in a thread or process pool so that many long
+#	searches can run side by side. The grid is sent as a BarrierGrid which is cheap to copy to a process.
+#
+#	Neither version colours the spots, so several searches can share one grid.
+#
+
+SLICE_SIZE = 256 # Default number of expansions between each yield to the event loop
+
+
+###################################################
+### Cooperative A* path finding                 ###
+###################################################
+async def a_star_pathfind_async(grid, start, end, use_euclidean, slice_size = SLICE_SIZE, timeout = None, heuristic = None, weight = 1):
+	# Returns the list of spots from start to end including both (SteppingSearch.full_path(), unlike a_star_pathfind())
+	# or [] if there is no path. Raises TimeoutError if the search takes longer than timeout seconds. The neighbours
+	# of the spots must be updated beforehand
+	loop = asyncio.get_running_loop()
+	deadline = None if timeout is None else loop.time() + timeout
+	search = ss.SteppingSearch(grid, start, end, use_euclidean, heuristic, weight)
+
+	while True:
+		search.step(slice_size)
+		if search.done:
+			return search.full_path()
+
+		if deadline is not None and loop.time() > deadline:
+			raise TimeoutError("A* search ran past its deadline after " + str(search.expansions) + " expansions")
+		# Let the other tasks run, a cancelled task gets its CancelledError raised here
+		await asyncio.sleep(0)
+
+
+
+###################################################
+### Executor A* path finding                    ###
+###################################################
+async def a_star_pathfind_in_executor(executor, barrier_grid, start_pos, end_pos, use_euclidean, timeout = None, weight = 1):
+	# Runs bg.a_star_positions() in the executor (a ThreadPoolExecutor or ProcessPoolExecutor, None for the loop's
+	# default) and returns the list of (row, col) positions of the path.
+	# Note: on a timeout or cancel the caller stops waiting straight away, but a search that has already started in
+	# a worker will still run to the end as threads and processes can't be interrupted
+	loop = asyncio.get_running_loop()
+	search = functools.partial(bg.a_star_positions, barrier_grid, start_pos, end_pos, use_euclidean, weight)
+	return await asyncio.wait_for(loop.run_in_executor(executor, search), timeout)
@@ -0,0 +1,139 @@
+import heapq
+import math
+import a_star_algorithm as asg
+
+###########################################################
+#   A compact copy of a grid that only stores which spots are barriers.
+#
+#	The Spot objects link to each other through their neighbours and hold display information, which makes
+#	them slow to send to another process. A BarrierGrid is one byte per spot, can be pickled cheaply and works
+#	out the neighbours of a spot on demand using the same rules as Spot.update_neighbours().
+#
+#	Spots are referred to by their index, row * rows + col.
+#
+
+STRAIGHT_DISTANCE = 1
+DIAGONAL_DISTANCE = 1.75 # Same as Spot.update_neighbours()
+
+# (row change, col change) for North, South, East and West
+STRAIGHT_MOVES = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+# North East, South West, South East and North West
+DIAGONAL_MOVES = [(1, 1), (-1, -1), (-1, 1), (1, -1)]
+
+
+###################################################
+### Class Definitions                           ###
+###################################################
+class GridNeighbours:
+	# The moves of a square grid of rows x rows spots, worked out from is_barrier(row, col) which the grid that
+	# uses this has to have along with rows. A BarrierGrid gets these from here, and so does a
+	# chunked_grid.ChunkedGrid which has no barriers bytearray
+	def index(self, pos):
+		return pos[0] * self.rows + pos[1]
+
+	def get_pos(self, index):
+		return divmod(index, self.rows)
+
+	def neighbours(self, index):
+		# Returns a list of (neighbour index, distance) in the same way as Spot.update_neighbours()
+		row, col = divmod(index, self.rows)
+		result = []
+
+		for d_row, d_col in STRAIGHT_MOVES:
+			if not self.is_barrier(row + d_row, col + d_col):
+				result.append(((row + d_row) * self.rows + col + d_col, STRAIGHT_DISTANCE))
+
+		# Diagonal moves are allowed as long as one of the two spots beside the move is not a barrier
+		for d_row, d_col in DIAGONAL_MOVES:
+			if not self.is_barrier(row + d_row, col + d_col):
+				if not self.is_barrier(row, col + d_col) or not self.is_barrier(row + d_row, col):
+					result.append(((row + d_row) * self.rows + col + d_col, DIAGONAL_DISTANCE))
+
+		return result
+
+
+
+class BarrierGrid(GridNeighbours):
+	def __init__(self, rows, barriers = None):
+		self.rows = rows
+		self.barriers = bytearray(rows * rows) if barriers is None else bytearray(barriers)
+
+	@classmethod
+	def from_grid(cls, grid):
+		# Copies the barriers out of a grid of Spots
+		rows = len(grid)
+		return cls(rows, [1 if spot.is_barrier() else 0 for row in grid for spot in row])
+
+	@classmethod
+	def from_positions(cls, rows, positions):
+		# Creates the grid from a list of barrier (row, col) positions, ie. from map_io.load_barriers()
+		barrier_grid = cls(rows)
+		for row, col in positions:
+			barrier_grid.barriers[row * rows + col] = 1
+		return barrier_grid
+
+	def is_barrier(self, row, col):
+		# Anything outside of the grid counts as a barrier
+		if 0 <= row < self.rows and 0 <= col < self.rows:
+			return self.barriers[row * self.rows + col] == 1
+		return True
+
+
+
+###################################################
+### Helper functions                            ###
+###################################################
+def path_cost(positions):
+	# The length of a path given as (row, col) positions, in the same way as a_star_algorithm.path_cost() for Spots
+	cost = 0
+	for i in range(len(positions) - 1):
+		diagonal = positions[i][0] != positions[i + 1][0] and positions[i][1] != positions[i + 1][1]
+		cost += DIAGONAL_DISTANCE if diagonal else STRAIGHT_DISTANCE
+	return cost
+
+
+
+###################################################
+### A* path finding on a BarrierGrid            ###
+###################################################
+def a_star_indices(graph, start, end, h, weight = 1, expanded = None):
+	# The A* core shared by every graph with a neighbours(index) method returning (neighbour index, distance), ie. a
+	# BarrierGrid or a csr_graph.CSRGraph. h(index) estimates the distance from index to end. Returns the indices of
+	# the path from start to end, or [] if there is no path. If expanded is a list the index of every node expanded
+	# is added to it
+	g_score = {start: 0}
+	f_score = {start: weight * h(start)}
+	came_from = {}
+
+	count = 0
+	open_set = [(f_score[start], count, start)]
+
+	while open_set:
+		f, _, current = heapq.heappop(open_set)
+		if f > f_score[current]:
+			continue # This node has been queued again since with a lower f_score
+		if expanded is not None:
+			expanded.append(current)
+
+		if current == end:
+			return asg.path_to(came_from, end)
+
+		for neighbour, distance in graph.neighbours(current):
+			temp_g_score = g_score[current] + distance
+			if temp_g_score < g_score.get(neighbour, math.inf):
+				came_from[neighbour] = current
+				g_score[neighbour] = temp_g_score
+				f_score[neighbour] = temp_g_score + weight * h(neighbour)
+				count += 1
+				heapq.heappush(open_set, (f_score[neighbour], count, neighbour))
+
+	return []
+
+
+
+def a_star_positions(barrier_grid, start_pos, end_pos, use_euclidean, weight = 1, expanded = None):
+	# Headless A* that returns the (row, col) positions of the path from start to end, or [] if there is no path.
+	# If expanded is a list the index of every spot expanded is added to it
+	h = lambda index: asg.h(barrier_grid.get_pos(index), end_pos, use_euclidean)
+	path = a_star_indices(barrier_grid, barrier_grid.index(start_pos), barrier_grid.index(end_pos), h, weight, expanded)
+	return [barrier_grid.get_pos(i) for i in path]
@@ -0,0 +1,279 @@
+import argparse
+import random
+import time
+import tracemalloc
+import visualization as vs
+import a_star_algorithm as asg
+import stepping_search as ss
+import open_lists as ol
+import memory_bounded_search as mb
+import search_context as sc
+import barrier_grid as bg
+import parallel_search as ps
+import adaptive_a_star as aa
+import profiling
+import lazy_theta_star as lts
+import sipp
+
+###########################################################
+#   Headless benchmarks on large random maps
+#
+#	Run from this folder, ie.
+#		python benchmark.py open_lists --rows 512 --density 0.3
+#
+#	Every search is run on the same map from the top left to the bottom right corner and the time,
+#	number of expansions and path cost of each is printed as a table.
+#
+
+###################################################
+### Map generation                              ###
+###################################################
+def random_grid(rows, density, seed):
+	# Creates a rows x rows grid where each spot is a barrier with the given probability, the corners are kept
+	# clear for the start and end. The neighbours are updated ready for searching
+	rng = random.Random(seed)
+	grid = vs.make_grid(rows, rows)
+	for row in grid:
+		for spot in row:
+			if rng.random() < density:
+				spot.make_barrier()
+
+	grid[0][0].reset()
+	grid[rows - 1][rows - 1].reset()
+
+	for row in grid:
+		for spot in row:
+			spot.update_neighbours(grid)
+
+	return grid
+
+
+
+###################################################
+### Timing and output                           ###
+###################################################
+def print_table(header, table):
+	# Prints the rows of the table in columns
+	widths = [max(len(str(line[i])) for line in [header] + table) for i in range(len(header))]
+	for line in [header] + table:
+		print('  '.join(str(value).ljust(width) for value, width in zip(line, widths)))
+
+
+
+def peak_memory(search):
+	# Runs the search once while tracing allocations and returns the most memory that was in use at once, in KiB.
+	# If allocations are already being traced (ie. by --profile) the tracing is left running
+	already_tracing = tracemalloc.is_tracing()
+	if not already_tracing:
+		tracemalloc.start()
+	before = tracemalloc.get_traced_memory()[0]
+	tracemalloc.reset_peak()
+	search()
+	peak = tracemalloc.get_traced_memory()[1] - before
+	if not already_tracing:
+		tracemalloc.stop()
+
+	return peak // 1024
+
+
+
+def best_time(search, repeats):
+	# Runs the search repeats times and returns the fastest time along with the last result
+	best = float("inf")
+	result = None
+	for _ in range(repeats):
+		t0 = time.perf_counter()
+		result = search()
+		best = min(best, time.perf_counter() - t0)
+
+	return best, result
+
+
+
+###################################################
+### Benchmarks                                  ###
+###################################################
+def benchmark_open_lists(grid, args):
+	# Compares the binary heap against the bucket queue and radix heap. The radix heap refuses an inconsistent
+	# heuristic, which the Manhattan distance is with the 1.75 diagonals, so it only runs with --euclidean
+	start = grid[0][0]
+	end = grid[-1][-1]
+	table = []
+	notes = []
+
+	for name in ol.OPEN_LISTS:
+		def search():
+			stepper = ss.SteppingSearch(grid, start, end, args.euclidean, open_list = ol.make_open_list(name, args.resolution))
+			while not stepper.done:
+				stepper.step(1000)
+			return stepper
+
+		try:
+			seconds, stepper = best_time(search, args.repeats)
+		except ValueError as error:
+			table.append([name, '', '', 'skipped'])
+			notes.append(name + ': ' + str(error) + ', the Manhattan distance is not one with 1.75 diagonals so run with --euclidean')
+			continue
+		table.append([name, '%.4f' % seconds, stepper.expansions, asg.path_cost(stepper.full_path()) if stepper.full_path() else 'no path'])
+
+	print_table(['open list', 'seconds', 'expansions', 'path cost'], table)
+	for note in notes:
+		print(note)
+
+
+
+def benchmark_memory(grid, args):
+	# Compares A* against the memory bounded Fringe Search and IDA*, the time is measured separately from the
+	# memory as tracing allocations slows the searches down
+	start = grid[0][0]
+	end = grid[-1][-1]
+	table = []
+
+	def a_star(context):
+		stepper = ss.SteppingSearch(grid, start, end, args.euclidean, context = context)
+		while not stepper.done:
+			stepper.step(1000)
+		return stepper.full_path()
+
+	searches = {
+		'a_star': a_star,
+		'fringe': lambda context: mb.fringe_search(grid, start, end, args.euclidean, context = context, threshold_step = args.threshold_step),
+		'ida_star': lambda context: mb.ida_star(grid, start, end, args.euclidean, context = context, table_limit = args.table_limit, threshold_step = args.threshold_step),
+	}
+
+	for name, search in searches.items():
+		context = sc.SearchContext()
+		seconds, path = best_time(lambda: search(sc.SearchContext()), args.repeats)
+		peak = peak_memory(lambda: search(context))
+		table.append([name, '%.4f' % seconds, context.expansions, peak, asg.path_cost(path) if path else 'no path'])
+
+	print_table(['search', 'seconds', 'expansions', 'peak KiB', 'path cost'], table)
+
+
+
+def benchmark_parallel(grid, args):
+	# Compares the speed of HDA* with different numbers of worker processes against A* in one process
+	barrier_grid = bg.BarrierGrid.from_grid(grid)
+	start_pos = (0, 0)
+	end_pos = (len(grid) - 1, len(grid) - 1)
+
+	def cost(positions):
+		return asg.path_cost([grid[row][col] for row, col in positions]) if positions else 'no path'
+
+	sequential, path = best_time(lambda: bg.a_star_positions(barrier_grid, start_pos, end_pos, args.euclidean), args.repeats)
+	table = [['sequential', '%.4f' % sequential, '1.00', '', cost(path)]]
+
+	for workers in args.workers:
+		seconds, (path, expansions) = best_time(lambda: ps.hda_star(barrier_grid, start_pos, end_pos, args.euclidean, workers), args.repeats)
+		table.append(['hda* x' + str(workers), '%.4f' % seconds, '%.2f' % (sequential / seconds), sum(expansions), cost(path)])
+
+	print_table(['search', 'seconds', 'speedup', 'expansions', 'path cost'], table)
+
+
+
+def benchmark_adaptive(grid, args):
+	# Searches from random starts to the bottom right corner, once with plain A* and once with Adaptive A* which
+	# carries what it learned from one query to the next
+	rng = random.Random(args.seed)
+	free = [spot for row in grid for spot in row if not spot.is_barrier()]
+	end = grid[-1][-1]
+	adaptive = aa.AdaptiveHeuristic(grid, args.euclidean)
+	table = []
+
+	for query in range(args.queries):
+		start = rng.choice(free)
+		plain = sc.SearchContext()
+		ss.SteppingSearch(grid, start, end, args.euclidean, context = plain).step(len(free) * 8)
+		learned = sc.SearchContext()
+		aa.adaptive_a_star_pathfind(None, grid, start, end, args.euclidean, adaptive, context = learned)
+		table.append([query, start.get_pos(), plain.expansions, learned.expansions, asg.path_cost(learned.path) if learned.path else 'no path'])
+
+	print_table(['query', 'start', 'a_star', 'adaptive', 'path cost'], table)
+
+
+
+def benchmark_any_angle(grid, args):
+	# Compares the 8 direction A* path against the Lazy Theta* any angle path, both measured with Euclidean lengths
+	barrier_grid = bg.BarrierGrid.from_grid(grid)
+	start_pos = (0, 0)
+	end_pos = (len(grid) - 1, len(grid) - 1)
+	theta = lts.LazyThetaStar(barrier_grid)
+
+	def euclidean_length(positions):
+		return sum(lts.distance(positions[i], positions[i + 1]) for i in range(len(positions) - 1))
+
+	seconds, path = best_time(lambda: bg.a_star_positions(barrier_grid, start_pos, end_pos, True), args.repeats)
+	table = [['a_star', '%.4f' % seconds, len(path), '%.2f' % euclidean_length(path) if path else 'no path', '']]
+
+	seconds, (waypoints, length) = best_time(lambda: theta.find_path(start_pos, end_pos), args.repeats)
+	table.append(['lazy_theta_star', '%.4f' % seconds, len(waypoints), '%.2f' % length if waypoints else 'no path', theta.line_of_sight_checks])
+
+	print_table(['search', 'seconds', 'points', 'euclidean length', 'line of sight checks'], table)
+
+
+
+def benchmark_sipp(grid, args):
+	# Sends up to --obstacles vehicles along shortest paths between random spots, each setting off at a random time,
+	# then compares SIPP with the plain (spot, time) search going from corner to corner around them
+	barrier_grid = bg.BarrierGrid.from_grid(grid)
+	rows = len(grid)
+	rng = random.Random(args.seed)
+	free = [spot.get_pos() for row in grid for spot in row if not spot.is_barrier()]
+	start_pos = (0, 0)
+	end_pos = (rows - 1, rows - 1)
+
+	timetable = sipp.Timetable(rows)
+	for _ in range(args.obstacles):
+		path = bg.a_star_positions(barrier_grid, rng.choice(free), rng.choice(free), args.euclidean)
+		if path and start_pos not in path and end_pos not in path: # Vehicles that can't get anywhere or cross a corner are left out
+			timetable.add_trajectory(path, rng.randrange(rows))
+
+	planner = sipp.SafeIntervalPlanner(barrier_grid, timetable)
+	seconds, path = best_time(lambda: planner.find_path(start_pos, end_pos), args.repeats)
+	table = [['sipp', '%.4f' % seconds, planner.expansions, len(path) - 1 if path else 'no path']]
+
+	seconds, (path, expansions) = best_time(lambda: sipp.space_time_a_star(barrier_grid, timetable, start_pos, end_pos), args.repeats)
+	table.append(['space_time_a_star', '%.4f' % seconds, expansions, len(path) - 1 if path else 'no path'])
+
+	print_table(['search', 'seconds', 'expansions', 'arrival time'], table)
+
+
+
+BENCHMARKS = {
+	'open_lists': benchmark_open_lists,
+	'memory': benchmark_memory,
+	'parallel': benchmark_parallel,
+	'adaptive': benchmark_adaptive,
+	'any_angle': benchmark_any_angle,
+	'sipp': benchmark_sipp,
+}
+
+def main():
+	parser = argparse.ArgumentParser(description = "Headless A* benchmarks on a random map")
+	parser.add_argument('benchmark', choices = list(BENCHMARKS))
+	parser.add_argument('--rows', type = int, default = 512)
+	parser.add_argument('--density', type = float, default = 0.3, help = "Chance of each spot being a barrier")
+	parser.add_argument('--seed', type = int, default = 0)
+	parser.add_argument('--repeats', type = int, default = 3)
+	parser.add_argument('--euclidean', action = 'store_true', help = "Use the Euclidean distance instead of Manhattan")
+	parser.add_argument('--resolution', type = int, default = 4, help = "Steps per unit distance for the bucket and radix open lists")
+	parser.add_argument('--table-limit', type = int, default = mb.TABLE_LIMIT, help = "Most spots the IDA* transposition table holds")
+	parser.add_argument('--threshold-step', type = float, default = mb.THRESHOLD_STEP, help = "Least amount the Fringe Search and IDA* f_score limits go up by each iteration, by default 0 or %g with --euclidean" % mb.EUCLIDEAN_THRESHOLD_STEP)
+	parser.add_argument('--workers', type = int, nargs = '+', default = [2, 4, 8], help = "Numbers of worker processes to run HDA* with")
+	parser.add_argument('--queries', type = int, default = 20, help = "Number of searches to the same end for the adaptive benchmark")
+	parser.add_argument('--obstacles', type = int, default = 200, help = "Number of moving obstacles for the sipp benchmark")
+	parser.add_argument('--profile', action = 'store_true', help = "Run the benchmark under cProfile and tracemalloc and print where the time and memory went")
+	parser.add_argument('--profile-dump', help = "Also save the cProfile statistics to this .prof file")
+	args = parser.parse_args()
+
+	grid = random_grid(args.rows, args.density, args.seed)
+	print(args.rows, 'x', args.rows, 'map with barrier density', args.density)
+	if args.profile or args.profile_dump:
+		profiling.profile_call(lambda: BENCHMARKS[args.benchmark](grid, args), args.profile_dump)
+	else:
+		BENCHMARKS[args.benchmark](grid, args)
+
+
+
+if __name__ == '__main__':
+	main()
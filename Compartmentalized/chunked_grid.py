@@ -0,0 +1,159 @@
+import mmap
+import struct
+import time
+from collections import OrderedDict
+import barrier_grid as bg
+import map_io
+
+###########################################################
+#   Chunked grid for maps that are too large to keep in memory
+#
+#	The map is stored on disk as square tiles of tile_size x tile_size bytes (1 for a barrier). A ChunkedGrid
+#	only loads a tile the first time the search touches a spot in it and keeps at most max_tiles tiles in
+#	memory, throwing away the tile that was used least recently when it needs room for a new one.
+#
+#	It has the index(), get_pos(), is_barrier() and neighbours() of a BarrierGrid (from
+#	barrier_grid.GridNeighbours) so the searches that only use those, ie. barrier_grid.a_star_positions(), run
+#	on it unchanged. It is not a BarrierGrid though: there is no barriers bytearray, so anything that reads the
+#	barriers directly (path databases, goal bounding, viewport.LevelOfDetail, map_io.save_barrier_grid(),
+#	map_editing.py, csr_graph.py, ...) needs the map loaded as a BarrierGrid. The number of tile hits, misses
+#	and evictions and the time spent loading are kept in stats so the tile size and memory cap can be tuned.
+#
+#	File layout (native byte order):
+#		header              magic, rows, tile_size, tiles per side
+#		tiles               tile_size * tile_size bytes each, row by row of tiles. Spots past the edge of the map are barriers
+#
+
+TILED_EXTENSION = 'tiles'
+FILE_MAGIC = b'TIL1'
+HEADER_FORMAT = '=4sIII' # magic, rows, tile_size, tiles per side
+TILE_SIZE = 64
+MAX_TILES = 256
+
+
+###################################################
+### Writing tiled maps                          ###
+###################################################
+def convert_map(map_filename, tile_size = TILE_SIZE):
+	# Converts a text map (see map_io.py) into a tiled map saved next to it. Only tile_size lines of the map are
+	# held in memory at once
+	with open(map_filename) as source, open(map_io.data_filename(map_filename, TILED_EXTENSION), 'wb') as f:
+		rows = int(source.readline())
+		tiles_per_side = (rows + tile_size - 1) // tile_size
+		padded = tiles_per_side * tile_size
+		f.write(struct.pack(HEADER_FORMAT, FILE_MAGIC, rows, tile_size, tiles_per_side))
+
+		# As in map_io.load_barriers() a short or missing line of the map is empty spots, only the padding past the
+		# edge of the map is barriers
+		edge = bytes([1]) * (padded - rows)
+		for tile_row in range(tiles_per_side):
+			lines = []
+			for i in range(tile_size):
+				if tile_row * tile_size + i < rows:
+					line = source.readline().rstrip('\n')[:rows]
+					lines.append(bytes(1 if char == map_io.BARRIER_CHAR else 0 for char in line) + bytes(rows - len(line)) + edge)
+				else:
+					lines.append(bytes([1]) * padded)
+
+			for tile_col in range(tiles_per_side):
+				for line in lines:
+					f.write(line[tile_col * tile_size:(tile_col + 1) * tile_size])
+
+
+
+def write_tiled(filename, barrier_grid, tile_size = TILE_SIZE):
+	# Writes a BarrierGrid out as a tiled map
+	rows = barrier_grid.rows
+	tiles_per_side = (rows + tile_size - 1) // tile_size
+	with open(filename, 'wb') as f:
+		f.write(struct.pack(HEADER_FORMAT, FILE_MAGIC, rows, tile_size, tiles_per_side))
+		for tile_row in range(tiles_per_side):
+			for tile_col in range(tiles_per_side):
+				for i in range(tile_size):
+					row = tile_row * tile_size + i
+					f.write(bytes(1 if barrier_grid.is_barrier(row, tile_col * tile_size + j) else 0 for j in range(tile_size)))
+
+
+
+###################################################
+### Class Definitions                           ###
+###################################################
+class ChunkedGrid(bg.GridNeighbours):
+	def __init__(self, filename, max_tiles = MAX_TILES, use_mmap = True):
+		# With use_mmap the operating system pages the file in, otherwise each tile is read with a normal file read
+		self.file = open(filename, 'rb')
+		header_size = struct.calcsize(HEADER_FORMAT)
+		magic, self.rows, self.tile_size, self.tiles_per_side = struct.unpack(HEADER_FORMAT, self.file.read(header_size))
+		if magic != FILE_MAGIC:
+			self.file.close()
+			raise ValueError(filename + " is not a tiled map")
+
+		self.header_size = header_size
+		self.map = mmap.mmap(self.file.fileno(), 0, access = mmap.ACCESS_READ) if use_mmap else None
+		self.max_tiles = max_tiles
+		self.tiles = OrderedDict() # tile number -> bytes, least recently used first
+
+		# The tile of the last lookup is kept to hand as neighbouring spots are nearly always in the same tile
+		self.last_tile = None
+		self.last_data = None
+
+		self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'load_seconds': 0.0}
+
+	@classmethod
+	def for_map(cls, map_filename, max_tiles = MAX_TILES, use_mmap = True):
+		# Opens the tiled map saved next to a text map by convert_map()
+		return cls(map_io.data_filename(map_filename, TILED_EXTENSION), max_tiles, use_mmap)
+
+	def load_tile(self, tile):
+		t0 = time.perf_counter()
+		tile_bytes = self.tile_size * self.tile_size
+		offset = self.header_size + tile * tile_bytes
+		if self.map is not None:
+			data = self.map[offset:offset + tile_bytes]
+		else:
+			self.file.seek(offset)
+			data = self.file.read(tile_bytes)
+		self.stats['load_seconds'] += time.perf_counter() - t0
+		return data
+
+	def tile_data(self, tile):
+		# Returns the bytes of the tile, loading it (and making room for it) if it isn't in memory
+		if tile == self.last_tile:
+			self.stats['hits'] += 1
+			return self.last_data
+
+		data = self.tiles.get(tile)
+		if data is not None:
+			self.stats['hits'] += 1
+			self.tiles.move_to_end(tile)
+		else:
+			self.stats['misses'] += 1
+			data = self.load_tile(tile)
+			self.tiles[tile] = data
+			if len(self.tiles) > self.max_tiles:
+				self.tiles.popitem(last = False)
+				self.stats['evictions'] += 1
+
+		self.last_tile = tile
+		self.last_data = data
+		return data
+
+	def is_barrier(self, row, col):
+		# Anything outside of the grid counts as a barrier
+		if not (0 <= row < self.rows and 0 <= col < self.rows):
+			return True
+
+		tile_row, i = divmod(row, self.tile_size)
+		tile_col, j = divmod(col, self.tile_size)
+		return self.tile_data(tile_row * self.tiles_per_side + tile_col)[i * self.tile_size + j] == 1
+
+	def memory_bytes(self):
+		# Bytes of map currently held in memory
+		return len(self.tiles) * self.tile_size * self.tile_size
+
+	def close(self):
+		self.tiles.clear()
+		self.last_data = None
+		if self.map is not None:
+			self.map.close()
+		self.file.close()
@@ -0,0 +1,179 @@
+import heapq
+import math
+import landmarks as lm
+
+###########################################################
+#   Cooperative path finding for many agents on the same grid (Windowed Hierarchical Cooperative A*)
+#
+#	Finding each agent's path on its own gives paths that run into each other. Here the agents are planned
+#	one after another and each plan is written into a reservation table of (spot, time) entries that the
+#	following agents have to avoid, so the search is over (spot, time) instead of just spots.
+#
+#	To keep this fast for a lot of agents:
+#	- The heuristic is the true distance to the goal (ignoring the other agents), which is found once per goal
+#	  with a Dijkstra search and shared between every agent heading to the same goal.
+#	- Only the next `window` time steps are planned. The rest of the way is left to the heuristic and
+#	  the agents are planned again before they reach the end of their window.
+#
+#	Every move takes one time step, the cost of a move is its distance and waiting on a spot costs WAIT_DISTANCE.
+#
+
+WAIT_DISTANCE = 1
+WINDOW = 16
+
+
+###################################################
+### Class Definitions                           ###
+###################################################
+class ReservationTable:
+	def __init__(self):
+		self.cells = {} # (spot index, time) -> agent
+		self.edges = {} # (from index, to index, time) -> agent, used to stop two agents swapping places
+		self.parked = {} # spot index -> (time, agent) for agents that stay on their goal from that time on
+		self.agent_keys = {} # agent -> (cell keys, edge keys, parked index) so an agent can be released quickly
+
+	def is_reserved(self, index, t, agent = None):
+		# True if a different agent is on the spot at time t
+		owner = self.cells.get((index, t))
+		if owner is not None and owner != agent:
+			return True
+
+		parked = self.parked.get(index)
+		return parked is not None and parked[1] != agent and t >= parked[0]
+
+	def is_swap(self, from_index, to_index, t, agent = None):
+		# True if a different agent is moving the opposite way along this move at the same time
+		owner = self.edges.get((to_index, from_index, t))
+		return owner is not None and owner != agent
+
+	def reserve(self, agent, indices, start_time, park = False):
+		# Reserves the spots of a path where indices[i] is the spot at start_time + i
+		cell_keys, edge_keys, parked_index = self.agent_keys.setdefault(agent, ([], [], None))
+
+		for i, index in enumerate(indices):
+			self.cells[(index, start_time + i)] = agent
+			cell_keys.append((index, start_time + i))
+			if i > 0:
+				self.edges[(indices[i - 1], index, start_time + i - 1)] = agent
+				edge_keys.append((indices[i - 1], index, start_time + i - 1))
+
+		if park:
+			self.parked[indices[-1]] = (start_time + len(indices) - 1, agent)
+			self.agent_keys[agent] = (cell_keys, edge_keys, indices[-1])
+
+	def release(self, agent):
+		# Removes all of an agent's reservations so that it can be planned again
+		cell_keys, edge_keys, parked_index = self.agent_keys.pop(agent, ([], [], None))
+
+		for key in cell_keys:
+			if self.cells.get(key) == agent:
+				del self.cells[key]
+		for key in edge_keys:
+			if self.edges.get(key) == agent:
+				del self.edges[key]
+		if parked_index is not None and self.parked.get(parked_index, (0, None))[1] == agent:
+			del self.parked[parked_index]
+
+	def clear_before(self, t):
+		# Forgets reservations that are in the past to stop the table growing forever
+		self.cells = {key: owner for key, owner in self.cells.items() if key[1] >= t}
+		self.edges = {key: owner for key, owner in self.edges.items() if key[2] >= t}
+		for agent, (cell_keys, edge_keys, parked_index) in self.agent_keys.items():
+			self.agent_keys[agent] = ([key for key in cell_keys if key[1] >= t], [key for key in edge_keys if key[2] >= t], parked_index)
+
+
+
+class CooperativePlanner:
+	def __init__(self, grid, window = WINDOW):
+		# The neighbours of the spots must be updated beforehand and the barriers must not change while planning
+		self.grid = grid
+		self.rows = len(grid)
+		self.window = window
+		self.reservations = ReservationTable()
+		self.distances = {} # goal position -> true distance table
+
+	def true_distance(self, goal):
+		# The distance from every spot to the goal, worked out the first time an agent heads to this goal
+		pos = goal.get_pos()
+		if pos not in self.distances:
+			self.distances[pos] = lm.dijkstra(self.grid, goal)
+		return self.distances[pos]
+
+	def index(self, spot):
+		return spot.row * self.rows + spot.col
+
+	def plan(self, agent, start, goal, start_time = 0):
+		# Plans the next window of time steps for one agent and reserves them. Returns the list of spots the
+		# agent is on at start_time, start_time + 1, ...
+		distances = self.true_distance(goal)
+		reservations = self.reservations
+		end_time = start_time + self.window
+		start_index = self.index(start)
+
+		if distances[start_index] == math.inf:
+			# The goal can't be reached so just stay where we are, for the whole window so the agents planned after
+			# this one go around it
+			path = [start] * (self.window + 1)
+			reservations.reserve(agent, [start_index] * (self.window + 1), start_time)
+			return path
+
+		count = 0
+		open_set = [(distances[start_index], count, start, start_time)]
+		g_score = {(start, start_time): 0}
+		came_from = {}
+		closed_set = set()
+		found = None
+		reached_goal = False
+
+		while open_set:
+			_, _, current, t = heapq.heappop(open_set)
+			if (current, t) in closed_set:
+				continue
+			closed_set.add((current, t))
+			current_index = self.index(current)
+
+			if current == goal and not any(reservations.is_reserved(current_index, later, agent) for later in range(t, end_time + 1)):
+				found = (current, t)
+				reached_goal = True
+				break
+
+			if t == end_time:
+				# The end of the window, the heuristic takes care of the rest of the way
+				found = (current, t)
+				break
+
+			moves = list(current.neighbours.items()) + [(current, WAIT_DISTANCE)]
+			for neighbour, distance in moves:
+				neighbour_index = self.index(neighbour)
+				if reservations.is_reserved(neighbour_index, t + 1, agent) or reservations.is_swap(current_index, neighbour_index, t, agent):
+					continue
+
+				temp_g_score = g_score[(current, t)] + distance
+				if temp_g_score < g_score.get((neighbour, t + 1), math.inf):
+					came_from[(neighbour, t + 1)] = (current, t)
+					g_score[(neighbour, t + 1)] = temp_g_score
+					count += 1
+					heapq.heappush(open_set, (temp_g_score + distances[neighbour_index], count, neighbour, t + 1))
+
+		if found is None:
+			# Boxed in by the other agents, stay still for the whole window and hope they move out of the way
+			path = [start] * (self.window + 1)
+		else:
+			path = [found[0]]
+			node = found
+			while node in came_from:
+				node = came_from[node]
+				path.append(node[0])
+			path.reverse()
+
+		reservations.reserve(agent, [self.index(spot) for spot in path], start_time, park = reached_goal)
+		return path
+
+	def plan_all(self, agents, start_time = 0):
+		# agents is a list of (agent, start, goal) in priority order. Plans every agent's next window and
+		# returns a dict of agent -> list of spots
+		self.reservations.clear_before(start_time)
+		for agent, _, _ in agents:
+			self.reservations.release(agent)
+
+		return {agent: self.plan(agent, start, goal, start_time) for agent, start, goal in agents}
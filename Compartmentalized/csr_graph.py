@@ -0,0 +1,192 @@
+import argparse
+import math
+import struct
+import time
+from array import array
+from collections import Counter
+from itertools import accumulate
+import barrier_grid as bg
+
+###########################################################
+#   Graphs of any shape stored as compressed sparse row arrays
+#
+#	The grid searches work out the neighbours of a spot from its row and col, which says nothing about road
+#	networks or navigation meshes. A CSRGraph stores any directed graph as three flat arrays:
+#		offsets             node_count + 1 entries, the edges out of node n are offsets[n] up to offsets[n + 1]
+#		targets             the node each edge goes to
+#		weights             the length of each edge
+#	plus, optionally, an (x, y) for each node so A* has a heuristic. The Euclidean distance between the
+#	coordinates is only a safe heuristic if no edge is shorter than the straight line between its ends, which
+#	holds for road lengths but not always for travel times. Without coordinates the search is Dijkstra's.
+#
+#	It has the same neighbours(index) method as a BarrierGrid so both are searched by the same A* core,
+#	barrier_grid.a_star_indices(). Nodes are referred to by their index, for a graph made from a BarrierGrid
+#	this is the same row * rows + col index as the grid.
+#
+#	Saved graphs are loaded with one array.fromfile() per array, no Python object is made per node or edge.
+#	Road networks in the DIMACS format (.gr edges and .co coordinates, ie. the 9th DIMACS challenge) can be
+#	converted to a saved graph from this folder, ie.
+#		python csr_graph.py USA-road-d.NY.gr --coordinates USA-road-d.NY.co --output ny.graph
+#
+#	File layout (native byte order):
+#		header              magic, node count, edge count, 1 if there are coordinates
+#		offsets             node count + 1 signed 64 bit ints
+#		targets             edge count unsigned 32 bit ints
+#		weights             edge count doubles
+#		coordinates         x then y of each node as doubles, only if there are coordinates
+#
+
+GRAPH_EXTENSION = 'graph'
+FILE_MAGIC = b'CSR1'
+HEADER_FORMAT = '=4sIIB' # magic, node count, edge count, has coordinates
+
+
+###################################################
+### Class Definitions                           ###
+###################################################
+class CSRGraph:
+	def __init__(self, offsets, targets, weights, coordinates = None):
+		# Takes the arrays as they are, see from_edges() to build them from a list of edges
+		self.offsets = offsets
+		self.targets = targets
+		self.weights = weights
+		self.coordinates = coordinates # x, y of each node one after the other, or None
+		self.node_count = len(offsets) - 1
+		self.edge_count = len(targets)
+
+	@classmethod
+	def from_edges(cls, node_count, sources, targets, weights, coordinates = None):
+		# Builds the graph from three parallel lists of edges in any order, the edges are sorted by their source
+		order = sorted(range(len(sources)), key = sources.__getitem__)
+		counts = Counter(sources)
+		offsets = array('q', accumulate((counts[node] for node in range(node_count)), initial = 0))
+		return cls(offsets, array('I', map(targets.__getitem__, order)), array('d', map(weights.__getitem__, order)),
+				None if coordinates is None else array('d', coordinates))
+
+	@classmethod
+	def from_barrier_grid(cls, barrier_grid):
+		# The moves of a grid as a graph, barriers are nodes with no edges. The coordinates are the (row, col) of each
+		# spot so the heuristic is the Euclidean one of the grid searches
+		rows = barrier_grid.rows
+		offsets = array('q', [0])
+		targets = array('I')
+		weights = array('d')
+		for index in range(rows * rows):
+			if not barrier_grid.barriers[index]:
+				for neighbour, distance in barrier_grid.neighbours(index):
+					targets.append(neighbour)
+					weights.append(distance)
+			offsets.append(len(targets))
+
+		coordinates = array('d', (value for index in range(rows * rows) for value in divmod(index, rows)))
+		return cls(offsets, targets, weights, coordinates)
+
+	@classmethod
+	def load(cls, filename):
+		with open(filename, 'rb') as f:
+			magic, node_count, edge_count, has_coordinates = struct.unpack(HEADER_FORMAT, f.read(struct.calcsize(HEADER_FORMAT)))
+			if magic != FILE_MAGIC:
+				raise ValueError(filename + " is not a saved graph")
+
+			offsets = array('q')
+			offsets.fromfile(f, node_count + 1)
+			targets = array('I')
+			targets.fromfile(f, edge_count)
+			weights = array('d')
+			weights.fromfile(f, edge_count)
+			coordinates = None
+			if has_coordinates:
+				coordinates = array('d')
+				coordinates.fromfile(f, 2 * node_count)
+
+		return cls(offsets, targets, weights, coordinates)
+
+	def save(self, filename):
+		with open(filename, 'wb') as f:
+			f.write(struct.pack(HEADER_FORMAT, FILE_MAGIC, self.node_count, self.edge_count, self.coordinates is not None))
+			self.offsets.tofile(f)
+			self.targets.tofile(f)
+			self.weights.tofile(f)
+			if self.coordinates is not None:
+				self.coordinates.tofile(f)
+
+	def neighbours(self, index):
+		# Returns (neighbour index, distance) pairs in the same way as BarrierGrid.neighbours()
+		first = self.offsets[index]
+		last = self.offsets[index + 1]
+		return zip(self.targets[first:last], self.weights[first:last])
+
+	def heuristic(self, end):
+		# Returns h(index), the Euclidean distance from index to end, or always 0 if the graph has no coordinates
+		if self.coordinates is None:
+			return lambda index: 0
+		coordinates = self.coordinates
+		end_x = coordinates[2 * end]
+		end_y = coordinates[2 * end + 1]
+		return lambda index: math.hypot(coordinates[2 * index] - end_x, coordinates[2 * index + 1] - end_y)
+
+	def find_path(self, start, end, weight = 1, expanded = None):
+		# The node indices of the shortest path from start to end, or [] if there is no path
+		return bg.a_star_indices(self, start, end, self.heuristic(end), weight, expanded)
+
+	def path_cost(self, path):
+		# The total weight of the edges along a path of node indices
+		cost = 0
+		for i in range(len(path) - 1):
+			cost += min(weight for target, weight in self.neighbours(path[i]) if target == path[i + 1])
+		return cost
+
+
+
+###################################################
+### Converting road networks                    ###
+###################################################
+def load_dimacs(gr_filename, co_filename = None):
+	# Reads a DIMACS road network, 'a source target weight' lines in the .gr file and 'v node x y' lines in the
+	# optional .co file. DIMACS nodes are numbered from 1, here they start at 0
+	sources = array('I')
+	targets = array('I')
+	weights = array('d')
+	node_count = 0
+	with open(gr_filename) as f:
+		for line in f:
+			if line.startswith('a '):
+				_, source, target, weight = line.split()
+				sources.append(int(source) - 1)
+				targets.append(int(target) - 1)
+				weights.append(float(weight))
+			elif line.startswith('p '):
+				node_count = int(line.split()[2])
+
+	coordinates = None
+	if co_filename is not None:
+		coordinates = array('d', bytes(16 * node_count))
+		with open(co_filename) as f:
+			for line in f:
+				if line.startswith('v '):
+					_, node, x, y = line.split()
+					coordinates[2 * (int(node) - 1)] = float(x)
+					coordinates[2 * (int(node) - 1) + 1] = float(y)
+
+	return CSRGraph.from_edges(node_count, sources, targets, weights, coordinates)
+
+
+
+def main():
+	parser = argparse.ArgumentParser(description = "Converts a DIMACS road network into a saved graph")
+	parser.add_argument('gr', help = "DIMACS .gr file of edges")
+	parser.add_argument('--coordinates', help = "DIMACS .co file of node coordinates")
+	parser.add_argument('--output', required = True, help = "Filename of the saved graph")
+	args = parser.parse_args()
+
+	graph = load_dimacs(args.gr, args.coordinates)
+	graph.save(args.output)
+
+	t0 = time.perf_counter()
+	CSRGraph.load(args.output)
+	print(graph.node_count, 'nodes and', graph.edge_count, 'edges saved to', args.output, '(loads in %.3f seconds)' % (time.perf_counter() - t0))
+
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,173 @@
+import heapq
+import math
+import struct
+from array import array
+from multiprocessing import Pool
+import a_star_algorithm as asg
+import barrier_grid as bg
+import map_io
+import path_database as pd
+
+###########################################################
+#   Goal bounding for maps that don't change
+#
+#	Ahead of time we run Dijkstra from every spot and, for each of the 8 moves out of it, work out the bounding
+#	box of every spot whose shortest path starts with that move. When A* later expands a spot it only has to
+#	look at the moves whose box holds the end, every other move can't be the start of a shortest path to it.
+#
+#	Each spot has exactly one recorded first move per target (see path_database.first_moves()) and following the
+#	recorded moves is itself a shortest path, so the pruned search still finds a shortest path.
+#
+#	The boxes are saved next to the map, 8 boxes of 4 uint16 (min row, max row, min col, max col) per spot, so the
+#	map can be at most 65535 rows. A move that never starts a shortest path has an empty box, min above max.
+#	File layout (native byte order):
+#		header              magic, rows
+#		boxes               rows * rows * 8 * 4 uint16
+#
+
+BOUNDS_EXTENSION = 'bounds'
+FILE_MAGIC = b'GBD1'
+HEADER_FORMAT = '=4sI' # magic, rows
+
+MOVES = pd.MOVES
+MOVE_INDEX = {move: i for i, move in enumerate(MOVES)}
+EMPTY_BOX = [0xFFFF, 0, 0xFFFF, 0]
+
+
+###################################################
+### Building the bounding boxes                 ###
+###################################################
+def source_boxes(barrier_grid, source):
+	# The 8 boxes of one spot, 32 values in order of MOVES
+	boxes = array('H', EMPTY_BOX * len(MOVES))
+	if barrier_grid.barriers[source]:
+		return boxes
+
+	for target, move in enumerate(pd.first_moves(barrier_grid, source)):
+		if move == pd.NO_MOVE:
+			continue
+		row, col = barrier_grid.get_pos(target)
+		box = move * 4
+		if row < boxes[box]:
+			boxes[box] = row
+		if row > boxes[box + 1]:
+			boxes[box + 1] = row
+		if col < boxes[box + 2]:
+			boxes[box + 2] = col
+		if col > boxes[box + 3]:
+			boxes[box + 3] = col
+
+	return boxes
+
+
+
+_worker_grid = None
+
+def _init_worker(barrier_grid):
+	global _worker_grid
+	_worker_grid = barrier_grid
+
+def _worker_boxes(source):
+	return source_boxes(_worker_grid, source)
+
+
+
+def build_goal_bounds(barrier_grid, filename, processes = None):
+	# Works out the boxes of every spot of the grid and writes them to filename. processes is the number of worker
+	# processes to share the Dijkstra searches between, None or 1 runs them all in this process
+	rows = barrier_grid.rows
+	if rows > 0xFFFF:
+		raise ValueError("Goal bounds can only be stored for maps of up to 65535 rows")
+	sources = range(rows * rows)
+
+	with open(filename, 'wb') as f:
+		f.write(struct.pack(HEADER_FORMAT, FILE_MAGIC, rows))
+		if processes is None or processes == 1:
+			for source in sources:
+				source_boxes(barrier_grid, source).tofile(f)
+		else:
+			with Pool(processes, initializer = _init_worker, initargs = (barrier_grid,)) as pool:
+				for boxes in pool.imap(_worker_boxes, sources, chunksize = 16):
+					boxes.tofile(f)
+
+
+
+def build_for_map(map_filename, processes = None):
+	# Builds the boxes for a map file and saves them next to the map
+	rows, barriers = map_io.load_barriers(map_filename)
+	barrier_grid = bg.BarrierGrid.from_positions(rows, barriers)
+	build_goal_bounds(barrier_grid, map_io.data_filename(map_filename, BOUNDS_EXTENSION), processes)
+
+
+
+###################################################
+### Class Definitions                           ###
+###################################################
+class GoalBounds:
+	def __init__(self, barrier_grid, filename):
+		# barrier_grid must be the same map the boxes were built from
+		self.barrier_grid = barrier_grid
+		self.expansions = 0 # Number of spots expanded by the last find_path()
+		self.pruned = 0 # Number of moves skipped by the last find_path() because the end was outside their box
+
+		with open(filename, 'rb') as f:
+			magic, rows = struct.unpack(HEADER_FORMAT, f.read(struct.calcsize(HEADER_FORMAT)))
+			if magic != FILE_MAGIC or rows != barrier_grid.rows:
+				raise ValueError(filename + " is not a set of goal bounds for this map")
+			self.boxes = array('H')
+			self.boxes.fromfile(f, rows * rows * len(MOVES) * 4)
+
+	@classmethod
+	def for_map(cls, map_filename):
+		# Loads the map and the boxes that were saved next to it
+		rows, barriers = map_io.load_barriers(map_filename)
+		barrier_grid = bg.BarrierGrid.from_positions(rows, barriers)
+		return cls(barrier_grid, map_io.data_filename(map_filename, BOUNDS_EXTENSION))
+
+	def in_box(self, index, move, pos):
+		# Whether pos is in the box of the move out of the spot
+		box = (index * len(MOVES) + move) * 4
+		boxes = self.boxes
+		return boxes[box] <= pos[0] <= boxes[box + 1] and boxes[box + 2] <= pos[1] <= boxes[box + 3]
+
+	def find_path(self, start_pos, end_pos, use_euclidean):
+		# A* that skips moves that can't lead to the end, returns the (row, col) positions of the path from start to
+		# end or [] if there is no path
+		barrier_grid = self.barrier_grid
+		self.expansions = 0
+		self.pruned = 0
+		start = barrier_grid.index(start_pos)
+		end = barrier_grid.index(end_pos)
+
+		g_score = {start: 0}
+		f_score = {start: asg.h(start_pos, end_pos, use_euclidean)}
+		came_from = {}
+
+		count = 0
+		open_set = [(f_score[start], count, start)]
+
+		while open_set:
+			f, _, current = heapq.heappop(open_set)
+			if f > f_score[current]:
+				continue # This spot has been queued again since with a lower f_score
+			self.expansions += 1
+
+			if current == end:
+				return [barrier_grid.get_pos(i) for i in asg.path_to(came_from, end)]
+
+			row, col = barrier_grid.get_pos(current)
+			for neighbour, distance in barrier_grid.neighbours(current):
+				n_row, n_col = barrier_grid.get_pos(neighbour)
+				if not self.in_box(current, MOVE_INDEX[(n_row - row, n_col - col)], end_pos):
+					self.pruned += 1
+					continue
+
+				temp_g_score = g_score[current] + distance
+				if temp_g_score < g_score.get(neighbour, math.inf):
+					came_from[neighbour] = current
+					g_score[neighbour] = temp_g_score
+					f_score[neighbour] = temp_g_score + asg.h((n_row, n_col), end_pos, use_euclidean)
+					count += 1
+					heapq.heappush(open_set, (f_score[neighbour], count, neighbour))
+
+		return []
@@ -0,0 +1,191 @@
+import math
+import heapq
+import struct
+from array import array
+
+###########################################################
+#   ALT (A*, Landmarks and Triangle inequality) heuristic
+#
+#	The Euclidean and Manhattan distances in h() ignore barriers and so in maze like maps A* ends up
+#	visiting nearly every spot. Instead we pick a few landmark spots ahead of time and store the true
+#	distance from each landmark to every spot on the grid. By the triangle inequality, for any landmark L
+#		d(p1, p2) >= |d(L, p2) - d(L, p1)|
+#	so the largest of these over all landmarks is a lower bound on the real distance and can be used as
+#	a heuristic that knows about the walls.
+#
+#	The tables can be saved next to the map file (see map_io.py) and loaded back without redoing any work.
+#
+
+LANDMARK_EXTENSION = 'landmarks'
+FILE_MAGIC = b'ALT1'
+HEADER_FORMAT = '<4sII' # magic, rows, number of landmarks
+
+
+###################################################
+### Distance table functions                    ###
+###################################################
+def spot_index(pos, rows):
+	# Spots are stored in the tables row by row
+	row, col = pos
+	return row * rows + col
+
+
+
+def dijkstra(grid, source):
+	# Returns the true distance from the source spot to every spot on the grid, spots that can not be
+	# reached are left as infinity. The neighbours of the spots must have been updated beforehand
+	rows = len(grid)
+	distances = array('d', [math.inf]) * (rows * rows)
+	distances[spot_index(source.get_pos(), rows)] = 0
+
+	count = 0
+	open_set = [(0, count, source)]
+
+	while open_set:
+		distance, _, current = heapq.heappop(open_set)
+		if distance > distances[spot_index(current.get_pos(), rows)]:
+			continue # A shorter route to this spot was already explored
+
+		for neighbour, cost in current.neighbours.items():
+			index = spot_index(neighbour.get_pos(), rows)
+			if distance + cost < distances[index]:
+				distances[index] = distance + cost
+				count += 1
+				heapq.heappush(open_set, (distance + cost, count, neighbour))
+
+	return distances
+
+
+
+###################################################
+### Landmark selection functions                ###
+###################################################
+def select_farthest(grid, k, seed_spot):
+	# Farthest point selection: the first landmark is the spot farthest from the seed spot, every
+	# landmark after that is the spot whose closest existing landmark is as far away as possible
+	rows = len(grid)
+	landmarks = []
+	tables = []
+
+	closest = dijkstra(grid, seed_spot)
+	for _ in range(k):
+		best = max((i for i in range(rows * rows) if closest[i] != math.inf), key = lambda i: closest[i], default = None)
+		if best is None or closest[best] == 0:
+			break # Every reachable spot is already a landmark
+
+		landmark = grid[best // rows][best % rows]
+		landmarks.append(landmark.get_pos())
+		tables.append(dijkstra(grid, landmark))
+
+		if len(landmarks) == 1:
+			closest = array('d', tables[0])
+		else:
+			closest = array('d', map(min, closest, tables[-1]))
+
+	return landmarks, tables
+
+
+
+def select_planar(grid, k, seed_spot):
+	# Planar selection: split the map into k equal slices around its centre and in each slice take the
+	# reachable spot that is farthest from the centre, this spreads the landmarks around the edge of the map
+	rows = len(grid)
+	reachable = dijkstra(grid, seed_spot)
+	centre = (rows - 1) / 2
+
+	best = [None] * k
+	best_distance = [-1] * k
+	for i in range(rows * rows):
+		if reachable[i] == math.inf:
+			continue
+		row, col = divmod(i, rows)
+		angle = math.atan2(col - centre, row - centre) + math.pi
+		sector = min(int(angle / (2 * math.pi) * k), k - 1)
+		distance = (row - centre)**2 + (col - centre)**2
+		if distance > best_distance[sector]:
+			best[sector] = i
+			best_distance[sector] = distance
+
+	landmarks = []
+	tables = []
+	for i in best:
+		if i is not None:
+			landmark = grid[i // rows][i % rows]
+			landmarks.append(landmark.get_pos())
+			tables.append(dijkstra(grid, landmark))
+
+	return landmarks, tables
+
+
+
+def build_landmarks(grid, k, seed_spot, method = 'farthest'):
+	# Picks k landmarks that can be reached from the seed spot (usually the start) and computes their
+	# distance tables, method is either 'farthest' or 'planar'
+	for row in grid:
+		for spot in row:
+			spot.update_neighbours(grid)
+
+	if method == 'farthest':
+		return select_farthest(grid, k, seed_spot)
+	elif method == 'planar':
+		return select_planar(grid, k, seed_spot)
+
+	raise ValueError("Unknown landmark selection method: " + str(method))
+
+
+
+###################################################
+### Heuristic                                   ###
+###################################################
+def make_alt_heuristic(rows, tables):
+	# Returns a function that can be passed as the heuristic to a_star_pathfind()
+	def alt_heuristic(p1, p2):
+		i = p1[0] * rows + p1[1]
+		j = p2[0] * rows + p2[1]
+
+		best = 0
+		for table in tables:
+			d1 = table[i]
+			d2 = table[j]
+			# A landmark that can't reach one of the spots tells us nothing about the distance between them
+			if d1 != math.inf and d2 != math.inf:
+				if abs(d2 - d1) > best:
+					best = abs(d2 - d1)
+
+		return best
+
+	return alt_heuristic
+
+
+
+###################################################
+### Saving and loading                          ###
+###################################################
+def save_landmarks(filename, rows, landmarks, tables):
+	# The file is a small header, the landmark positions and then each distance table as raw doubles
+	with open(filename, 'wb') as f:
+		f.write(struct.pack(HEADER_FORMAT, FILE_MAGIC, rows, len(landmarks)))
+		array('I', [spot_index(pos, rows) for pos in landmarks]).tofile(f)
+		for table in tables:
+			table.tofile(f)
+
+
+
+def load_landmarks(filename):
+	# Returns the rows, landmark positions and distance tables that were saved by save_landmarks()
+	with open(filename, 'rb') as f:
+		magic, rows, k = struct.unpack(HEADER_FORMAT, f.read(struct.calcsize(HEADER_FORMAT)))
+		if magic != FILE_MAGIC:
+			raise ValueError(filename + " is not a landmark file")
+
+		indices = array('I')
+		indices.fromfile(f, k)
+		landmarks = [divmod(i, rows) for i in indices]
+
+		tables = []
+		for _ in range(k):
+			table = array('d')
+			table.fromfile(f, rows * rows)
+			tables.append(table)
+
+	return rows, landmarks, tables
@@ -0,0 +1,132 @@
+import heapq
+import math
+
+###########################################################
+#   Lazy Theta*, any angle paths on the grid
+#
+#	A* on the grid can only head in 8 directions so a path across an open area zig zags. Theta* lets a spot's
+#	parent be any spot it can see, not just the spot it was reached from, so the path is a few straight lines
+#	between barrier corners. Lazy Theta* assumes each new spot can see its grandparent and only checks the line
+#	of sight when the spot is expanded, which is far fewer checks as most spots pushed are never expanded. If the
+#	check fails the parent falls back to the best expanded neighbour.
+#
+#	Line of sight is an integer Bresenham walk over the barriers from one spot to the other, each step of the
+#	walk follows the same rules as a normal move (a diagonal step needs one of the two spots beside it free).
+#
+#	Unlike the rest of the grid searches the distances here are Euclidean (a diagonal step is sqrt(2)) as the
+#	paths are made of straight lines at any angle. Paths are given as waypoints, the spots where the path turns.
+#
+
+###################################################
+### Helper functions                            ###
+###################################################
+def distance(p1, p2):
+	return math.hypot(p1[0] - p2[0], p1[1] - p2[1])
+
+
+
+def line_of_sight(barrier_grid, p1, p2):
+	# Whether the straight line from p1 to p2 can be walked without going through a barrier
+	row, col = p1
+	end_row, end_col = p2
+	d_row = abs(end_row - row)
+	d_col = abs(end_col - col)
+	step_row = 1 if end_row > row else -1
+	step_col = 1 if end_col > col else -1
+	error = d_row - d_col
+
+	while (row, col) != (end_row, end_col):
+		twice = 2 * error
+		move_row = twice > -d_col
+		move_col = twice < d_row
+
+		if move_row and move_col:
+			if barrier_grid.is_barrier(row + step_row, col + step_col):
+				return False
+			if barrier_grid.is_barrier(row + step_row, col) and barrier_grid.is_barrier(row, col + step_col):
+				return False
+		elif move_row:
+			if barrier_grid.is_barrier(row + step_row, col):
+				return False
+		elif barrier_grid.is_barrier(row, col + step_col):
+			return False
+
+		if move_row:
+			error -= d_col
+			row += step_row
+		if move_col:
+			error += d_row
+			col += step_col
+
+	return True
+
+
+
+###################################################
+### Class Definitions                           ###
+###################################################
+class LazyThetaStar:
+	def __init__(self, barrier_grid):
+		self.barrier_grid = barrier_grid
+		self.expansions = 0 # Number of spots expanded by the last find_path()
+		self.line_of_sight_checks = 0 # Number of line of sight checks made by the last find_path()
+
+	def line_of_sight(self, p1, p2):
+		self.line_of_sight_checks += 1
+		return line_of_sight(self.barrier_grid, p1, p2)
+
+	def find_path(self, start_pos, end_pos):
+		# Returns the waypoints of the path from start to end and its Euclidean length, or ([], inf) if there is no path
+		barrier_grid = self.barrier_grid
+		self.expansions = 0
+		self.line_of_sight_checks = 0
+		if barrier_grid.is_barrier(*start_pos) or barrier_grid.is_barrier(*end_pos):
+			return [], math.inf
+
+		g_score = {start_pos: 0}
+		parent = {start_pos: start_pos}
+		closed = set()
+		count = 0
+		open_set = [(distance(start_pos, end_pos), count, start_pos)]
+
+		while open_set:
+			f, _, current = heapq.heappop(open_set)
+			if current in closed or f > g_score[current] + distance(current, end_pos):
+				continue # Already expanded, or queued again since with a lower g_score
+
+			# The parent was taken on trust when the spot was pushed, if it can't actually be seen then use the best
+			# expanded neighbour instead. There is always one, the spot that pushed this one
+			if parent[current] != current and not self.line_of_sight(parent[current], current):
+				g_score[current] = math.inf
+				for neighbour, _ in barrier_grid.neighbours(barrier_grid.index(current)):
+					neighbour_pos = barrier_grid.get_pos(neighbour)
+					if neighbour_pos in closed:
+						temp_g_score = g_score[neighbour_pos] + distance(neighbour_pos, current)
+						if temp_g_score < g_score[current]:
+							g_score[current] = temp_g_score
+							parent[current] = neighbour_pos
+
+			self.expansions += 1
+			if current == end_pos:
+				path = [current]
+				while parent[current] != current:
+					current = parent[current]
+					path.append(current)
+				path.reverse()
+				return path, g_score[end_pos]
+			closed.add(current)
+
+			# Every neighbour is offered the current spot's parent, the line of sight is checked once it is expanded
+			through = parent[current]
+			for neighbour, _ in barrier_grid.neighbours(barrier_grid.index(current)):
+				neighbour_pos = barrier_grid.get_pos(neighbour)
+				if neighbour_pos in closed:
+					continue
+				temp_g_score = g_score[through] + distance(through, neighbour_pos)
+				if temp_g_score < g_score.get(neighbour_pos, math.inf):
+					g_score[neighbour_pos] = temp_g_score
+					parent[neighbour_pos] = through
+					count += 1
+					heapq.heappush(open_set, (temp_g_score + distance(neighbour_pos, end_pos), count, neighbour_pos))
+
+		return [], math.inf
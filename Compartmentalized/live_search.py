@@ -0,0 +1,93 @@
+import threading
+import time
+import stepping_search as ss
+import viewport as vp
+
+###########################################################
+#   A* search running apart from the display
+#
+#	Passing draw() to a_star_pathfind() redraws the whole window after every expansion, so the search runs at
+#	the speed of the display. A LiveSearch runs a SteppingSearch in its own thread and writes what each step
+#	changed into states, one byte per spot in the same states as viewport.py (OPEN, CLOSED, PATH, ...) indexed
+#	row * rows + col. The search never waits for the display.
+#
+#	The display starts from snapshot(), a copy of the whole buffer, and then at its own refresh rate takes the
+#	spots changed since with take_changes(). Both are taken between steps so a frame never shows half of a
+#	step, and the search keeps writing to the live buffer while the frame is drawn (see
+#	visualization.show_live_search()). Spots that are barriers, the start or the end are never written to.
+#
+#	Only one Python thread runs at a time, but the display thread sleeps between frames and a frame is the
+#	changed spots plus one blit of a palette surface of the visible blocks (see viewport.draw_viewport()), so
+#	nearly all of the time goes to the search.
+#
+
+STEP_SIZE = 64 # Expansions the search makes between each write to the buffer
+SEARCH_STATES = (vp.EMPTY, vp.OPEN, vp.CLOSED) # States the search can overwrite
+
+
+###################################################
+### Class Definitions                           ###
+###################################################
+class LiveSearch(threading.Thread):
+	def __init__(self, grid, start, end, use_euclidean, heuristic = None, weight = 1, step_size = STEP_SIZE):
+		# The neighbours of the spots must be updated beforehand. Call start() to begin the search
+		super().__init__(daemon = True)
+		self.rows = len(grid)
+		self.states = bytearray(vp.COLOR_STATES.get(spot.color, vp.EMPTY) for row in grid for spot in row)
+		self.search = ss.SteppingSearch(grid, start, end, use_euclidean, heuristic, weight)
+		self.step_size = step_size
+		self.lock = threading.Lock() # Held while a step is written so a snapshot never has half of one
+		self.changes = [] # (index, state) written since the last snapshot() or take_changes()
+		self.stopped = threading.Event()
+		self.seconds = None # Time the search took once it has finished
+
+	def write(self, spots, state):
+		# Changes the state of the spots in the buffer, leaving barriers, the start and the end alone
+		states = self.states
+		rows = self.rows
+		changes = self.changes
+		for spot in spots:
+			index = spot.row * rows + spot.col
+			if states[index] in SEARCH_STATES and states[index] != state:
+				states[index] = state
+				changes.append((index, state))
+
+	def run(self):
+		search = self.search
+		t0 = time.perf_counter()
+		while not search.done and not self.stopped.is_set():
+			delta = search.step(self.step_size)
+			with self.lock:
+				self.write(delta.opened, vp.OPEN)
+				self.write(delta.closed, vp.CLOSED)
+
+		if search.done:
+			with self.lock:
+				self.write(search.context.path_set, vp.PATH)
+			self.seconds = time.perf_counter() - t0
+
+	def stop(self):
+		# Ends the search early and waits for the thread to finish
+		self.stopped.set()
+		self.join()
+
+	def snapshot(self):
+		# A copy of the whole buffer
+		with self.lock:
+			self.changes = []
+			return bytes(self.states)
+
+	def take_changes(self):
+		# The (index, state) of the spots written since the last snapshot() or take_changes(), in order
+		with self.lock:
+			changes = self.changes
+			self.changes = []
+			return changes
+
+	@property
+	def done(self):
+		return self.search.done
+
+	@property
+	def context(self):
+		return self.search.context
@@ -0,0 +1,112 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+import map_io
+import path_server as ps
+
+###########################################################
+#   Load generator for path_server.py
+#
+#	Opens a number of connections to the server and keeps each one busy with random queries between empty
+#	spots of a map, then prints the latency percentiles and queries per second. Run from this folder with
+#	the server already running, ie.
+#		python load_generator.py city.map --connections 16 --requests 2000
+#
+#	Each connection has up to --pipeline queries waiting for an answer at once, with 1 every query waits for
+#	the answer to the one before.
+#
+
+###################################################
+### Helper functions                            ###
+###################################################
+def percentile(values, p):
+	# The value p percent of the way through the sorted values
+	ordered = sorted(values)
+	return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+
+def random_queries(map_filename, count, seed, use_euclidean):
+	# count queries between random empty spots of the map
+	rows, barriers = map_io.load_barriers(map_filename)
+	barrier_set = set(barriers)
+	free = [(row, col) for row in range(rows) for col in range(rows) if (row, col) not in barrier_set]
+	rng = random.Random(seed)
+	return [{'id': i, 'map': map_filename, 'start': rng.choice(free), 'end': rng.choice(free), 'euclidean': use_euclidean} for i in range(count)]
+
+
+
+###################################################
+### Running the load                            ###
+###################################################
+async def run_connection(open_connection, queries, pipeline, latencies, errors):
+	# Sends the queries over one connection, keeping up to pipeline of them waiting at once
+	reader, writer = await open_connection()
+	sent_at = {}
+	next_query = 0
+
+	try:
+		while next_query < len(queries) or sent_at:
+			while next_query < len(queries) and len(sent_at) < pipeline:
+				query = queries[next_query]
+				sent_at[query['id']] = time.perf_counter()
+				writer.write((json.dumps(query) + '\n').encode())
+				next_query += 1
+			await writer.drain()
+
+			line = await reader.readline()
+			if not line:
+				raise ConnectionError("The server closed the connection")
+			response = json.loads(line)
+			latencies.append(time.perf_counter() - sent_at.pop(response['id']))
+			if 'error' in response:
+				errors.append(response['error'])
+	finally:
+		writer.close()
+
+
+
+async def generate_load(map_filename, connections, requests, pipeline = 1, seed = 0, use_euclidean = False, port = ps.PORT, unix_path = None):
+	# Returns the latency of every query in seconds, the error messages and the total number of seconds taken
+	if unix_path is not None:
+		open_connection = lambda: asyncio.open_unix_connection(unix_path)
+	else:
+		open_connection = lambda: asyncio.open_connection(ps.HOST, port)
+
+	queries = random_queries(map_filename, requests, seed, use_euclidean)
+	latencies = []
+	errors = []
+
+	t0 = time.perf_counter()
+	await asyncio.gather(*(run_connection(open_connection, queries[i::connections], pipeline, latencies, errors) for i in range(connections)))
+	return latencies, errors, time.perf_counter() - t0
+
+
+
+def main():
+	parser = argparse.ArgumentParser(description = "Load generator for path_server.py")
+	parser.add_argument('map', help = "Map file the queries are made on, relative to the folder both are run from")
+	parser.add_argument('--connections', type = int, default = 8)
+	parser.add_argument('--requests', type = int, default = 1000, help = "Total number of queries over all connections")
+	parser.add_argument('--pipeline', type = int, default = 1, help = "Most queries waiting for an answer on each connection")
+	parser.add_argument('--seed', type = int, default = 0)
+	parser.add_argument('--euclidean', action = 'store_true', help = "Use the Euclidean distance instead of Manhattan")
+	parser.add_argument('--port', type = int, default = ps.PORT)
+	parser.add_argument('--unix', help = "Connect to a Unix socket at this path instead of TCP")
+	args = parser.parse_args()
+
+	latencies, errors, seconds = asyncio.run(generate_load(args.map, args.connections, args.requests, args.pipeline, args.seed, args.euclidean, args.port, args.unix))
+
+	print(len(latencies), 'queries over', args.connections, 'connections in', '%.2f' % seconds, 'seconds')
+	print('p50 latency   %.2f ms' % (percentile(latencies, 50) * 1000))
+	print('p99 latency   %.2f ms' % (percentile(latencies, 99) * 1000))
+	print('QPS           %.1f' % (len(latencies) / seconds))
+	if errors:
+		print(len(errors), 'errors, ie.', errors[0])
+
+
+
+if __name__ == '__main__':
+	main()
@@ -1,6 +1,7 @@
 import visualization as vs
 import pygame
 import math
+import sys
 
 ###########################################################
 #   This is built onto the astar.py file.
@@ -24,6 +25,10 @@ pygame.display.set_caption("A* Path Finding Algorithm")
 ###################################################
 ### Code that is too be run                     ###
 ###################################################
-shortest_path = vs.a_star_main(WIN, WIDTH)
+if len(sys.argv) > 1:
+	# python main.py city.map opens a saved map of any size in the zoomable viewer instead of the editor
+	shortest_path = vs.map_viewer_main(WIN, WIDTH, sys.argv[1])
+else:
+	shortest_path = vs.a_star_main(WIN, WIDTH)
 
 shortest_path.sort()
\ No newline at end of file
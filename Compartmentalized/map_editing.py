@@ -0,0 +1,170 @@
+import argparse
+import random
+import barrier_grid as bg
+import map_io
+
+###########################################################
+#   Bulk editing and generated maps
+#
+#	The editor paints one spot per mouse event which makes drawing a real test map slow. These commands change
+#	the barriers of a BarrierGrid in bulk, a filled rectangle is one slice assignment per row and a noise map is
+#	a single translate() of random bytes. The editor keeps its barriers in one BarrierGrid that these commands
+#	change, each returns the first and last row it changed so the editor only copies those rows back onto its
+#	Spots (see visualization.apply_barriers()).
+#
+#	Generated maps can also be written straight to a map file from this folder, ie.
+#		python map_editing.py maze 511 --seed 3 --output maze.map
+#		python map_editing.py noise 1024 --density 0.3 --output noise.map
+#
+
+NOISE_DENSITY = 0.3 # Chance of a spot being a barrier in a noise map
+FLOOD_MOVES = bg.STRAIGHT_MOVES + bg.DIAGONAL_MOVES # A wall drawn with draw_line() only touches at its corners
+
+
+###################################################
+### Editing commands                            ###
+###################################################
+def clamp(barrier_grid, pos):
+	# The nearest position on the grid, so a drag can end outside of it
+	return min(max(pos[0], 0), barrier_grid.rows - 1), min(max(pos[1], 0), barrier_grid.rows - 1)
+
+
+
+def fill_rect(barrier_grid, p1, p2, value = 1):
+	# Sets every spot of the rectangle with corners p1 and p2 to value (1 for a barrier, 0 to erase). Returns the
+	# first and last row changed
+	(row1, col1), (row2, col2) = clamp(barrier_grid, p1), clamp(barrier_grid, p2)
+	rows = barrier_grid.rows
+	first_col = min(col1, col2)
+	line = bytes([value]) * (abs(col2 - col1) + 1)
+	for row in range(min(row1, row2), max(row1, row2) + 1):
+		barrier_grid.barriers[row * rows + first_col:row * rows + first_col + len(line)] = line
+	return min(row1, row2), max(row1, row2)
+
+
+
+def line_positions(p1, p2):
+	# The spots on a straight line from p1 to p2, a Bresenham walk that steps diagonally where it needs to
+	row, col = p1
+	end_row, end_col = p2
+	d_row = abs(end_row - row)
+	d_col = abs(end_col - col)
+	step_row = 1 if end_row > row else -1
+	step_col = 1 if end_col > col else -1
+	error = d_row - d_col
+
+	positions = [(row, col)]
+	while (row, col) != (end_row, end_col):
+		twice = 2 * error
+		if twice > -d_col:
+			error -= d_col
+			row += step_row
+		if twice < d_row:
+			error += d_row
+			col += step_col
+		positions.append((row, col))
+
+	return positions
+
+
+
+def draw_line(barrier_grid, p1, p2, value = 1):
+	# Sets every spot on the line from p1 to p2 to value. Returns the first and last row changed
+	p1, p2 = clamp(barrier_grid, p1), clamp(barrier_grid, p2)
+	rows = barrier_grid.rows
+	for row, col in line_positions(p1, p2):
+		barrier_grid.barriers[row * rows + col] = value
+	return min(p1[0], p2[0]), max(p1[0], p2[0])
+
+
+
+def flood_erase(barrier_grid, pos):
+	# Erases the whole wall that pos is part of, every barrier joined to it in any of the 8 directions. Returns the
+	# first and last row changed, or None if there is no barrier at pos
+	if not (0 <= pos[0] < barrier_grid.rows and 0 <= pos[1] < barrier_grid.rows) or not barrier_grid.is_barrier(*pos):
+		return None
+
+	rows = barrier_grid.rows
+	barriers = barrier_grid.barriers
+	barriers[pos[0] * rows + pos[1]] = 0
+	stack = [pos]
+	first_row = last_row = pos[0]
+	while stack:
+		row, col = stack.pop()
+		for d_row, d_col in FLOOD_MOVES:
+			next_row = row + d_row
+			next_col = col + d_col
+			if 0 <= next_row < rows and 0 <= next_col < rows and barriers[next_row * rows + next_col]:
+				barriers[next_row * rows + next_col] = 0
+				stack.append((next_row, next_col))
+				first_row = min(first_row, next_row)
+				last_row = max(last_row, next_row)
+
+	return first_row, last_row
+
+
+
+###################################################
+### Generated maps                              ###
+###################################################
+def noise_map(rows, density = NOISE_DENSITY, seed = None):
+	# A BarrierGrid where each spot is a barrier with the given probability. The random bytes are turned into
+	# barriers by a translate() table with the first density * 256 byte values mapped to 1
+	rng = random.Random(seed)
+	cutoff = round(density * 256)
+	return bg.BarrierGrid(rows, rng.randbytes(rows * rows).translate(bytes([1]) * cutoff + bytes(256 - cutoff)))
+
+
+
+def maze_map(rows, seed = None):
+	# A perfect maze (one path between any two empty spots) made by a randomised depth first search. The rooms are
+	# the spots with an odd row and col and the walls between them are knocked through as the search moves on, an
+	# even number of rows leaves an extra wall along the far edges
+	rng = random.Random(seed)
+	barrier_grid = bg.BarrierGrid(rows, bytes([1]) * (rows * rows))
+	barriers = barrier_grid.barriers
+	last = rows - 2 # Highest row or col a room can be at
+	if last < 1:
+		return barrier_grid
+
+	barriers[1 * rows + 1] = 0
+	stack = [(1, 1)]
+	while stack:
+		row, col = stack[-1]
+		unvisited = [(row + 2 * d_row, col + 2 * d_col) for d_row, d_col in bg.STRAIGHT_MOVES
+					if 1 <= row + 2 * d_row <= last and 1 <= col + 2 * d_col <= last and barriers[(row + 2 * d_row) * rows + col + 2 * d_col]]
+		if not unvisited:
+			stack.pop()
+			continue
+
+		next_row, next_col = rng.choice(unvisited)
+		barriers[((row + next_row) // 2) * rows + (col + next_col) // 2] = 0
+		barriers[next_row * rows + next_col] = 0
+		stack.append((next_row, next_col))
+
+	return barrier_grid
+
+
+
+GENERATORS = {
+	'maze': lambda args: maze_map(args.rows, args.seed),
+	'noise': lambda args: noise_map(args.rows, args.density, args.seed),
+}
+
+
+
+def main():
+	parser = argparse.ArgumentParser(description = "Writes a generated map to a map file")
+	parser.add_argument('kind', choices = list(GENERATORS))
+	parser.add_argument('rows', type = int)
+	parser.add_argument('--density', type = float, default = NOISE_DENSITY, help = "Chance of a spot being a barrier in a noise map")
+	parser.add_argument('--seed', type = int)
+	parser.add_argument('--output', required = True, help = "Map file to write")
+	args = parser.parse_args()
+
+	map_io.save_barrier_grid(args.output, GENERATORS[args.kind](args))
+
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,74 @@
+import Spot as S
+
+###########################################################
+#   Saving and loading of maps so that a grid drawn in the editor can be reused
+#	between runs, and so that preprocessed data (such as the landmark tables) has a
+#	map to live alongside.
+#
+#	A map file is plain text, the first line is the number of rows and then each line
+#	is one row of the grid where '#' is a barrier and '.' is an empty spot
+#
+
+BARRIER_CHAR = '#'
+EMPTY_CHAR = '.'
+
+
+###################################################
+### Map saving and loading functions            ###
+###################################################
+def save_map(filename, grid):
+	# Writes the barriers of the grid out to a map file
+	with open(filename, 'w') as f:
+		f.write(str(len(grid)) + '\n')
+		for row in grid:
+			f.write(''.join(BARRIER_CHAR if spot.is_barrier() else EMPTY_CHAR for spot in row) + '\n')
+
+
+
+def save_barrier_grid(filename, barrier_grid):
+	# Writes a BarrierGrid out to a map file, each row is turned into characters with one translate()
+	characters = bytes([ord(EMPTY_CHAR), ord(BARRIER_CHAR)]) + bytes(254)
+	rows = barrier_grid.rows
+	with open(filename, 'w') as f:
+		f.write(str(rows) + '\n')
+		for row in range(rows):
+			f.write(barrier_grid.barriers[row * rows:(row + 1) * rows].translate(characters).decode() + '\n')
+
+
+
+def load_barriers(filename):
+	# Reads a map file and returns the number of rows and the positions of its barriers
+	with open(filename) as f:
+		rows = int(f.readline())
+		barriers = []
+		for i in range(rows):
+			line = f.readline().rstrip('\n')
+			for j, char in enumerate(line[:rows]):
+				if char == BARRIER_CHAR:
+					barriers.append((i, j))
+
+	return rows, barriers
+
+
+
+def load_map(filename, width):
+	# Creates a new grid from a map file, width is the size of the display in the same way as make_grid()
+	rows, barriers = load_barriers(filename)
+
+	grid = []
+	gap = width // rows
+	for i in range(rows):
+		grid.append([])
+		for j in range(rows):
+			grid[i].append(S.Spot(i, j, gap, rows))
+
+	for row, col in barriers:
+		grid[row][col].make_barrier()
+
+	return grid
+
+
+
+def data_filename(map_filename, extension):
+	# Preprocessed data is stored next to its map with an extra extension, ie. city.map -> city.map.landmarks
+	return map_filename + '.' + extension
@@ -0,0 +1,169 @@
+import math
+import a_star_algorithm as asg
+import search_context as sc
+
+###########################################################
+#   Searches that use less memory than A* for very large maps
+#
+#	A* keeps a g_score, f_score and came_from entry for every spot it reaches as well as a priority queue and
+#	open_set_hash. These two searches trade extra work for less memory:
+#
+#	- Fringe Search keeps only a g_score and parent for each spot reached plus a plain list of the spots on the
+#	  edge of the search. Instead of sorting by f_score it sweeps the list repeatedly, each time allowing spots
+#	  up to a higher f_score limit, so there is no priority queue or f_score hash.
+#	- IDA* only remembers the path it is currently on, doing a depth first search up to an f_score limit and
+#	  raising the limit until the end is reached. To stop it redoing too much work a transposition table
+#	  remembers the lowest g_score each spot has been seen with, up to table_limit spots.
+#
+#	With the Euclidean distance nearly every f_score is different so the limit of either search only goes up a
+#	tiny bit each time, and IDA* searches the whole tree again for each of them. threshold_step makes it go up
+#	by at least that much, the path found is then at most threshold_step longer than the shortest path. By
+#	default it is EUCLIDEAN_THRESHOLD_STEP with the Euclidean distance and 0 otherwise, as with the Manhattan
+#	distance every f_score is a multiple of 0.25 and there are few different ones.
+#
+#	Both take the same arguments as the other headless searches and return the list of spots from start to end,
+#	or [] if there is no path. The number of expansions is recorded in the context if one is given. The
+#	neighbours of the spots must be updated beforehand.
+#
+
+TABLE_LIMIT = 1000000 # Default most spots IDA* remembers
+THRESHOLD_STEP = None # Default least amount the f_score limit goes up by, 0 always finds the shortest path and None picks one for the heuristic
+EUCLIDEAN_THRESHOLD_STEP = 0.25 # Used with the Euclidean distance when none is given, a quarter of the shortest move
+
+
+###################################################
+### Helper functions                            ###
+###################################################
+def least_step(use_euclidean, threshold_step):
+	# The threshold step to search with, the one given or if that is None the default for the heuristic
+	if threshold_step is not None:
+		return threshold_step
+	return EUCLIDEAN_THRESHOLD_STEP if use_euclidean else 0
+
+
+
+###################################################
+### Fringe Search                               ###
+###################################################
+def fringe_search(grid, start, end, use_euclidean, heuristic = None, context = None, threshold_step = THRESHOLD_STEP):
+	if heuristic is None:
+		heuristic = lambda p1, p2: asg.h(p1, p2, use_euclidean)
+	if context is None:
+		context = sc.SearchContext()
+	threshold_step = least_step(use_euclidean, threshold_step)
+
+	end_pos = end.get_pos()
+	cache = {start: (0, None)} # spot -> (g_score, parent)
+	f_limit = heuristic(start.get_pos(), end_pos)
+
+	# now holds the spots to look at with the current f_limit and later the ones that went over it. Entries are
+	# (spot, g_score) and are skipped if the spot has since been reached with a lower g_score
+	later = [(start, 0)]
+
+	while later:
+		now = later
+		now.reverse() # now is used as a stack so reverse it to keep the spots in the order they were added
+		later = []
+		next_limit = math.inf
+
+		while now:
+			current, g = now.pop()
+			if cache[current][0] != g:
+				continue
+
+			f = g + heuristic(current.get_pos(), end_pos)
+			if f > f_limit:
+				# Leave it for the next sweep and remember the lowest f_score that went over the limit
+				next_limit = min(next_limit, f)
+				later.append((current, g))
+				continue
+
+			if current == end:
+				path = [current]
+				while cache[current][1] is not None:
+					current = cache[current][1]
+					path.append(current)
+				path.reverse()
+				context.path = path
+				return path
+
+			context.expansions += 1
+			for neighbour, distance in current.neighbours.items():
+				temp_g_score = g + distance
+				if neighbour in cache and temp_g_score >= cache[neighbour][0]:
+					continue
+				cache[neighbour] = (temp_g_score, current)
+				now.append((neighbour, temp_g_score))
+
+		f_limit = max(next_limit, f_limit + threshold_step)
+
+	return []
+
+
+
+###################################################
+### IDA* with a transposition table             ###
+###################################################
+def ida_star(grid, start, end, use_euclidean, heuristic = None, context = None, table_limit = TABLE_LIMIT, threshold_step = THRESHOLD_STEP):
+	if heuristic is None:
+		heuristic = lambda p1, p2: asg.h(p1, p2, use_euclidean)
+	if context is None:
+		context = sc.SearchContext()
+	threshold_step = least_step(use_euclidean, threshold_step)
+
+	end_pos = end.get_pos()
+	h_of = lambda spot: heuristic(spot.get_pos(), end_pos)
+
+	# spot -> (lowest g_score seen, iteration it was seen in). A spot reached again with a higher g_score can be
+	# skipped, and so can one reached with the same g_score in the same iteration as it has already been searched
+	table = {}
+	threshold = h_of(start)
+	iteration = 0
+
+	while True:
+		iteration += 1
+		next_threshold = math.inf
+
+		# Depth first search with our own stack, each entry is (spot, g_score, iterator over its neighbours)
+		path = [start]
+		on_path = {start}
+		stack = [(start, 0, iter(start.neighbours.items()))]
+
+		while stack:
+			current, g, neighbours = stack[-1]
+			if current == end:
+				context.path = list(path)
+				return context.path
+
+			step = next(neighbours, None)
+			if step is None:
+				# Every neighbour has been tried so go back up the path
+				stack.pop()
+				path.pop()
+				on_path.discard(current)
+				continue
+
+			neighbour, distance = step
+			if neighbour in on_path:
+				continue
+
+			temp_g_score = g + distance
+			f = temp_g_score + h_of(neighbour)
+			if f > threshold:
+				next_threshold = min(next_threshold, f)
+				continue
+
+			seen = table.get(neighbour)
+			if seen is not None and (temp_g_score > seen[0] or (temp_g_score == seen[0] and seen[1] == iteration)):
+				continue
+			if seen is not None or len(table) < table_limit:
+				table[neighbour] = (temp_g_score, iteration)
+
+			context.expansions += 1
+			path.append(neighbour)
+			on_path.add(neighbour)
+			stack.append((neighbour, temp_g_score, iter(neighbour.neighbours.items())))
+
+		if next_threshold == math.inf:
+			return [] # Nothing went over the threshold so every reachable spot has been searched
+		threshold = max(next_threshold, threshold + threshold_step)
@@ -0,0 +1,135 @@
+import heapq
+import math
+
+###########################################################
+#   Different ways of storing the open set of a search
+#
+#	The open set has to keep handing back the spot with the lowest f_score. A binary heap does this with
+#	O(log n) comparisons on every push and pop, but on a grid the f_scores only take a few different values
+#	which lets us do better:
+#	- BucketQueue keeps a list of spots for every f_score, pushing and popping are O(1) apart from moving
+#	  along to the next non-empty bucket.
+#	- RadixHeap is for when the f_scores popped never go down (a consistent heuristic), spots are kept in
+#	  buckets by the highest bit that differs from the last popped f_score so each spot is only moved
+#	  O(log C) times. Pushing a lower f_score than the last one popped raises a ValueError rather than giving
+#	  a longer path, which happens with the Manhattan distance as a 1.75 diagonal makes it inconsistent.
+#
+#	Both of these need whole number f_scores. resolution is how many steps a distance of 1 is split into,
+#	ie. with the 1.75 diagonals a resolution of 4 makes every distance a whole number. f_scores that aren't a
+#	multiple of 1 / resolution (ie. with the Euclidean distance) are rounded down, so spots within the same
+#	step come out in no particular order.
+#
+#	All of them have the same methods: push(f_score, spot), pop() -> (f_score, spot) and len().
+#
+
+###################################################
+### Class Definitions                           ###
+###################################################
+class BinaryHeapOpenList:
+	def __init__(self):
+		self.heap = []
+		self.count = 0 # Used for tiebreakers so spots with the same f_score come out in the order they went in
+
+	def push(self, f_score, spot):
+		self.count += 1
+		heapq.heappush(self.heap, (f_score, self.count, spot))
+
+	def pop(self):
+		f_score, _, spot = heapq.heappop(self.heap)
+		return f_score, spot
+
+	def __len__(self):
+		return len(self.heap)
+
+
+
+class BucketQueue:
+	def __init__(self, resolution = 1):
+		self.resolution = resolution
+		self.buckets = []
+		self.lowest = 0 # No bucket below this one has anything in it
+		self.size = 0
+
+	def push(self, f_score, spot):
+		bucket = math.floor(f_score * self.resolution + 1e-9)
+		while bucket >= len(self.buckets):
+			self.buckets.append([])
+
+		self.buckets[bucket].append((f_score, spot))
+		if bucket < self.lowest:
+			self.lowest = bucket
+		self.size += 1
+
+	def pop(self):
+		if self.size == 0:
+			raise IndexError("pop from an empty BucketQueue")
+
+		while not self.buckets[self.lowest]:
+			self.lowest += 1
+
+		self.size -= 1
+		return self.buckets[self.lowest].pop()
+
+	def __len__(self):
+		return self.size
+
+
+
+class RadixHeap:
+	def __init__(self, resolution = 1):
+		self.resolution = resolution
+		self.buckets = [[] for _ in range(65)] # Bucket i holds keys whose highest bit differing from last is bit i - 1
+		self.last = 0 # The key of the last spot popped
+		self.size = 0
+
+	def bucket_of(self, key):
+		return (key ^ self.last).bit_length()
+
+	def push(self, f_score, spot):
+		# A key lower than the last popped key breaks the rule that keys never go down, it would come out after spots
+		# with higher keys so the search could no longer be trusted to find the shortest path
+		key = math.floor(f_score * self.resolution + 1e-9)
+		if key < self.last:
+			raise ValueError("RadixHeap needs f_scores that never go down, ie. a consistent heuristic")
+		self.buckets[self.bucket_of(key)].append((key, f_score, spot))
+		self.size += 1
+
+	def pop(self):
+		if self.size == 0:
+			raise IndexError("pop from an empty RadixHeap")
+
+		if not self.buckets[0]:
+			# Find the first non-empty bucket, its smallest key becomes last and its spots are spread out into
+			# the lower buckets
+			i = 1
+			while not self.buckets[i]:
+				i += 1
+
+			entries = self.buckets[i]
+			self.buckets[i] = []
+			self.last = min(entry[0] for entry in entries)
+			for entry in entries:
+				self.buckets[self.bucket_of(entry[0])].append(entry)
+
+		self.size -= 1
+		_, f_score, spot = self.buckets[0].pop()
+		return f_score, spot
+
+	def __len__(self):
+		return self.size
+
+
+
+OPEN_LISTS = {
+	'heap': BinaryHeapOpenList,
+	'bucket': BucketQueue,
+	'radix': RadixHeap,
+}
+
+def make_open_list(name, resolution = 1):
+	# Creates an open list by name, the resolution is ignored by the binary heap
+	if name not in OPEN_LISTS:
+		raise ValueError("Unknown open list: " + str(name))
+	if name == 'heap':
+		return BinaryHeapOpenList()
+	return OPEN_LISTS[name](resolution)
@@ -0,0 +1,181 @@
+import heapq
+import math
+import multiprocessing
+import queue
+import time
+import a_star_algorithm as asg
+
+###########################################################
+#   Hash Distributed A* (HDA*), one search spread over several processes
+#
+#	Every spot belongs to exactly one worker process, picked by hashing its index. A worker keeps the open set,
+#	g_scores and came_from of only its own spots. When it finds a shorter way to a spot that belongs to another
+#	worker it sends (spot, g_score, parent) to that worker's queue instead of adding it itself.
+#
+#	Whoever expands the end first sets the incumbent, the length of the best path found so far, and from then
+#	on every worker ignores spots whose f_score isn't below it. The search is over once every worker is idle and
+#	every message that was sent has been received. The main process checks this twice in a row with the same
+#	message counts, so a message that was picked up between looking at the idle flags and the counts can't be
+#	missed. The path is then put back together by asking the owner of each spot for its parent.
+#
+#	Works on a BarrierGrid (see barrier_grid.py) so that the grid can be copied to the workers cheaply.
+#
+
+BATCH_SIZE = 64 # Expansions between each time a worker sends its messages and checks its queue
+TERMINATION_CHECK_INTERVAL = 0.001 # Seconds between the main process checking whether the search is over
+
+
+###################################################
+### Helper functions                            ###
+###################################################
+def owner(index, workers):
+	# Multiplying by a large odd number mixes the bits so neighbouring spots go to different workers
+	return ((index * 2654435761) & 0xFFFFFFFF) % workers
+
+
+
+###################################################
+### Worker process                              ###
+###################################################
+def _worker(worker_id, workers, barrier_grid, end_pos, use_euclidean, inboxes, results, counters, idle, incumbent):
+	inbox = inboxes[worker_id]
+	sent, received = counters
+	end = barrier_grid.index(end_pos)
+
+	g_score = {}
+	came_from = {}
+	open_set = []
+	count = 0
+	expansions = 0
+	outgoing = [[] for _ in range(workers)]
+
+	def add(index, g, parent):
+		nonlocal count
+		if g < g_score.get(index, math.inf):
+			g_score[index] = g
+			came_from[index] = parent
+			count += 1
+			heapq.heappush(open_set, (g + asg.h(barrier_grid.get_pos(index), end_pos, use_euclidean), count, index, g))
+
+	def flush():
+		for other in range(workers):
+			if outgoing[other]:
+				with sent.get_lock():
+					sent.value += 1
+				inboxes[other].put(('nodes', outgoing[other]))
+				outgoing[other] = []
+
+	def handle(message):
+		# Returns False once the worker should stop
+		if message[0] == 'nodes':
+			idle[worker_id] = 0 # Has to be cleared before the message is counted as received
+			with received.get_lock():
+				received.value += 1
+			for index, g, parent in message[1]:
+				add(index, g, parent)
+		elif message[0] == 'parent':
+			results.put(('parent', message[1], came_from.get(message[1], -1)))
+		elif message[0] == 'stop':
+			results.put(('stats', worker_id, expansions))
+			return False
+		return True
+
+	while True:
+		# Pick up everything waiting in the queue without blocking
+		try:
+			while True:
+				if not handle(inbox.get_nowait()):
+					return
+		except queue.Empty:
+			pass
+
+		# Expand a batch of spots that could still lead to a better path than the incumbent
+		for _ in range(BATCH_SIZE):
+			if not open_set:
+				break
+			f, _, current, g = open_set[0]
+			if f >= incumbent.value:
+				open_set.clear() # Nothing left in the open set can do better than the path already found
+				break
+			heapq.heappop(open_set)
+			if g > g_score[current]:
+				continue # Stale entry, the spot was reached again with a lower g_score
+
+			expansions += 1
+			if current == end:
+				with incumbent.get_lock():
+					if g < incumbent.value:
+						incumbent.value = g
+				continue
+
+			for neighbour, distance in barrier_grid.neighbours(current):
+				other = owner(neighbour, workers)
+				if other == worker_id:
+					add(neighbour, g + distance, current)
+				else:
+					outgoing[other].append((neighbour, g + distance, current))
+
+		flush()
+
+		if not open_set:
+			idle[worker_id] = 1
+			if not handle(inbox.get()):
+				return
+
+
+
+###################################################
+### HDA* path finding                           ###
+###################################################
+def hda_star(barrier_grid, start_pos, end_pos, use_euclidean, workers = 4):
+	# Returns the (row, col) positions of the path from start to end ([] if there is no path) and a list of how many
+	# spots each worker expanded
+	inboxes = [multiprocessing.Queue() for _ in range(workers)]
+	results = multiprocessing.Queue()
+	counters = (multiprocessing.Value('q', 0), multiprocessing.Value('q', 0))
+	idle = multiprocessing.Array('b', [0] * workers)
+	incumbent = multiprocessing.Value('d', math.inf)
+
+	processes = [multiprocessing.Process(target = _worker, args = (i, workers, barrier_grid, end_pos, use_euclidean, inboxes, results, counters, idle, incumbent), daemon = True) for i in range(workers)]
+	for process in processes:
+		process.start()
+
+	# Hand the start to its owner
+	start = barrier_grid.index(start_pos)
+	with counters[0].get_lock():
+		counters[0].value += 1
+	inboxes[owner(start, workers)].put(('nodes', [(start, 0, -1)]))
+
+	# Wait for every worker to be idle with no messages on the way, seen twice in a row
+	last_counts = None
+	while True:
+		time.sleep(TERMINATION_CHECK_INTERVAL)
+		counts = (counters[0].value, counters[1].value)
+		if counts[0] == counts[1] and all(idle):
+			if counts == last_counts and (counters[0].value, counters[1].value) == counts:
+				break
+			last_counts = counts
+		else:
+			last_counts = None
+
+	# Follow the parents back from the end, asking each spot's owner in turn
+	path = []
+	if incumbent.value != math.inf:
+		end = barrier_grid.index(end_pos)
+		current = end
+		while current != -1:
+			path.append(barrier_grid.get_pos(current))
+			inboxes[owner(current, workers)].put(('parent', current))
+			_, _, current = results.get()
+		path.reverse()
+
+	for inbox in inboxes:
+		inbox.put(('stop',))
+	expansions = [0] * workers
+	for _ in range(workers):
+		_, worker_id, worker_expansions = results.get()
+		expansions[worker_id] = worker_expansions
+	for process in processes:
+		process.join()
+
+	return path, expansions
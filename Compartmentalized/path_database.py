@@ -0,0 +1,203 @@
+import bisect
+import heapq
+import math
+import mmap
+import struct
+from array import array
+from multiprocessing import Pool
+import barrier_grid as bg
+import map_io
+
+###########################################################
+#   Compressed path database (CPD) for maps that don't change
+#
+#	For every source spot we run Dijkstra once ahead of time and record, for every other spot, which of the
+#	8 moves to take first to get there along a shortest path. Following the first move, then the first move
+#	from the spot we land on and so on walks the whole shortest path without any searching.
+#
+#	Storing a move for every pair of spots would be rows^4 bytes, but spots next to each other are nearly
+#	always reached with the same first move so each source's row of moves is stored as runs:
+#	(index of the first spot in the run, move). A lookup is a binary search within the source's runs.
+#
+#	The file is opened with mmap so only the parts that are used are read from disk and many processes can
+#	share one copy. File layout (native byte order):
+#		header              magic, rows, number of runs
+#		offsets             rows * rows + 1 uint32, the runs of source s are offsets[s] to offsets[s + 1]
+#		run starts          uint32 per run
+#		run moves           uint8 per run
+#
+
+CPD_EXTENSION = 'cpd'
+FILE_MAGIC = b'CPD1'
+HEADER_FORMAT = '=4sII' # magic, rows, number of runs
+
+MOVES = bg.STRAIGHT_MOVES + bg.DIAGONAL_MOVES
+NO_MOVE = 255 # The spot is the source itself or can't be reached
+
+
+###################################################
+### Building the database                       ###
+###################################################
+def first_moves(barrier_grid, source):
+	# Dijkstra from the source that records the first move of the shortest path to every spot
+	rows = barrier_grid.rows
+	distances = {source: 0}
+	moves = bytearray([NO_MOVE]) * (rows * rows)
+	source_row, source_col = barrier_grid.get_pos(source)
+
+	count = 0
+	open_set = [(0, count, source)]
+	while open_set:
+		distance, _, current = heapq.heappop(open_set)
+		if distance > distances[current]:
+			continue
+
+		for neighbour, cost in barrier_grid.neighbours(current):
+			if distance + cost < distances.get(neighbour, math.inf):
+				distances[neighbour] = distance + cost
+				if current == source:
+					row, col = barrier_grid.get_pos(neighbour)
+					moves[neighbour] = MOVES.index((row - source_row, col - source_col))
+				else:
+					moves[neighbour] = moves[current]
+				count += 1
+				heapq.heappush(open_set, (distance + cost, count, neighbour))
+
+	return moves
+
+
+
+def compress(moves, barriers):
+	# Run length encodes a row of first moves into a list of (start index, move). Nothing ever asks for the way to
+	# a barrier so barriers just carry on whichever run they are in, which saves breaking up the runs
+	runs = []
+	for index, move in enumerate(moves):
+		if runs and (runs[-1][1] == move or barriers[index]):
+			continue
+		runs.append((index, move))
+	return runs
+
+
+
+def source_runs(barrier_grid, source):
+	if barrier_grid.barriers[source]:
+		return [(0, NO_MOVE)]
+	return compress(first_moves(barrier_grid, source), barrier_grid.barriers)
+
+
+
+_worker_grid = None
+
+def _init_worker(barrier_grid):
+	global _worker_grid
+	_worker_grid = barrier_grid
+
+def _worker_runs(source):
+	return source_runs(_worker_grid, source)
+
+
+
+def build_path_database(barrier_grid, filename, processes = None):
+	# Builds the database for every spot of the grid and writes it to filename. processes is the number of worker
+	# processes to share the Dijkstra searches between, None or 1 runs them all in this process
+	rows = barrier_grid.rows
+	sources = range(rows * rows)
+
+	if processes is None or processes == 1:
+		all_runs = (source_runs(barrier_grid, source) for source in sources)
+		write_path_database(filename, rows, all_runs)
+	else:
+		with Pool(processes, initializer = _init_worker, initargs = (barrier_grid,)) as pool:
+			write_path_database(filename, rows, pool.imap(_worker_runs, sources, chunksize = 16))
+
+
+
+def build_for_map(map_filename, processes = None):
+	# Builds the database for a map file and saves it next to the map
+	rows, barriers = map_io.load_barriers(map_filename)
+	barrier_grid = bg.BarrierGrid.from_positions(rows, barriers)
+	build_path_database(barrier_grid, map_io.data_filename(map_filename, CPD_EXTENSION), processes)
+
+
+
+def write_path_database(filename, rows, all_runs):
+	# all_runs gives the list of runs of each source in order
+	offsets = array('I', [0])
+	starts = array('I')
+	moves = array('B')
+	for runs in all_runs:
+		for start, move in runs:
+			starts.append(start)
+			moves.append(move)
+		offsets.append(len(starts))
+
+	with open(filename, 'wb') as f:
+		f.write(struct.pack(HEADER_FORMAT, FILE_MAGIC, rows, len(starts)))
+		offsets.tofile(f)
+		starts.tofile(f)
+		moves.tofile(f)
+
+
+
+###################################################
+### Class Definitions                           ###
+###################################################
+class PathDatabase:
+	def __init__(self, filename):
+		self.file = open(filename, 'rb')
+		self.map = mmap.mmap(self.file.fileno(), 0, access = mmap.ACCESS_READ)
+
+		header_size = struct.calcsize(HEADER_FORMAT)
+		magic, self.rows, total_runs = struct.unpack(HEADER_FORMAT, self.map[:header_size])
+		if magic != FILE_MAGIC:
+			self.close()
+			raise ValueError(filename + " is not a path database")
+
+		self.view = memoryview(self.map)
+		view = self.view
+		offsets_end = header_size + 4 * (self.rows * self.rows + 1)
+		starts_end = offsets_end + 4 * total_runs
+		self.offsets = view[header_size:offsets_end].cast('I')
+		self.starts = view[offsets_end:starts_end].cast('I')
+		self.moves = view[starts_end:starts_end + total_runs]
+
+	@classmethod
+	def for_map(cls, map_filename):
+		# Opens the database that was saved next to a map file
+		return cls(map_io.data_filename(map_filename, CPD_EXTENSION))
+
+	def first_move(self, source_pos, target_pos):
+		# The (row change, col change) of the first move from source to target, or None if there isn't one
+		source = source_pos[0] * self.rows + source_pos[1]
+		target = target_pos[0] * self.rows + target_pos[1]
+
+		low = self.offsets[source]
+		high = self.offsets[source + 1]
+		run = bisect.bisect_right(self.starts, target, low, high) - 1
+		move = self.moves[run]
+
+		return None if move == NO_MOVE else MOVES[move]
+
+	def path(self, start_pos, end_pos):
+		# Walks the first moves from start to end and returns the positions along the way, [] if there is no path.
+		# The end must not be a barrier, the moves towards a barrier are made up
+		path = [start_pos]
+		current = start_pos
+		while current != end_pos:
+			if len(path) > self.rows * self.rows:
+				return []
+			move = self.first_move(current, end_pos)
+			if move is None:
+				return []
+			current = (current[0] + move[0], current[1] + move[1])
+			path.append(current)
+
+		return path
+
+	def close(self):
+		# The memoryviews have to be released before the mmap can be closed
+		for name in ('offsets', 'starts', 'moves', 'view'):
+			if hasattr(self, name):
+				getattr(self, name).release()
+		self.map.close()
+		self.file.close()
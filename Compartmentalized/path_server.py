@@ -0,0 +1,270 @@
+import argparse
+import asyncio
+import json
+import os
+from collections import OrderedDict
+import barrier_grid as bg
+import map_io
+import subgoal_graph as sg
+
+###########################################################
+#   Local path finding server
+#
+#	Keeps maps (and any subgoal graph saved next to them) loaded between queries so each query only pays for
+#	the search. Run from this folder, ie.
+#		python path_server.py --port 8765 --preload city.map
+#		python path_server.py --unix /tmp/paths.sock
+#
+#	The protocol is JSON lines over a connection that stays open for as many queries as the client likes:
+#		{"id": 1, "map": "city.map", "start": [0, 0], "end": [99, 99], "euclidean": false}
+#	is answered with
+#		{"id": 1, "path": [[0, 0], [1, 1], ...], "cost": 150.5}
+#	or {"id": 1, "error": "..."}. A client may send several queries before reading the answers, each answer has
+#	the id of its query and they can come back in a different order.
+#
+#	Queries on the same map that arrive while the map's previous batch is being worked on are collected and run
+#	together as the next batch in one trip to the worker thread, with repeated queries only searched once.
+#	The server only listens on localhost (or a Unix socket).
+#
+#	A query's map is a filename relative to the map folder (--map-dir, by default the folder the server is run
+#	from). Absolute paths, '..' and anything that leads outside of the folder are refused, as are maps of more
+#	than --max-rows rows. At most --max-maps maps are kept loaded, the one used least recently is dropped to
+#	make room for a new one.
+#
+
+HOST = '127.0.0.1'
+PORT = 8765
+BATCH_SIZE = 64 # Most queries run in one batch
+MAX_MAPS = 16 # Most maps kept loaded at once
+MAX_ROWS = 4096 # Largest map that will be loaded, a BarrierGrid is rows * rows bytes
+
+
+###################################################
+### Helper functions                            ###
+###################################################
+def parse_pos(value):
+	# A position from a query as a (row, col) tuple, anything but a list of two whole numbers is refused before it
+	# gets near a batch
+	if not isinstance(value, list) or len(value) != 2 or not all(type(number) is int for number in value):
+		raise ValueError("positions must be [row, col] with whole numbers")
+	return value[0], value[1]
+
+
+
+###################################################
+### Class Definitions                           ###
+###################################################
+class LoadedMap:
+	def __init__(self, map_filename, max_rows = MAX_ROWS):
+		# The rows are checked before anything is read so a bad header can't make us allocate a huge grid
+		with open(map_filename) as f:
+			rows = int(f.readline())
+		if not 0 < rows <= max_rows:
+			raise ValueError("maps can have at most " + str(max_rows) + " rows")
+
+		rows, barriers = map_io.load_barriers(map_filename)
+		self.barrier_grid = bg.BarrierGrid.from_positions(rows, barriers)
+
+		# The subgoal graph is used for queries if one has been saved next to the map
+		self.subgoal_graph = None
+		if os.path.exists(map_io.data_filename(map_filename, sg.SUBGOAL_EXTENSION)):
+			self.subgoal_graph = sg.SubgoalGraph.load(self.barrier_grid, map_io.data_filename(map_filename, sg.SUBGOAL_EXTENSION))
+
+	def find_path(self, start_pos, end_pos, use_euclidean):
+		rows = self.barrier_grid.rows
+		for row, col in (start_pos, end_pos):
+			if not (0 <= row < rows and 0 <= col < rows):
+				raise ValueError("position (" + str(row) + ", " + str(col) + ") is outside of the map")
+		if self.barrier_grid.is_barrier(*start_pos) or self.barrier_grid.is_barrier(*end_pos):
+			return []
+
+		if self.subgoal_graph is not None:
+			return self.subgoal_graph.find_path(start_pos, end_pos)[0]
+		return bg.a_star_positions(self.barrier_grid, start_pos, end_pos, use_euclidean)
+
+	def run_batch(self, queries):
+		# Runs a list of (start, end, use_euclidean) and returns a path or exception for each, in the same order
+		found = {}
+		for query in queries:
+			if query not in found:
+				try:
+					found[query] = self.find_path(*query)
+				except Exception as error:
+					found[query] = error
+		return [found[query] for query in queries]
+
+
+
+class PathServer:
+	def __init__(self, executor = None, batch_size = BATCH_SIZE, map_dir = '.', max_maps = MAX_MAPS, max_rows = MAX_ROWS):
+		# executor runs the searches, None for the event loop's default thread pool
+		self.executor = executor
+		self.batch_size = batch_size
+		self.map_dir = os.path.realpath(map_dir)
+		self.max_maps = max_maps
+		self.max_rows = max_rows
+		self.maps = OrderedDict() # map filename -> future of its LoadedMap, the least recently used first
+		self.pending = {} # map filename -> list of (query, future) waiting for the next batch
+		self.running = set() # maps that have a batch task going
+		self.batches = 0
+		self.queries = 0
+
+	def resolve(self, name):
+		# The full filename of a map asked for by a client, which has to be a file inside the map folder
+		if not isinstance(name, str) or os.path.isabs(name) or '..' in name.replace('\\', '/').split('/'):
+			raise ValueError("maps must be named relative to the map folder")
+		map_filename = os.path.realpath(os.path.join(self.map_dir, name))
+		if os.path.commonpath([self.map_dir, map_filename]) != self.map_dir or not os.path.isfile(map_filename):
+			raise ValueError("no map called " + name)
+		return map_filename
+
+	async def get_map(self, map_filename):
+		# Loads a map the first time it is asked for, every later query (and any arriving while it loads) shares it.
+		# map_filename must have come from resolve()
+		if map_filename in self.maps:
+			self.maps.move_to_end(map_filename)
+		else:
+			loop = asyncio.get_running_loop()
+			self.maps[map_filename] = loop.run_in_executor(self.executor, LoadedMap, map_filename, self.max_rows)
+			while len(self.maps) > self.max_maps:
+				self.maps.popitem(last = False) # Batches already running on it keep their own reference
+		try:
+			return await asyncio.shield(self.maps[map_filename])
+		except Exception:
+			self.maps.pop(map_filename, None) # Try again next time
+			raise
+
+	async def find_path(self, map_name, start_pos, end_pos, use_euclidean):
+		# Queues the query for the map's next batch and waits for its path
+		map_filename = self.resolve(map_name)
+		future = asyncio.get_running_loop().create_future()
+		self.pending.setdefault(map_filename, []).append(((start_pos, end_pos, use_euclidean), future))
+		if map_filename not in self.running:
+			self.running.add(map_filename)
+			asyncio.create_task(self.run_batches(map_filename))
+		return await future
+
+	async def run_batches(self, map_filename):
+		# Keeps taking the waiting queries of a map and running them as a batch until there are none left. However it
+		# ends the map is freed for the next query and no query is left waiting, the ones that didn't get a path are
+		# given the error
+		batch = []
+		error = RuntimeError("the queries on this map were stopped")
+		try:
+			loaded = await self.get_map(map_filename)
+			loop = asyncio.get_running_loop()
+			while self.pending.get(map_filename):
+				waiting = self.pending[map_filename]
+				batch = waiting[:self.batch_size]
+				self.pending[map_filename] = waiting[self.batch_size:]
+
+				results = await loop.run_in_executor(self.executor, loaded.run_batch, [query for query, _ in batch])
+				self.batches += 1
+				self.queries += len(batch)
+				for (_, future), result in zip(batch, results):
+					if future.done():
+						continue
+					if isinstance(result, Exception):
+						future.set_exception(result)
+					else:
+						future.set_result(result)
+		except Exception as failure:
+			error = failure
+		finally:
+			self.running.discard(map_filename)
+			for _, future in batch + self.pending.pop(map_filename, []):
+				if not future.done():
+					future.set_exception(error)
+
+	async def answer(self, request, writer):
+		# Works out the answer to one line from a client and writes it back, waiting for it to be sent so a client
+		# that reads slowly can't make the buffer grow without end
+		response = {'id': request.get('id')}
+		try:
+			start_pos = parse_pos(request.get('start'))
+			end_pos = parse_pos(request.get('end'))
+			path = await self.find_path(request.get('map'), start_pos, end_pos, bool(request.get('euclidean', False)))
+			response['path'] = [list(pos) for pos in path]
+			response['cost'] = bg.path_cost(path)
+		except Exception as error:
+			response['error'] = str(error)
+
+		await self.send(writer, (json.dumps(response) + '\n').encode())
+
+	async def send(self, writer, data):
+		if writer.is_closing():
+			return
+		writer.write(data)
+		try:
+			await writer.drain()
+		except ConnectionError:
+			pass # The client has gone, handle_client() closes the connection
+
+	async def handle_client(self, reader, writer):
+		# Each connection can send any number of queries, each is answered as soon as its batch is done
+		tasks = set()
+		try:
+			while True:
+				line = await reader.readline()
+				if not line:
+					break
+				try:
+					request = json.loads(line)
+				except ValueError:
+					request = None
+				if not isinstance(request, dict):
+					await self.send(writer, b'{"id": null, "error": "not a JSON object"}\n')
+					continue
+
+				task = asyncio.create_task(self.answer(request, writer))
+				tasks.add(task)
+				task.add_done_callback(tasks.discard)
+
+			if tasks:
+				await asyncio.gather(*tasks)
+			await writer.drain()
+		finally:
+			writer.close()
+
+
+
+###################################################
+### Running the server                          ###
+###################################################
+async def serve(host = HOST, port = PORT, unix_path = None, preload = (), batch_size = BATCH_SIZE, map_dir = '.', max_maps = MAX_MAPS, max_rows = MAX_ROWS):
+	server = PathServer(batch_size = batch_size, map_dir = map_dir, max_maps = max_maps, max_rows = max_rows)
+	for map_name in preload:
+		await server.get_map(server.resolve(map_name))
+
+	if unix_path is not None:
+		listener = await asyncio.start_unix_server(server.handle_client, unix_path)
+		print('Serving on', unix_path)
+	else:
+		listener = await asyncio.start_server(server.handle_client, host, port)
+		print('Serving on', host, 'port', port)
+
+	async with listener:
+		await listener.serve_forever()
+
+
+
+def main():
+	parser = argparse.ArgumentParser(description = "Local path finding server")
+	parser.add_argument('--port', type = int, default = PORT)
+	parser.add_argument('--unix', help = "Listen on a Unix socket at this path instead of TCP")
+	parser.add_argument('--preload', nargs = '*', default = [], help = "Map files in the map folder to load before taking queries")
+	parser.add_argument('--batch-size', type = int, default = BATCH_SIZE)
+	parser.add_argument('--map-dir', default = '.', help = "Folder the maps named in queries are looked up in")
+	parser.add_argument('--max-maps', type = int, default = MAX_MAPS, help = "Most maps kept loaded at once")
+	parser.add_argument('--max-rows', type = int, default = MAX_ROWS, help = "Largest map that will be loaded")
+	args = parser.parse_args()
+
+	try:
+		asyncio.run(serve(HOST, args.port, args.unix, args.preload, args.batch_size, args.map_dir, args.max_maps, args.max_rows))
+	except KeyboardInterrupt:
+		pass
+
+
+
+if __name__ == '__main__':
+	main()
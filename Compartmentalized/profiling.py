@@ -0,0 +1,138 @@
+import cProfile
+import linecache
+import os
+import pstats
+import threading
+import tracemalloc
+
+###########################################################
+#   Profiling of headless searches
+#
+#	profile_call() runs a function under cProfile and tracemalloc and prints where the time went, both by the
+#	parts of a search loop we usually care about and as a plain list of the slowest functions, then the lines
+#	that were holding the most memory. tracemalloc only knows where the memory in use right now was allocated,
+#	so a background thread takes a snapshot whenever the memory in use has gone past the highest seen so far
+#	and the last of these, the closest to the peak, is the one printed.
+#
+#	Used by the --profile option of benchmark.py and scenario_runner.py, ie.
+#		python benchmark.py memory --rows 256 --profile --profile-dump memory.prof
+#	The .prof file can be opened later with pstats or a viewer such as snakeviz.
+#
+#	Both cProfile and tracemalloc slow the run down a lot so the times are only useful compared to each other.
+#	Indexing a dict (g_score[spot]) isn't a function call and so doesn't show up, only dict.get() does.
+#
+
+TOP_FUNCTIONS = 20 # Functions listed by their own time
+TOP_ALLOCATIONS = 10 # Lines listed by the memory they hold
+SAMPLE_INTERVAL = 0.05 # Seconds between each look at the memory in use
+
+HEURISTIC_FUNCTIONS = ('h', 'octile', 'alt_heuristic') # Names of the heuristics themselves
+HEURISTIC_VARIABLES = ('h', 'h_of', 'heuristic') # Names the searches give the lambdas that wrap them
+
+
+###################################################
+### Profiling functions                         ###
+###################################################
+def is_heuristic(key):
+	# Whether the (filename, line, function name) key cProfile gives a function is a heuristic or a lambda wrapping
+	# one (ie. the weighted h() of a_star_pathfind()). A lambda is only known by where it is, so the line it is on
+	# is read to see what it is assigned to
+	filename, line, function = key
+	if function in HEURISTIC_FUNCTIONS:
+		return True
+	if function == '<lambda>':
+		assigned = linecache.getline(filename, line).split('=')[0].strip()
+		return assigned in HEURISTIC_VARIABLES
+	return False
+
+
+
+# Parts of the search loop: name -> test on the (filename, line, function name) key cProfile gives each function.
+# The calls of a part count a lambda wrapper and the heuristic it calls as two calls
+HOT_SPOTS = {
+	'heap operations': lambda key: key[2] in ('<built-in method _heapq.heappush>', '<built-in method _heapq.heappop>') or (os.path.basename(key[0]) in ('queue.py', 'open_lists.py') and key[2] in ('put', 'get', '_put', '_get', 'push', 'pop')),
+	'h()': is_heuristic,
+	'neighbour iteration': lambda key: key[2] in ('neighbours', 'update_neighbours', "<method 'items' of 'dict' objects>"),
+	'dict lookups': lambda key: key[2] == "<method 'get' of 'dict' objects>",
+}
+
+
+
+def print_hot_spots(stats):
+	# Adds up the time spent in each part of the search loop, the time of a function itself not counting what it calls
+	total = stats.total_tt
+	print('%-22s %10s %8s %10s' % ('part', 'calls', 'percent', 'seconds'))
+	for name, matches in HOT_SPOTS.items():
+		calls = 0
+		seconds = 0
+		for key, (_, total_calls, own_time, _, _) in stats.stats.items():
+			if matches(key):
+				calls += total_calls
+				seconds += own_time
+		print('%-22s %10d %7.1f%% %10.4f' % (name, calls, 100 * seconds / total if total else 0, seconds))
+
+
+
+def print_allocations(snapshot, held, peak, top = TOP_ALLOCATIONS):
+	print('Peak traced memory', peak // 1024, 'KiB, memory held by line when', held // 1024, 'KiB was in use:')
+	snapshot = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, threading.__file__)])
+	for statistic in snapshot.statistics('lineno')[:top]:
+		frame = statistic.traceback[0]
+		print('%10d KiB %8d blocks  %s:%d' % (statistic.size // 1024, statistic.count, os.path.basename(frame.filename), frame.lineno))
+
+
+
+class PeakSampler(threading.Thread):
+	# Keeps the snapshot taken with the most memory in use until stopped
+	def __init__(self):
+		super().__init__(daemon = True)
+		self.stopped = threading.Event()
+		self.held = -1
+		self.snapshot = None
+
+	def sample(self):
+		current = tracemalloc.get_traced_memory()[0]
+		if current > self.held:
+			self.snapshot = tracemalloc.take_snapshot()
+			self.held = current
+
+	def run(self):
+		while not self.stopped.wait(SAMPLE_INTERVAL):
+			self.sample()
+
+	def stop(self):
+		self.stopped.set()
+		self.join()
+		self.sample() # The run might have been too short for a single sample
+
+
+
+def profile_call(function, dump_filename = None, top = TOP_FUNCTIONS):
+	# Runs function() while profiling it, prints the reports and returns what function() returned. If dump_filename
+	# is given the cProfile statistics are also saved there
+	tracemalloc.start()
+	sampler = PeakSampler()
+	sampler.start()
+	profiler = cProfile.Profile()
+	profiler.enable()
+	try:
+		result = function()
+	finally:
+		profiler.disable()
+		sampler.stop()
+		peak = max(sampler.held, tracemalloc.get_traced_memory()[1]) # The run may have reset the peak itself
+		tracemalloc.stop()
+
+	stats = pstats.Stats(profiler)
+	if dump_filename is not None:
+		stats.dump_stats(dump_filename)
+
+	print()
+	print_hot_spots(stats)
+	print()
+	stats.sort_stats('tottime').print_stats(top)
+	print_allocations(sampler.snapshot, sampler.held, peak)
+	if dump_filename is not None:
+		print('Profile saved to', dump_filename)
+
+	return result
@@ -0,0 +1,170 @@
+import heapq
+import math
+import barrier_grid as bg
+
+###########################################################
+#   Quadtree grid for mostly open maps
+#
+#	make_grid() creates a Spot for every spot of the map even if almost all of them are empty. A QuadtreeGrid
+#	is built straight from the list of barrier positions and splits the map into squares until each square is
+#	either all empty or all barriers, so a large open area is a single leaf.
+#
+#	Inside an empty square there is nothing in the way, so the shortest path between any two of its spots is
+#	just the octile distance. The search therefore only needs the spots on the edges of the leaves: from an edge
+#	spot it can jump to any other edge spot of the same leaf for the octile distance, or take a normal step into
+#	a neighbouring leaf. Any shortest path on the grid is made of such pieces so the paths found are exactly as
+#	short as on the full grid, and they are given back in the same (row, col) positions.
+#
+
+###################################################
+### Helper functions                            ###
+###################################################
+def octile(p1, p2):
+	d_row = abs(p1[0] - p2[0])
+	d_col = abs(p1[1] - p2[1])
+	return bg.DIAGONAL_DISTANCE * min(d_row, d_col) + bg.STRAIGHT_DISTANCE * abs(d_row - d_col)
+
+
+
+def straight_line(p1, p2):
+	# The positions from p1 to p2 taking the diagonal steps first, only used inside an empty leaf
+	path = [p1]
+	row, col = p1
+	while (row, col) != p2:
+		row += (p2[0] > row) - (p2[0] < row)
+		col += (p2[1] > col) - (p2[1] < col)
+		path.append((row, col))
+	return path
+
+
+
+###################################################
+### Class Definitions                           ###
+###################################################
+class QuadtreeGrid:
+	def __init__(self, rows, barriers):
+		# barriers is a list of (row, col) positions, ie. from map_io.load_barriers()
+		self.rows = rows
+		self.size = 1
+		while self.size < rows:
+			self.size *= 2
+
+		self.leaves = [] # (row, col, size) of every empty leaf
+		self.expansions = 0 # Number of spots expanded by the last find_path()
+		self.root = self.build(0, 0, self.size, list(set(barriers)))
+
+	def build(self, row, col, size, barriers):
+		# Returns None for a square that is all barriers (or outside the map), the index of the leaf for an empty
+		# square and otherwise a list of the four quarters
+		inside = max(0, min(size, self.rows - row)) * max(0, min(size, self.rows - col))
+		if inside == 0 or len(barriers) == inside:
+			return None
+		if not barriers and inside == size * size:
+			self.leaves.append((row, col, size))
+			return len(self.leaves) - 1
+
+		half = size // 2
+		quarters = [[], [], [], []]
+		for pos in barriers:
+			quarters[(pos[0] >= row + half) * 2 + (pos[1] >= col + half)].append(pos)
+
+		return [self.build(row, col, half, quarters[0]), self.build(row, col + half, half, quarters[1]),
+				self.build(row + half, col, half, quarters[2]), self.build(row + half, col + half, half, quarters[3])]
+
+	def leaf_of(self, row, col):
+		# The index of the empty leaf the position is in, or None if it is a barrier or outside of the map
+		if not (0 <= row < self.rows and 0 <= col < self.rows):
+			return None
+
+		node = self.root
+		r0, c0, size = 0, 0, self.size
+		while isinstance(node, list):
+			size //= 2
+			quarter = (row >= r0 + size) * 2 + (col >= c0 + size)
+			r0 += size * (quarter >= 2)
+			c0 += size * (quarter % 2)
+			node = node[quarter]
+		return node
+
+	def is_barrier(self, row, col):
+		return self.leaf_of(row, col) is None
+
+	def can_move(self, row, col, d_row, d_col):
+		# Same rules as Spot.update_neighbours()
+		if self.is_barrier(row + d_row, col + d_col):
+			return False
+		if d_row != 0 and d_col != 0:
+			return not self.is_barrier(row, col + d_col) or not self.is_barrier(row + d_row, col)
+		return True
+
+	def edge_spots(self, leaf):
+		# The positions around the edge of a leaf
+		row, col, size = self.leaves[leaf]
+		if size == 1:
+			return [(row, col)]
+
+		spots = []
+		for i in range(size):
+			spots.append((row, col + i))
+			spots.append((row + size - 1, col + i))
+		for i in range(1, size - 1):
+			spots.append((row + i, col))
+			spots.append((row + i, col + size - 1))
+		return spots
+
+	def find_path(self, start_pos, end_pos):
+		# Returns the positions of the path from start to end and its cost, or ([], inf) if there is no path
+		self.expansions = 0
+		start_leaf = self.leaf_of(*start_pos)
+		end_leaf = self.leaf_of(*end_pos)
+		if start_leaf is None or end_leaf is None:
+			return [], math.inf
+
+		g_score = {start_pos: 0}
+		came_from = {}
+		count = 0
+		open_set = [(octile(start_pos, end_pos), count, start_pos)]
+		edge_cache = {}
+
+		while open_set:
+			f, _, current = heapq.heappop(open_set)
+			if f > g_score[current] + octile(current, end_pos):
+				continue
+			self.expansions += 1
+
+			if current == end_pos:
+				path = [current]
+				while current in came_from:
+					previous = came_from[current]
+					path.extend(reversed(straight_line(previous, current)[:-1]))
+					current = previous
+				path.reverse()
+				return path, g_score[end_pos]
+
+			leaf = self.leaf_of(*current)
+			if leaf not in edge_cache:
+				edge_cache[leaf] = self.edge_spots(leaf)
+
+			# Jumps across the leaf, plus to the end if it is in this leaf
+			moves = [(spot, octile(current, spot)) for spot in edge_cache[leaf] if spot != current]
+			if leaf == end_leaf:
+				moves.append((end_pos, octile(current, end_pos)))
+
+			# Normal steps out of the leaf into its neighbours
+			row, col, size = self.leaves[leaf]
+			for d_row, d_col in bg.STRAIGHT_MOVES + bg.DIAGONAL_MOVES:
+				n_row, n_col = current[0] + d_row, current[1] + d_col
+				if row <= n_row < row + size and col <= n_col < col + size:
+					continue
+				if self.can_move(current[0], current[1], d_row, d_col):
+					moves.append(((n_row, n_col), bg.DIAGONAL_DISTANCE if d_row and d_col else bg.STRAIGHT_DISTANCE))
+
+			for neighbour, distance in moves:
+				temp_g_score = g_score[current] + distance
+				if temp_g_score < g_score.get(neighbour, math.inf):
+					came_from[neighbour] = current
+					g_score[neighbour] = temp_g_score
+					count += 1
+					heapq.heappush(open_set, (temp_g_score + octile(neighbour, end_pos), count, neighbour))
+
+		return [], math.inf
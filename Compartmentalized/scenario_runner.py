@@ -0,0 +1,252 @@
+import argparse
+import csv
+import json
+import os
+import time
+from multiprocessing import Pool
+import a_star_algorithm as asg
+import barrier_grid as bg
+import map_io
+import memory_bounded_search as mb
+import quadtree_grid as qg
+import search_context as sc
+import subgoal_graph as sg
+import stepping_search as ss
+import benchmark
+import profiling
+
+###########################################################
+#   Batch experiments over scenario files
+#
+#	Runs every query of the scenario files with every solver and heuristic asked for and writes one row per
+#	run with the time, expansions, path cost and how much longer the path is than the reference solver's.
+#	Run from this folder, ie.
+#		python scenario_runner.py city.scen --solvers a_star fringe subgoal --heuristics manhattan euclidean --workers 4 --csv results.csv
+#
+#	A scenario file has one query per line, blank lines and lines starting with '#' are skipped:
+#		map_filename start_row start_col end_row end_col
+#	The map filename is relative to the scenario file. Each worker process loads a map (and builds anything its
+#	solvers need) the first time one of its queries is on that map. Building isn't part of the seconds of a
+#	query, it is given separately as build_seconds on every row of that solver and map.
+#
+
+HEURISTICS = {'manhattan': False, 'euclidean': True} # name -> use_euclidean
+CSV_FIELDS = ['map', 'query', 'solver', 'heuristic', 'seconds', 'build_seconds', 'expansions', 'path_cost', 'reference_cost', 'gap']
+DISPLAY_WIDTH = 1000 # Only used for the size of the Spots, nothing is drawn
+STEP_SIZE = 1000 # Expansions per step of a SteppingSearch
+
+
+###################################################
+### Loading maps and scenarios                  ###
+###################################################
+def load_scenarios(filenames):
+	# Returns a list of (map filename, start position, end position) from all of the files
+	queries = []
+	for filename in filenames:
+		folder = os.path.dirname(filename)
+		with open(filename) as f:
+			for line in f:
+				fields = line.split()
+				if not fields or fields[0].startswith('#'):
+					continue
+				start_row, start_col, end_row, end_col = (int(field) for field in fields[1:5])
+				queries.append((os.path.join(folder, fields[0]), (start_row, start_col), (end_row, end_col)))
+	return queries
+
+
+
+class LoadedMap:
+	# Everything the solvers need for one map, anything built for a solver (see PREPROCESSING) is built here so
+	# that it isn't timed as part of a query
+	def __init__(self, map_filename, solvers):
+		self.rows, self.barriers = map_io.load_barriers(map_filename)
+		self.barrier_grid = bg.BarrierGrid.from_positions(self.rows, self.barriers)
+		self.grid = map_io.load_map(map_filename, DISPLAY_WIDTH)
+		for row in self.grid:
+			for spot in row:
+				spot.update_neighbours(self.grid)
+
+		self.structures = {} # solver -> what it searches on
+		self.build_seconds = {} # solver -> seconds taken to build its structure
+		for solver in solvers:
+			if solver in PREPROCESSING and solver not in self.structures:
+				t0 = time.perf_counter()
+				self.structures[solver] = PREPROCESSING[solver](self)
+				self.build_seconds[solver] = time.perf_counter() - t0
+
+
+
+###################################################
+### Solvers                                     ###
+###################################################
+# Each solver takes (loaded map, start position, end position, use_euclidean) and returns the positions of the
+# path from start to end ([] if there is no path) and the number of expansions
+def spot_solver(search):
+	# Wraps a search on the Spot grid that takes (grid, start, end, use_euclidean, context)
+	def solve(loaded, start_pos, end_pos, use_euclidean):
+		context = sc.SearchContext()
+		start = loaded.grid[start_pos[0]][start_pos[1]]
+		end = loaded.grid[end_pos[0]][end_pos[1]]
+		search(loaded.grid, start, end, use_euclidean, context)
+		return [spot.get_pos() for spot in context.path], context.expansions
+	return solve
+
+
+
+def solve_subgoal(loaded, start_pos, end_pos, use_euclidean):
+	subgoal_graph = loaded.structures['subgoal']
+	return subgoal_graph.find_path(start_pos, end_pos)[0], subgoal_graph.expansions
+
+
+
+def solve_quadtree(loaded, start_pos, end_pos, use_euclidean):
+	quadtree = loaded.structures['quadtree']
+	return quadtree.find_path(start_pos, end_pos)[0], quadtree.expansions
+
+
+
+def stepping(grid, start, end, use_euclidean, context, heuristic = None):
+	# Runs a SteppingSearch to the end, unlike a_star_pathfind() it queues a spot again when its g_score drops so with
+	# no heuristic it is a true Dijkstra search
+	search = ss.SteppingSearch(grid, start, end, use_euclidean, heuristic, context = context)
+	while not search.done:
+		search.step(STEP_SIZE)
+
+
+
+# Solvers that search on something built from the map first: name -> function of the LoadedMap that builds it
+PREPROCESSING = {
+	'subgoal': lambda loaded: sg.SubgoalGraph(loaded.barrier_grid),
+	'quadtree': lambda loaded: qg.QuadtreeGrid(loaded.rows, loaded.barriers),
+}
+
+SOLVERS = {
+	'dijkstra': spot_solver(lambda grid, start, end, use_euclidean, context: stepping(grid, start, end, use_euclidean, context, lambda p1, p2: 0)),
+	'a_star': spot_solver(lambda grid, start, end, use_euclidean, context: asg.a_star_pathfind(None, grid, start, end, use_euclidean, context = context)),
+	'weighted': spot_solver(lambda grid, start, end, use_euclidean, context: asg.a_star_pathfind(None, grid, start, end, use_euclidean, weight = 2, context = context)),
+	'fringe': spot_solver(lambda grid, start, end, use_euclidean, context: mb.fringe_search(grid, start, end, use_euclidean, context = context)),
+	'ida_star': spot_solver(lambda grid, start, end, use_euclidean, context: mb.ida_star(grid, start, end, use_euclidean, context = context)),
+	'subgoal': solve_subgoal,
+	'quadtree': solve_quadtree,
+}
+
+
+
+###################################################
+### Running the queries                         ###
+###################################################
+_worker_maps = {}
+_worker_settings = None
+
+def _init_worker(settings):
+	global _worker_settings
+	_worker_settings = settings
+
+def _worker_run(query):
+	return run_query(_worker_maps, query, *_worker_settings)
+
+
+
+def run_query(maps, query, solvers, heuristics, reference):
+	# Runs one query with every solver and heuristic and returns a result row for each
+	map_filename, start_pos, end_pos, number = query
+	if map_filename not in maps:
+		maps[map_filename] = LoadedMap(map_filename, list(solvers) + [reference])
+	loaded = maps[map_filename]
+
+	# There is nothing to search if the start or end is a barrier, every solver is recorded as finding no path
+	blocked = loaded.barrier_grid.is_barrier(*start_pos) or loaded.barrier_grid.is_barrier(*end_pos)
+
+	path = [] if blocked else SOLVERS[reference](loaded, start_pos, end_pos, False)[0]
+	reference_cost = bg.path_cost(path) if path else None
+
+	results = []
+	for solver in solvers:
+		for heuristic in heuristics:
+			t0 = time.perf_counter()
+			path, expansions = ([], 0) if blocked else SOLVERS[solver](loaded, start_pos, end_pos, HEURISTICS[heuristic])
+			seconds = time.perf_counter() - t0
+
+			cost = bg.path_cost(path) if path else None
+			gap = None
+			if cost is not None and reference_cost:
+				gap = cost / reference_cost - 1
+
+			results.append({'map': map_filename, 'query': number, 'solver': solver, 'heuristic': heuristic, 'seconds': seconds,
+							'build_seconds': loaded.build_seconds.get(solver, 0), 'expansions': expansions, 'path_cost': cost, 'reference_cost': reference_cost, 'gap': gap})
+
+	return results
+
+
+
+def run_scenarios(queries, solvers, heuristics, reference = 'dijkstra', workers = 1):
+	# Returns the result rows of every query, queries are shared out between the worker processes
+	numbered = [query + (i,) for i, query in enumerate(queries)]
+	settings = (solvers, heuristics, reference)
+
+	if workers == 1:
+		maps = {}
+		return [row for query in numbered for row in run_query(maps, query, *settings)]
+
+	with Pool(workers, initializer = _init_worker, initargs = (settings,)) as pool:
+		return [row for rows in pool.imap(_worker_run, numbered) for row in rows]
+
+
+
+def print_summary(results):
+	# Prints the average of each solver and heuristic over every query, the build time is averaged over the times
+	# each map was built rather than over the queries
+	groups = {}
+	for row in results:
+		groups.setdefault((row['solver'], row['heuristic']), []).append(row)
+
+	table = []
+	for (solver, heuristic), rows in groups.items():
+		found = [row for row in rows if row['path_cost'] is not None]
+		gaps = [row['gap'] for row in found if row['gap'] is not None]
+		builds = {(row['map'], row['build_seconds']) for row in rows} # Each worker builds its own copy of a map
+		table.append([solver, heuristic, len(rows), '%.5f' % (sum(row['seconds'] for row in rows) / len(rows)),
+					'%.5f' % (sum(seconds for _, seconds in builds) / len(builds)),
+					'%.1f' % (sum(row['expansions'] for row in rows) / len(rows)),
+					'%.4f' % (sum(gaps) / len(gaps)) if gaps else '-', '%.4f' % max(gaps) if gaps else '-'])
+
+	benchmark.print_table(['solver', 'heuristic', 'queries', 'mean seconds', 'mean build seconds', 'mean expansions', 'mean gap', 'max gap'], table)
+
+
+
+def main():
+	parser = argparse.ArgumentParser(description = "Runs scenario files with several solvers and heuristics")
+	parser.add_argument('scenarios', nargs = '+', help = "Scenario files")
+	parser.add_argument('--solvers', nargs = '+', choices = list(SOLVERS), default = ['a_star'])
+	parser.add_argument('--heuristics', nargs = '+', choices = list(HEURISTICS), default = ['manhattan', 'euclidean'])
+	parser.add_argument('--reference', choices = list(SOLVERS), default = 'dijkstra', help = "Solver whose path cost the gap is measured against")
+	parser.add_argument('--workers', type = int, default = 1, help = "Number of worker processes")
+	parser.add_argument('--csv', help = "Write the results to this CSV file")
+	parser.add_argument('--json', help = "Write the results to this file as JSON lines")
+	parser.add_argument('--profile', action = 'store_true', help = "Run the queries under cProfile and tracemalloc in this process and print where the time and memory went")
+	parser.add_argument('--profile-dump', help = "Also save the cProfile statistics to this .prof file")
+	args = parser.parse_args()
+
+	queries = load_scenarios(args.scenarios)
+	if args.profile or args.profile_dump:
+		# The profilers only see this process so the worker processes aren't used
+		results = profiling.profile_call(lambda: run_scenarios(queries, args.solvers, args.heuristics, args.reference), args.profile_dump)
+	else:
+		results = run_scenarios(queries, args.solvers, args.heuristics, args.reference, args.workers)
+
+	if args.csv:
+		with open(args.csv, 'w', newline = '') as f:
+			writer = csv.DictWriter(f, fieldnames = CSV_FIELDS)
+			writer.writeheader()
+			writer.writerows(results)
+	if args.json:
+		with open(args.json, 'w') as f:
+			for row in results:
+				f.write(json.dumps(row) + '\n')
+
+	print_summary(results)
+
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,50 @@
+import Spot as S
+
+###########################################################
+#   The state of a single search, kept apart from the grid
+#
+#	The search used to record which spots were open, closed or on the path by recolouring the Spots, which
+#	meant a grid could only be used by one search at a time and had to be swept with reset_grid() before the
+#	next one. Now each search keeps its state in a SearchContext and the grid is never changed by a search,
+#	so any number of searches (threads, async tasks, ...) can run on the same grid and a new search just
+#	needs a new SearchContext.
+#
+#	The display asks the context what colour a spot should be drawn, see color_of().
+#
+
+###################################################
+### Class Definitions                           ###
+###################################################
+class SearchContext:
+	def __init__(self):
+		self.g_score = {} # Spots that haven't been reached yet are missing rather than infinity
+		self.f_score = {}
+		self.came_from = {}
+
+		self.open_set_hash = set()
+		self.closed_set = set()
+		self.path = [] # Spots from start to end once the end has been found
+		self.path_set = set()
+
+		self.expansions = 0
+
+	def is_open(self, spot):
+		return spot in self.open_set_hash
+
+	def is_closed(self, spot):
+		return spot in self.closed_set
+
+	def is_path(self, spot):
+		return spot in self.path_set
+
+	def color_of(self, spot):
+		# The colour to draw the spot with. Barriers, the start and the end keep their own colour
+		if spot.color != S.WHITE:
+			return spot.color
+		if spot in self.path_set:
+			return S.PURPLE
+		if spot in self.open_set_hash:
+			return S.GREEN
+		if spot in self.closed_set:
+			return S.RED
+		return spot.color
@@ -0,0 +1,159 @@
+import struct
+import stepping_search as ss
+import open_lists as ol
+
+###########################################################
+#   Recording what a search did so it can be watched afterwards
+#
+#	Drawing the grid after every expansion slows a search down enormously. Instead the search is run headless
+#	and every push onto the open set, pop off it and close of a spot is written to a trace file, followed by the
+#	spots of the path between the start and end. visualization.replay_trace() then plays the file back at any
+#	speed or saves it as a sequence of images without running the search again.
+#
+#	Each event is stored as one variable length number: the change in spot index from the previous event
+#	(zigzag encoded so small negative changes are small too) times 4 plus the kind of event. As the search
+#	mostly moves between neighbouring spots nearly every event fits in one or two bytes.
+#	File layout (little endian):
+#		header              magic, rows, start index, end index
+#		events              varint per event
+#
+
+TRACE_EXTENSION = 'trace'
+FILE_MAGIC = b'TRC1'
+HEADER_FORMAT = '<4sIII' # magic, rows, start index, end index
+
+PUSH = 0
+POP = 1
+CLOSE = 2
+PATH = 3
+
+BUFFER_SIZE = 1 << 16 # Bytes of events collected before they are written to the file
+
+
+###################################################
+### Writing traces                              ###
+###################################################
+class TraceWriter:
+	def __init__(self, filename, rows, start_pos, end_pos):
+		self.file = open(filename, 'wb')
+		self.rows = rows
+		self.file.write(struct.pack(HEADER_FORMAT, FILE_MAGIC, rows, start_pos[0] * rows + start_pos[1], end_pos[0] * rows + end_pos[1]))
+		self.buffer = bytearray()
+		self.previous = 0
+		self.events = 0
+
+	def event(self, kind, spot):
+		row, col = spot.get_pos()
+		index = row * self.rows + col
+		delta = index - self.previous
+		self.previous = index
+
+		value = ((delta << 1) if delta >= 0 else ((-delta << 1) - 1)) * 4 + kind
+		while value >= 0x80:
+			self.buffer.append((value & 0x7F) | 0x80)
+			value >>= 7
+		self.buffer.append(value)
+
+		self.events += 1
+		if len(self.buffer) >= BUFFER_SIZE:
+			self.flush()
+
+	def flush(self):
+		self.file.write(self.buffer)
+		self.buffer.clear()
+
+	def close(self):
+		self.flush()
+		self.file.close()
+
+
+
+class RecordingOpenList:
+	# Wraps another open list and records every push and pop
+	def __init__(self, open_list, trace):
+		self.open_list = open_list
+		self.trace = trace
+
+	def push(self, f_score, spot):
+		self.trace.event(PUSH, spot)
+		self.open_list.push(f_score, spot)
+
+	def pop(self):
+		f_score, spot = self.open_list.pop()
+		self.trace.event(POP, spot)
+		return f_score, spot
+
+	def __len__(self):
+		return len(self.open_list)
+
+
+
+def record_search(grid, start, end, use_euclidean, filename, heuristic = None, weight = 1, context = None, open_list = None):
+	# Runs a headless search writing its trace to filename and returns the list of spots from start to end, or []
+	# if there is no path. The neighbours of the spots must be updated beforehand
+	trace = TraceWriter(filename, len(grid), start.get_pos(), end.get_pos())
+	recording = RecordingOpenList(ol.BinaryHeapOpenList() if open_list is None else open_list, trace)
+
+	try:
+		search = ss.SteppingSearch(grid, start, end, use_euclidean, heuristic, weight, context, recording)
+		while not search.done:
+			for spot in search.step(1).closed:
+				trace.event(CLOSE, spot)
+
+		path = search.full_path()
+		for spot in path[1:-1]:
+			trace.event(PATH, spot)
+	finally:
+		trace.close()
+
+	return path
+
+
+
+###################################################
+### Reading traces                              ###
+###################################################
+def read_trace(filename):
+	# Returns rows, the start and end positions and a list of (kind, (row, col)) for every event
+	with open(filename, 'rb') as f:
+		data = f.read()
+
+	header_size = struct.calcsize(HEADER_FORMAT)
+	magic, rows, start, end = struct.unpack(HEADER_FORMAT, data[:header_size])
+	if magic != FILE_MAGIC:
+		raise ValueError(filename + " is not a search trace")
+
+	events = []
+	index = 0
+	value = 0
+	shift = 0
+	for byte in data[header_size:]:
+		value |= (byte & 0x7F) << shift
+		if byte & 0x80:
+			shift += 7
+			continue
+
+		kind = value & 3
+		zigzag = value >> 2
+		index += (zigzag >> 1) if not zigzag & 1 else -((zigzag + 1) >> 1)
+		events.append((kind, divmod(index, rows)))
+		value = 0
+		shift = 0
+
+	return rows, divmod(start, rows), divmod(end, rows), events
+
+
+
+def apply_event(context, grid, kind, pos):
+	# Updates a SearchContext with one event so it can be drawn in the same way as a live search
+	spot = grid[pos[0]][pos[1]]
+	if kind == PUSH:
+		context.open_set_hash.add(spot)
+	elif kind == POP:
+		context.open_set_hash.discard(spot)
+	elif kind == CLOSE:
+		context.closed_set.add(spot)
+		context.expansions += 1
+	elif kind == PATH:
+		context.path.append(spot)
+		context.path_set.add(spot)
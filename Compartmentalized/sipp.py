@@ -0,0 +1,214 @@
+import heapq
+import math
+
+###########################################################
+#   Safe Interval Path Planning (SIPP) around moving obstacles with known timetables
+#
+#	Doors that close, conveyors and other vehicles on fixed schedules block spots only at certain times, so a
+#	path has to say when it is on each spot as well as where. Searching over (spot, time) like the cooperative
+#	planner does gives a new state for every time a spot can be reached at, and waiting makes that explode.
+#
+#	SIPP instead splits each spot's timeline into safe intervals, the stretches of time between the obstacles
+#	passing over it, and searches over (spot, safe interval). Arriving as early as possible within an interval
+#	is always best as the agent can wait there until the end of it, so each state only needs its earliest
+#	arrival time. A spot no obstacle ever touches has the one interval [0, inf) and the search over it is the
+#	same as on the static grid, so the number of states stays close to the static search's.
+#
+#	As in cooperative_pathfinding.py every move, straight or diagonal, takes one time step and the agent can
+#	wait on a spot. The cost of a path is the time it arrives at the end, and the end has to be reached in its
+#	last safe interval so that the agent can stay there. The heuristic is the number of moves to the end with
+#	nothing in the way, the larger of the row and col differences.
+#
+#	Times are whole time steps and an interval (start, end) is safe for start <= t < end.
+#
+
+MOVE_TIME = 1 # Time steps each move takes
+
+
+###################################################
+### Class Definitions                           ###
+###################################################
+class Timetable:
+	def __init__(self, rows):
+		self.rows = rows
+		self.blocked = {} # spot index -> list of (start, end) times an obstacle is on the spot
+		self.moves = set() # (from index, to index, time) of obstacles moving between spots, to stop an agent swapping places with one
+		self.intervals = {} # spot index -> safe intervals, worked out the first time they are needed
+		self.last_time = 0 # The last time anything changes, after this the grid stays the same
+
+	def index(self, pos):
+		return pos[0] * self.rows + pos[1]
+
+	def block(self, pos, start, end = math.inf):
+		# An obstacle is on pos from start until (but not including) end, ie. a closed door
+		index = self.index(pos)
+		self.blocked.setdefault(index, []).append((start, end))
+		self.intervals.pop(index, None)
+		self.last_time = max(self.last_time, start if end == math.inf else end)
+
+	def add_trajectory(self, positions, start_time = 0, park = False):
+		# An obstacle that is on positions[i] at start_time + i. With park it stays on the last position for good,
+		# otherwise it leaves the grid
+		for i, pos in enumerate(positions):
+			last = park and i == len(positions) - 1
+			self.block(pos, start_time + i, math.inf if last else start_time + i + 1)
+			if i > 0:
+				self.moves.add((self.index(positions[i - 1]), self.index(pos), start_time + i - 1))
+
+	def safe_intervals(self, index):
+		# The (start, end) times the spot is free, in order
+		intervals = self.intervals.get(index)
+		if intervals is None:
+			intervals = []
+			free_from = 0
+			for start, end in sorted(self.blocked.get(index, ())):
+				if start > free_from:
+					intervals.append((free_from, start))
+				free_from = max(free_from, end)
+			if free_from != math.inf:
+				intervals.append((free_from, math.inf))
+			self.intervals[index] = intervals
+		return intervals
+
+	def is_swap(self, from_index, to_index, t):
+		# True if an obstacle moves the opposite way along the move from t to t + 1
+		return (to_index, from_index, t) in self.moves
+
+
+
+class SafeIntervalPlanner:
+	def __init__(self, barrier_grid, timetable):
+		# barrier_grid has the walls that never move and timetable the obstacles that do
+		self.barrier_grid = barrier_grid
+		self.timetable = timetable
+		self.expansions = 0 # Number of (spot, interval) states expanded by the last find_path()
+
+	def h(self, index, end_pos):
+		row, col = self.barrier_grid.get_pos(index)
+		return max(abs(row - end_pos[0]), abs(col - end_pos[1])) * MOVE_TIME
+
+	def find_path(self, start_pos, end_pos, start_time = 0):
+		# Returns the positions the agent is on at start_time, start_time + 1, ... until it reaches the end for good,
+		# or [] if there is no path
+		barrier_grid = self.barrier_grid
+		timetable = self.timetable
+		self.expansions = 0
+		if barrier_grid.is_barrier(*start_pos) or barrier_grid.is_barrier(*end_pos):
+			return []
+
+		start = barrier_grid.index(start_pos)
+		end = barrier_grid.index(end_pos)
+		start_interval = next((i for i, (first, last) in enumerate(timetable.safe_intervals(start)) if first <= start_time < last), None)
+		if start_interval is None:
+			return [] # An obstacle is on the start already
+
+		g_score = {(start, start_interval): start_time} # Earliest arrival time of each (spot, interval)
+		came_from = {}
+		closed_set = set()
+		count = 0
+		open_set = [(start_time + self.h(start, end_pos), count, start, start_interval)]
+
+		while open_set:
+			_, _, current, interval = heapq.heappop(open_set)
+			state = (current, interval)
+			if state in closed_set:
+				continue
+			closed_set.add(state)
+			self.expansions += 1
+
+			t = g_score[state]
+			leave_by = timetable.safe_intervals(current)[interval][1] # The agent has to be gone by this time
+			if current == end and leave_by == math.inf:
+				return self.timed_path(came_from, state, g_score)
+
+			for neighbour, _ in barrier_grid.neighbours(current):
+				for next_interval, (first, last) in enumerate(timetable.safe_intervals(neighbour)):
+					if first > leave_by:
+						break # Can't wait here long enough to reach this or any later interval
+					if last <= t + MOVE_TIME:
+						continue # Over before the agent can get there
+
+					# Wait until the earliest arrival time that is in both intervals and doesn't pass an obstacle
+					arrival = max(t + MOVE_TIME, first)
+					while arrival < last and arrival <= leave_by and timetable.is_swap(current, neighbour, arrival - MOVE_TIME):
+						arrival += 1
+					if arrival >= last or arrival > leave_by:
+						continue
+
+					next_state = (neighbour, next_interval)
+					if arrival < g_score.get(next_state, math.inf):
+						g_score[next_state] = arrival
+						came_from[next_state] = state
+						count += 1
+						heapq.heappush(open_set, (arrival + self.h(neighbour, end_pos), count, neighbour, next_interval))
+
+		return []
+
+	def timed_path(self, came_from, state, g_score):
+		# Follows came_from back and fills in the waits, giving one position per time step
+		states = [state]
+		while state in came_from:
+			state = came_from[state]
+			states.append(state)
+		states.reverse()
+
+		path = []
+		for i in range(len(states) - 1):
+			pos = self.barrier_grid.get_pos(states[i][0])
+			path.extend([pos] * (g_score[states[i + 1]] - g_score[states[i]]))
+		path.append(self.barrier_grid.get_pos(states[-1][0]))
+		return path
+
+
+
+###################################################
+### Helper functions                            ###
+###################################################
+def space_time_a_star(barrier_grid, timetable, start_pos, end_pos, start_time = 0):
+	# The plain search over (spot, time) that SIPP replaces, kept to check SIPP against and for benchmark.py.
+	# Returns the same kind of path as SafeIntervalPlanner.find_path() and the number of states expanded. Past
+	# timetable.last_time nothing changes any more, so all later times of a spot are treated as one state
+	if barrier_grid.is_barrier(*start_pos) or barrier_grid.is_barrier(*end_pos):
+		return [], 0
+
+	start = barrier_grid.index(start_pos)
+	end = barrier_grid.index(end_pos)
+	h = lambda index: max(abs(index // barrier_grid.rows - end_pos[0]), abs(index % barrier_grid.rows - end_pos[1])) * MOVE_TIME
+	safe = lambda index, t: any(first <= t < last for first, last in timetable.safe_intervals(index))
+	if not safe(start, start_time):
+		return [], 0
+
+	came_from = {}
+	closed_set = set()
+	count = 0
+	open_set = [(start_time + h(start), count, start, start_time)]
+	expansions = 0
+
+	while open_set:
+		_, _, current, t = heapq.heappop(open_set)
+		state = (current, min(t, timetable.last_time))
+		if state in closed_set:
+			continue
+		closed_set.add(state)
+		expansions += 1
+
+		if current == end and any(first <= t and last == math.inf for first, last in timetable.safe_intervals(end)):
+			path = [barrier_grid.get_pos(current)]
+			while (current, t) in came_from:
+				current, t = came_from[(current, t)]
+				path.append(barrier_grid.get_pos(current))
+			path.reverse()
+			return path, expansions
+
+		# Every move and waiting where we are all take one time step
+		for neighbour in [current] + [neighbour for neighbour, _ in barrier_grid.neighbours(current)]:
+			arrival = t + MOVE_TIME
+			if not safe(neighbour, arrival) or (neighbour != current and timetable.is_swap(current, neighbour, t)):
+				continue
+			if (neighbour, min(arrival, timetable.last_time)) in closed_set or (neighbour, arrival) in came_from:
+				continue
+			came_from[(neighbour, arrival)] = (current, t)
+			count += 1
+			heapq.heappush(open_set, (arrival + h(neighbour), count, neighbour, arrival))
+
+	return [], expansions
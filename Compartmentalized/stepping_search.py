@@ -0,0 +1,126 @@
+import math
+import time
+from collections import namedtuple
+import a_star_algorithm as asg
+import search_context as sc
+import open_lists as ol
+
+###########################################################
+#   A* search that can be paused and resumed
+#
+#	a_star_pathfind() runs until it is finished and the only way to do anything else in the meantime is the
+#	draw() callback. A SteppingSearch holds all of the search's state so it can be advanced a few expansions
+#	at a time, ie. a game loop can give the search a couple of milliseconds each frame:
+#
+#		search = SteppingSearch(grid, start, end, False)
+#		while running:
+#			delta = search.step_for(0.002)
+#			... draw delta.opened and delta.closed ...
+#			if search.done:
+#				path = search.full_path()
+#
+#	The spots are not coloured by the search, the deltas say which spots changed instead and the whole state
+#	is in search.context which can be drawn with visualization.draw().
+#
+#	full_path() includes the start and end, unlike a_star_pathfind() which returns only the spots between them.
+#
+
+# opened are the spots that were added to the open set and closed are the spots that were expanded
+StepDelta = namedtuple('StepDelta', ['opened', 'closed'])
+
+TIME_CHECK_INTERVAL = 16 # Number of expansions between each look at the clock in step_for()
+
+
+###################################################
+### Class Definitions                           ###
+###################################################
+class SteppingSearch:
+	def __init__(self, grid, start, end, use_euclidean, heuristic = None, weight = 1, context = None, open_list = None):
+		# The neighbours of the spots must be updated before the first step. open_list is an empty open list from
+		# open_lists.py, by default a binary heap
+		if heuristic is None:
+			heuristic = lambda p1, p2: asg.h(p1, p2, use_euclidean)
+		self.heuristic = heuristic
+		self.weight = weight
+
+		self.start = start
+		self.end = end
+		self.end_pos = end.get_pos()
+
+		self.context = sc.SearchContext() if context is None else context
+		self.context.g_score[start] = 0
+		self.context.f_score[start] = weight * heuristic(start.get_pos(), self.end_pos)
+		self.context.open_set_hash.add(start)
+
+		self.open_set = ol.BinaryHeapOpenList() if open_list is None else open_list
+		self.open_set.push(self.context.f_score[start], start)
+
+		self.done = False
+
+	def step(self, n = 1):
+		# Advances the search by up to n expansions and returns a StepDelta of what changed
+		context = self.context
+		g_score = context.g_score
+		f_score = context.f_score
+		opened = []
+		closed = []
+
+		while n > 0 and not self.done:
+			if not self.open_set:
+				# Every reachable spot has been looked at and there is no path
+				self.done = True
+				break
+
+			f, current = self.open_set.pop()
+			if f > f_score[current]:
+				continue # This spot has been queued again since with a lower f_score
+			context.open_set_hash.discard(current)
+
+			if current == self.end:
+				self.done = True
+				context.path = asg.path_to(context.came_from, current)
+				context.path_set.update(context.path[1:-1])
+				break
+
+			for neighbour, distance in current.neighbours.items():
+				temp_g_score = g_score[current] + distance
+				if temp_g_score < g_score.get(neighbour, math.inf):
+					context.came_from[neighbour] = current
+					g_score[neighbour] = temp_g_score
+					f_score[neighbour] = temp_g_score + self.weight * self.heuristic(neighbour.get_pos(), self.end_pos)
+					self.open_set.push(f_score[neighbour], neighbour)
+					context.open_set_hash.add(neighbour)
+					opened.append(neighbour)
+
+			context.closed_set.add(current)
+			closed.append(current)
+			context.expansions += 1
+			n -= 1
+
+		return StepDelta(opened, closed)
+
+	def step_for(self, seconds):
+		# Keeps stepping until the search is done or the given number of seconds have passed
+		deadline = time.perf_counter() + seconds
+		opened = []
+		closed = []
+
+		while not self.done:
+			delta = self.step(TIME_CHECK_INTERVAL)
+			opened.extend(delta.opened)
+			closed.extend(delta.closed)
+			if time.perf_counter() > deadline:
+				break
+
+		return StepDelta(opened, closed)
+
+	@property
+	def expansions(self):
+		return self.context.expansions
+
+	def full_path(self):
+		# The list of spots from start to end including both, or [] if there is no path. a_star_pathfind() leaves the
+		# start and end out, use full_path()[1:-1] for the same result
+		if not self.done:
+			raise RuntimeError("The search has not finished yet")
+		return self.context.path
@@ -0,0 +1,297 @@
+import heapq
+import math
+import struct
+from array import array
+import barrier_grid as bg
+import map_io
+
+###########################################################
+#   Simple subgoal graph for the 8 direction grid
+#
+#	A shortest path on the grid only has to turn at the corners of barriers, in between corners it runs along
+#	a straight or diagonal line. So ahead of time we place a subgoal on every spot next to a barrier corner
+#	and join two subgoals with an edge when one can be reached from the other in a "h-reachable" way, that is
+#	with a path whose length is the octile distance (diagonal steps and straight steps only, no detours).
+#
+#	To find a path the start and end are joined to the subgoals they can h-reach, the much smaller subgoal
+#	graph is searched with A* and each edge of the result is turned back into the spots along it.
+#
+#	Costs are the same as Spot.update_neighbours(), 1 for a straight step and 1.75 for a diagonal one.
+#
+
+SUBGOAL_EXTENSION = 'subgoals'
+FILE_MAGIC = b'SSG1'
+HEADER_FORMAT = '=4sIII' # magic, rows, number of subgoals, number of edges
+
+QUADRANTS = [(1, 1), (1, -1), (-1, 1), (-1, -1)]
+
+
+###################################################
+### Helper functions                            ###
+###################################################
+def octile(p1, p2):
+	# The length of the shortest path between the positions if there were no barriers
+	d_row = abs(p1[0] - p2[0])
+	d_col = abs(p1[1] - p2[1])
+	return bg.DIAGONAL_DISTANCE * min(d_row, d_col) + bg.STRAIGHT_DISTANCE * abs(d_row - d_col)
+
+
+
+def can_move(barrier_grid, row, col, d_row, d_col):
+	# Whether the single step is allowed, using the same rules as Spot.update_neighbours()
+	if barrier_grid.is_barrier(row + d_row, col + d_col):
+		return False
+	if d_row != 0 and d_col != 0:
+		return not barrier_grid.is_barrier(row, col + d_col) or not barrier_grid.is_barrier(row + d_row, col)
+	return True
+
+
+
+def is_subgoal(barrier_grid, row, col):
+	# A spot is a subgoal if a shortest path might have to turn on it to get around a barrier. As diagonal steps may
+	# cut past the corner of a barrier, paths can also wrap around the end of a barrier on the spot straight next to it
+	if barrier_grid.is_barrier(row, col):
+		return False
+
+	def inside(d_row, d_col):
+		return 0 <= row + d_row < barrier_grid.rows and 0 <= col + d_col < barrier_grid.rows
+
+	# Diagonal corners, the spot is diagonal to a barrier (or a blocked diagonal step) with a straight way around it
+	for d_row, d_col in bg.DIAGONAL_MOVES:
+		if not inside(d_row, d_col):
+			continue
+		corner_blocked = not can_move(barrier_grid, row, col, d_row, d_col) or barrier_grid.is_barrier(row + d_row, col + d_col)
+		side_open = not barrier_grid.is_barrier(row + d_row, col) or not barrier_grid.is_barrier(row, col + d_col)
+		if corner_blocked and side_open:
+			return True
+
+	# Ends of barriers, the spot is straight next to a barrier that can be cut around diagonally on either side
+	for d_row, d_col in bg.STRAIGHT_MOVES:
+		if not inside(d_row, d_col) or not barrier_grid.is_barrier(row + d_row, col + d_col):
+			continue
+		for side in (-1, 1):
+			s_row, s_col = (d_row, side) if d_col == 0 else (side, d_col)
+			if inside(s_row, s_col) and not barrier_grid.is_barrier(row + s_row, col + s_col):
+				return True
+
+	return False
+
+
+
+def h_reachable_quadrant(barrier_grid, source, q_row, q_col, stop_at = None, target = None):
+	# Finds the spots in one quadrant around the source that are h-reachable from it. A spot is h-reachable if one of
+	# the spots it can be stepped to from, in a way that keeps the path octile length, is h-reachable. Spots in
+	# stop_at are recorded but not gone through. Returns a dict of (i, j) offsets -> the offset it was reached from,
+	# if a target offset is given only the box up to the target is searched and the search stops once it is found
+	rows = barrier_grid.rows
+	s_row, s_col = source
+	reached = {(0, 0): None}
+	previous_row = {0}
+	previous_end = 1 # One past the furthest j reachable in the previous row
+	max_i = rows if target is None else target[0]
+	max_j = rows if target is None else target[1]
+
+	i = 0
+	while True:
+		current_row = set()
+		row = s_row + i * q_row
+		j = 0
+		while True:
+			col = s_col + j * q_col
+			if j > max_j or not (0 <= col < rows):
+				break
+
+			if (i, j) != (0, 0) and not barrier_grid.is_barrier(row, col):
+				# Straight steps keep the path octile length only along the longer side, diagonal steps always do
+				parent = None
+				if (i - 1, j - 1) in reached and (j - 1) in previous_row and can_move(barrier_grid, row - q_row, col - q_col, q_row, q_col):
+					parent = (i - 1, j - 1)
+				elif i > j and j in previous_row and can_move(barrier_grid, row - q_row, col, q_row, 0):
+					parent = (i - 1, j)
+				elif j > i and (j - 1) in current_row and can_move(barrier_grid, row, col - q_col, 0, q_col):
+					parent = (i, j - 1)
+
+				if parent is not None:
+					reached[(i, j)] = parent
+					if target == (i, j):
+						return reached
+					if stop_at is None or (row, col) not in stop_at:
+						current_row.add(j)
+
+			elif (i, j) == (0, 0):
+				current_row.add(0)
+
+			# Nothing further along this row can be reached once we are past everything reachable in the row above
+			if j not in current_row and j >= previous_end:
+				break
+			j += 1
+
+		if not current_row:
+			return reached
+		previous_row = current_row
+		previous_end = max(current_row) + 1
+		i += 1
+		if i > max_i or not (0 <= s_row + i * q_row < rows):
+			return reached
+
+
+
+def direct_h_reachable(barrier_grid, source, subgoals):
+	# The subgoals that can be h-reached from the source without going through another subgoal
+	found = set()
+	for q_row, q_col in QUADRANTS:
+		reached = h_reachable_quadrant(barrier_grid, source, q_row, q_col, subgoals)
+		for i, j in reached:
+			pos = (source[0] + i * q_row, source[1] + j * q_col)
+			if pos != source and pos in subgoals:
+				found.add(pos)
+
+	return found
+
+
+
+def h_path(barrier_grid, p1, p2):
+	# Turns an edge between two h-reachable positions back into the positions along it
+	q_row = 1 if p2[0] >= p1[0] else -1
+	q_col = 1 if p2[1] >= p1[1] else -1
+	target = (abs(p2[0] - p1[0]), abs(p2[1] - p1[1]))
+
+	reached = h_reachable_quadrant(barrier_grid, p1, q_row, q_col, target = target)
+	path = []
+	offset = target
+	while offset is not None:
+		path.append((p1[0] + offset[0] * q_row, p1[1] + offset[1] * q_col))
+		offset = reached[offset]
+
+	path.reverse()
+	return path
+
+
+
+###################################################
+### Class Definitions                           ###
+###################################################
+class SubgoalGraph:
+	def __init__(self, barrier_grid, subgoals = None, edges = None):
+		# Builds the graph unless the subgoals and edges are given (see load())
+		self.barrier_grid = barrier_grid
+		self.expansions = 0 # Number of graph nodes expanded by the last find_path()
+
+		if subgoals is None:
+			rows = barrier_grid.rows
+			subgoals = [(row, col) for row in range(rows) for col in range(rows) if is_subgoal(barrier_grid, row, col)]
+			subgoal_set = set(subgoals)
+			edges = {pos: direct_h_reachable(barrier_grid, pos, subgoal_set) for pos in subgoals}
+
+		self.subgoals = set(subgoals)
+		self.edges = edges
+
+	def find_path(self, start_pos, end_pos):
+		# Returns the positions of the path from start to end and its cost, or ([], inf) if there is no path
+		self.expansions = 0
+		if start_pos == end_pos:
+			return [start_pos], 0
+
+		# Join the start and end to the graph for this search only
+		start_edges = direct_h_reachable(self.barrier_grid, start_pos, self.subgoals)
+		end_edges = direct_h_reachable(self.barrier_grid, end_pos, self.subgoals)
+		if end_pos in h_reachable_targets(self.barrier_grid, start_pos, end_pos):
+			start_edges.add(end_pos)
+
+		def neighbours(pos):
+			if pos == start_pos:
+				yield from start_edges
+			else:
+				yield from self.edges.get(pos, ())
+			if pos in end_edges:
+				yield end_pos
+
+		g_score = {start_pos: 0}
+		came_from = {}
+		count = 0
+		open_set = [(octile(start_pos, end_pos), count, start_pos)]
+
+		while open_set:
+			f, _, current = heapq.heappop(open_set)
+			if f > g_score[current] + octile(current, end_pos):
+				continue
+			self.expansions += 1
+
+			if current == end_pos:
+				nodes = [current]
+				while current in came_from:
+					current = came_from[current]
+					nodes.append(current)
+				nodes.reverse()
+				return self.expand(nodes), g_score[end_pos]
+
+			for neighbour in neighbours(current):
+				temp_g_score = g_score[current] + octile(current, neighbour)
+				if temp_g_score < g_score.get(neighbour, math.inf):
+					came_from[neighbour] = current
+					g_score[neighbour] = temp_g_score
+					count += 1
+					heapq.heappush(open_set, (temp_g_score + octile(neighbour, end_pos), count, neighbour))
+
+		return [], math.inf
+
+	def expand(self, nodes):
+		# Turns the subgoals of a path into every position along it
+		path = [nodes[0]]
+		for i in range(len(nodes) - 1):
+			path.extend(h_path(self.barrier_grid, nodes[i], nodes[i + 1])[1:])
+		return path
+
+	def save(self, filename):
+		# Saves the subgoals and their edges, the edges are stored as offsets into one list of targets
+		rows = self.barrier_grid.rows
+		subgoals = sorted(self.subgoals)
+		indices = {pos: i for i, pos in enumerate(subgoals)}
+
+		offsets = array('I', [0])
+		targets = array('I')
+		for pos in subgoals:
+			targets.extend(sorted(indices[target] for target in self.edges[pos]))
+			offsets.append(len(targets))
+
+		with open(filename, 'wb') as f:
+			f.write(struct.pack(HEADER_FORMAT, FILE_MAGIC, rows, len(subgoals), len(targets)))
+			array('I', [row * rows + col for row, col in subgoals]).tofile(f)
+			offsets.tofile(f)
+			targets.tofile(f)
+
+	@classmethod
+	def load(cls, barrier_grid, filename):
+		# Loads a graph saved with save(), barrier_grid must be the same map it was built from
+		with open(filename, 'rb') as f:
+			magic, rows, total_subgoals, total_edges = struct.unpack(HEADER_FORMAT, f.read(struct.calcsize(HEADER_FORMAT)))
+			if magic != FILE_MAGIC or rows != barrier_grid.rows:
+				raise ValueError(filename + " is not a subgoal graph for this map")
+
+			indices = array('I')
+			indices.fromfile(f, total_subgoals)
+			offsets = array('I')
+			offsets.fromfile(f, total_subgoals + 1)
+			targets = array('I')
+			targets.fromfile(f, total_edges)
+
+		subgoals = [divmod(i, rows) for i in indices]
+		edges = {pos: {subgoals[targets[k]] for k in range(offsets[i], offsets[i + 1])} for i, pos in enumerate(subgoals)}
+		return cls(barrier_grid, subgoals, edges)
+
+	@classmethod
+	def for_map(cls, map_filename):
+		# Loads the map and the graph that was saved next to it
+		rows, barriers = map_io.load_barriers(map_filename)
+		barrier_grid = bg.BarrierGrid.from_positions(rows, barriers)
+		return cls.load(barrier_grid, map_io.data_filename(map_filename, SUBGOAL_EXTENSION))
+
+
+
+def h_reachable_targets(barrier_grid, source, target):
+	# Returns {target} if the target is h-reachable from the source (through anything), otherwise an empty set
+	q_row = 1 if target[0] >= source[0] else -1
+	q_col = 1 if target[1] >= source[1] else -1
+	offset = (abs(target[0] - source[0]), abs(target[1] - source[1]))
+	reached = h_reachable_quadrant(barrier_grid, source, q_row, q_col, target = offset)
+	return {target} if offset in reached else set()
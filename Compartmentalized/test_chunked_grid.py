@@ -0,0 +1,80 @@
+import os
+import shutil
+import tempfile
+import unittest
+import barrier_grid as bg
+import chunked_grid as cg
+import map_editing as me
+import map_io
+
+###########################################################
+#   Tests for chunked_grid.py, run from this folder with
+#		python -m unittest test_chunked_grid
+#
+
+
+###################################################
+### Tests                                       ###
+###################################################
+class ChunkedGridTest(unittest.TestCase):
+	def setUp(self):
+		self.folder = tempfile.mkdtemp()
+
+	def tearDown(self):
+		shutil.rmtree(self.folder)
+
+	def write_map(self, name, text):
+		map_filename = os.path.join(self.folder, name)
+		with open(map_filename, 'w') as f:
+			f.write(text)
+		return map_filename
+
+	def test_a_star_with_tile_eviction(self):
+		# A maze of 8 x 8 tiles searched with room for only 2 of them finds the same path as on the whole map, and
+		# never holds more than 2 tiles
+		map_filename = os.path.join(self.folder, 'maze.map')
+		barrier_grid = me.maze_map(31, seed = 3)
+		map_io.save_barrier_grid(map_filename, barrier_grid)
+		cg.convert_map(map_filename, tile_size = 8)
+
+		chunked = cg.ChunkedGrid.for_map(map_filename, max_tiles = 2)
+		try:
+			path = bg.a_star_positions(chunked, (1, 1), (29, 29), False)
+			self.assertEqual(path, bg.a_star_positions(barrier_grid, (1, 1), (29, 29), False))
+			self.assertTrue(path)
+			self.assertLessEqual(len(chunked.tiles), 2)
+			self.assertGreater(chunked.stats['evictions'], 0)
+			self.assertEqual(chunked.stats['misses'] - chunked.stats['evictions'], len(chunked.tiles))
+		finally:
+			chunked.close()
+
+	def test_short_lines_are_empty(self):
+		# As in map_io.load_barriers() the missing end of a short line and a missing line are empty spots, only
+		# outside of the map is a barrier
+		map_filename = self.write_map('short.map', '5\n.#\n\n#####\n')
+		cg.convert_map(map_filename, tile_size = 4)
+		barrier_grid = bg.BarrierGrid.from_positions(*map_io.load_barriers(map_filename))
+
+		chunked = cg.ChunkedGrid.for_map(map_filename)
+		try:
+			for row in range(-1, 9):
+				for col in range(-1, 9):
+					self.assertEqual(chunked.is_barrier(row, col), barrier_grid.is_barrier(row, col), (row, col))
+		finally:
+			chunked.close()
+
+	def test_no_barriers_bytes(self):
+		# A ChunkedGrid is not a BarrierGrid, code that reads the barriers directly can't be handed one by mistake
+		map_filename = self.write_map('empty.map', '3\n...\n...\n...\n')
+		cg.convert_map(map_filename)
+		chunked = cg.ChunkedGrid.for_map(map_filename)
+		try:
+			self.assertNotIsInstance(chunked, bg.BarrierGrid)
+			self.assertFalse(hasattr(chunked, 'barriers'))
+		finally:
+			chunked.close()
+
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+import Spot as S
+import cooperative_pathfinding as cp
+
+###########################################################
+#   Tests for cooperative_pathfinding.py, run from this folder with
+#		python -m unittest test_cooperative_pathfinding
+#
+
+
+###################################################
+### Helper functions                            ###
+###################################################
+def make_grid(rows, barriers):
+	# A rows x rows grid of Spots with the given barrier positions and its neighbours updated
+	grid = [[S.Spot(i, j, 1, rows) for j in range(rows)] for i in range(rows)]
+	for row, col in barriers:
+		grid[row][col].make_barrier()
+	for row in grid:
+		for spot in row:
+			spot.update_neighbours(grid)
+	return grid
+
+
+
+###################################################
+### Tests                                       ###
+###################################################
+class StandingStillTest(unittest.TestCase):
+	def test_unreachable_goal_reserves_start_for_window(self):
+		# A can't reach its walled off goal so it stands on (0, 2), B is planned after it along the same row and
+		# has to go around A for the whole window rather than through it
+		grid = make_grid(5, [(3, 3), (3, 4), (4, 3)])
+		planner = cp.CooperativePlanner(grid)
+		paths = planner.plan_all([('A', grid[0][2], grid[4][4]), ('B', grid[0][0], grid[0][4])])
+
+		self.assertEqual(paths['A'], [grid[0][2]] * (planner.window + 1))
+		for t, spot in enumerate(paths['B']):
+			self.assertNotEqual(spot, grid[0][2], "B is on A's spot at time " + str(t))
+		self.assertEqual(paths['B'][-1], grid[0][4])
+
+	def test_boxed_in_agent_reserves_start_for_window(self):
+		# Another agent X holds A's spot and every spot around it at time 1 so A can neither move nor wait, A then
+		# stands still and C planned after it must not walk through A's spot
+		grid = make_grid(5, [])
+		planner = cp.CooperativePlanner(grid)
+		for row in range(1, 4):
+			for col in range(1, 4):
+				planner.reservations.reserve('X', [planner.index(grid[row][col])], 1)
+		paths = planner.plan_all([('A', grid[2][2], grid[4][4]), ('C', grid[2][0], grid[2][4])])
+
+		self.assertEqual(paths['A'], [grid[2][2]] * (planner.window + 1))
+		self.assertNotIn(grid[2][2], paths['C'])
+		self.assertEqual(paths['C'][-1], grid[2][4])
+
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,77 @@
+import math
+import random
+import unittest
+import barrier_grid as bg
+import map_editing as me
+import sipp
+
+###########################################################
+#   Tests for sipp.py, run from this folder with
+#		python -m unittest test_sipp
+#
+
+SEEDS = 400
+
+
+###################################################
+### Helper functions                            ###
+###################################################
+def random_case(seed, rows = 8, obstacles = 4):
+	# A noise map with obstacles driving along shortest paths between random spots, some of them parking at the
+	# end, and a random start and end
+	rng = random.Random(seed)
+	barrier_grid = me.noise_map(rows, 0.2, seed)
+	free = [barrier_grid.get_pos(index) for index in range(rows * rows) if not barrier_grid.barriers[index]]
+	timetable = sipp.Timetable(rows)
+	for _ in range(obstacles):
+		path = bg.a_star_positions(barrier_grid, rng.choice(free), rng.choice(free), False)
+		if path:
+			timetable.add_trajectory(path, rng.randrange(rows), park = rng.random() < 0.2)
+	return barrier_grid, timetable, rng.choice(free), rng.choice(free)
+
+
+
+###################################################
+### Tests                                       ###
+###################################################
+class SafeIntervalPlannerTest(unittest.TestCase):
+	def assertValidPath(self, barrier_grid, timetable, path, start_pos, end_pos):
+		# Every step is a move or a wait onto a spot that is safe at that time, without swapping places with an
+		# obstacle, and the end stays safe for good
+		self.assertEqual(path[0], start_pos)
+		self.assertEqual(path[-1], end_pos)
+		for t, pos in enumerate(path):
+			index = barrier_grid.index(pos)
+			self.assertTrue(any(first <= t < last for first, last in timetable.safe_intervals(index)), (pos, t))
+			if t > 0:
+				previous = barrier_grid.index(path[t - 1])
+				self.assertIn(index, [previous] + [neighbour for neighbour, _ in barrier_grid.neighbours(previous)])
+				self.assertFalse(index != previous and timetable.is_swap(previous, index, t - 1), (pos, t))
+		self.assertEqual(timetable.safe_intervals(barrier_grid.index(end_pos))[-1][1], math.inf)
+
+	def test_matches_space_time_a_star(self):
+		# SIPP arrives as early as the plain search over (spot, time) on random maps and timetables
+		for seed in range(SEEDS):
+			barrier_grid, timetable, start_pos, end_pos = random_case(seed)
+			path = sipp.SafeIntervalPlanner(barrier_grid, timetable).find_path(start_pos, end_pos)
+			reference, _ = sipp.space_time_a_star(barrier_grid, timetable, start_pos, end_pos)
+
+			self.assertEqual(len(path), len(reference), "seed " + str(seed))
+			if path:
+				self.assertValidPath(barrier_grid, timetable, path, start_pos, end_pos)
+
+	def test_waits_for_obstacle(self):
+		# A corridor one spot wide with an obstacle passing through its middle, the agent has to wait for it
+		barrier_grid = bg.BarrierGrid(3, bytes([0, 0, 0, 1, 0, 1, 1, 0, 1]))
+		timetable = sipp.Timetable(3)
+		timetable.add_trajectory([(0, 0), (0, 1), (0, 2)], start_time = 0)
+		timetable.block((1, 1), 1, 3)
+
+		path = sipp.SafeIntervalPlanner(barrier_grid, timetable).find_path((2, 1), (0, 1))
+		self.assertValidPath(barrier_grid, timetable, path, (2, 1), (0, 1))
+		self.assertEqual(path, [(2, 1), (2, 1), (2, 1), (1, 1), (0, 1)])
+
+
+
+if __name__ == '__main__':
+	unittest.main()
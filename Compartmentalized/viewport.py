@@ -0,0 +1,241 @@
+import pygame
+import Spot as S
+
+###########################################################
+#   Pannable, zoomable view of a grid of any size
+#
+#	draw() in visualization.py draws every spot of the grid each frame and squeezes the whole grid into the
+#	window, so past a few hundred rows each spot is less than a pixel. A Viewport shows part of the grid at a
+#	chosen zoom and only the spots inside it are drawn.
+#
+#	What to draw comes from a LevelOfDetail, the state of each spot as one byte plus smaller copies of the
+#	grid where each byte holds the states of a 2 x 2 block of the copy below it. When zoomed out the copy whose
+#	blocks are at least MIN_BLOCK_PIXELS wide is drawn instead of the spots, in the most important state found
+#	in the block, so a path or the start never disappears. A frame is drawn as one surface with a pixel per
+#	visible block, never more than about (width / MIN_BLOCK_PIXELS)^2, scaled up to the window. Changing a
+#	spot's state only updates the blocks above it, so a search can be shown as it runs. A GridView keeps the
+#	LevelOfDetail of a grid of Spots this way, so it is only built once per grid rather than once per frame.
+#
+#	Each state is stored as its own bit so a block is just the bitwise or of the 4 below it, which lets whole
+#	rows be combined at once as large ints. The most important state is then the highest bit that is set.
+#
+#	As with the Spots the row is drawn along the x axis of the window and the col along the y axis.
+#
+
+# States in order of importance, the most important one in a block is the one drawn
+EMPTY = 0
+CLOSED = 1
+OPEN = 2
+BARRIER = 3
+PATH = 4
+START = 5
+END = 6
+
+STATE_COLORS = [S.WHITE, S.RED, S.GREEN, S.BLACK, S.PURPLE, S.ORANGE, S.TURQOISE]
+COLOR_STATES = {color: state for state, color in enumerate(STATE_COLORS)}
+
+# bytes.translate() tables between states and their bits, EMPTY has no bit
+STATE_BITS = bytes([0] + [1 << (state - 1) for state in range(1, len(STATE_COLORS))]) + bytes(256 - len(STATE_COLORS))
+TOP_STATE = bytes(bits.bit_length() for bits in range(256))
+
+MIN_BLOCK_PIXELS = 4 # Smallest size in pixels a spot or block is drawn at
+MAX_SPOT_PIXELS = 64 # Most zoomed in
+GRID_LINE_PIXELS = 8 # Grid lines are only drawn when spots are at least this big
+ZOOM_STEP = 1.25
+
+
+###################################################
+### Class Definitions                           ###
+###################################################
+class LevelOfDetail:
+	def __init__(self, rows, states = None):
+		# states is a bytearray of rows * rows states indexed row * rows + col, all EMPTY if not given
+		self.rows = rows
+		self.levels = [bytearray(rows * rows) if states is None else bytearray(states).translate(STATE_BITS)]
+		self.sizes = [rows] # Rows of each level
+
+		while self.sizes[-1] > 1:
+			self.levels.append(self.pool(self.levels[-1], self.sizes[-1]))
+			self.sizes.append((self.sizes[-1] + 1) // 2)
+
+	@classmethod
+	def from_barrier_grid(cls, barrier_grid):
+		return cls(barrier_grid.rows, barrier_grid.barriers.translate(bytes([EMPTY, BARRIER]) + bytes(254)))
+
+	@classmethod
+	def from_grid(cls, grid, context = None):
+		# The states of a grid of Spots, with the open, closed and path spots of the search context if there is one
+		states = bytearray()
+		for row in grid:
+			for spot in row:
+				states.append(COLOR_STATES.get(spot.color if context is None else context.color_of(spot), EMPTY))
+		return cls(len(grid), states)
+
+	@staticmethod
+	def pool(bits, size):
+		# The next level up, each byte is the or of a 2 x 2 block
+		pooled = bytearray()
+		for i in range(0, size, 2):
+			top = bits[i * size:(i + 1) * size]
+			bottom = bits[(i + 1) * size:(i + 2) * size] if i + 1 < size else top
+			both = (int.from_bytes(top, 'big') | int.from_bytes(bottom, 'big')).to_bytes(size, 'big')
+			if size % 2:
+				both += bytes(1)
+			pooled += (int.from_bytes(both[0::2], 'big') | int.from_bytes(both[1::2], 'big')).to_bytes(len(both) // 2, 'big')
+		return pooled
+
+	def set_state(self, row, col, state):
+		# Changes one spot and the blocks above it, stopping once a block doesn't change
+		self.levels[0][row * self.rows + col] = STATE_BITS[state]
+		for level in range(1, len(self.levels)):
+			below = self.levels[level - 1]
+			size_below = self.sizes[level - 1]
+			row //= 2
+			col //= 2
+
+			bits = 0
+			for child_row in (2 * row, 2 * row + 1):
+				for child_col in (2 * col, 2 * col + 1):
+					if child_row < size_below and child_col < size_below:
+						bits |= below[child_row * size_below + child_col]
+
+			index = row * self.sizes[level] + col
+			if self.levels[level][index] == bits:
+				break
+			self.levels[level][index] = bits
+
+	def state(self, level, row, col):
+		# The most important state in the block
+		return TOP_STATE[self.levels[level][row * self.sizes[level] + col]]
+
+
+
+class GridView:
+	def __init__(self, grid):
+		# The LevelOfDetail of a grid of Spots, built once. After that only the spots passed to update() are looked at
+		# again, so a frame costs nothing more than drawing it
+		self.grid = grid
+		self.context = None # The search drawn over the grid, see set_context()
+		self.lod = LevelOfDetail.from_grid(grid)
+
+	def update(self, spots):
+		# Looks again at spots whose colour, or state in the context, may have changed
+		context = self.context
+		for spot in spots:
+			color = spot.color if context is None else context.color_of(spot)
+			self.lod.set_state(spot.row, spot.col, COLOR_STATES.get(color, EMPTY))
+
+	def set_context(self, context):
+		# Draws a different search over the grid (None for none), only the spots either search reached are looked at
+		reached = set()
+		for shown in (self.context, context):
+			if shown is not None:
+				reached |= shown.open_set_hash | shown.closed_set | shown.path_set
+		self.context = context
+		self.update(reached)
+
+
+
+class Viewport:
+	def __init__(self, rows, width):
+		# Starts zoomed out to show the whole grid
+		self.rows = rows
+		self.width = width
+		self.spot_pixels = width / rows # Size of one spot on the screen, can be below 1 when zoomed out
+		self.left = 0.0 # Row and col at the top left corner of the window
+		self.top = 0.0
+
+	def screen_to_spot(self, pos):
+		# The (row, col) under a point in the window, in the same way as get_clicked_pos()
+		x, y = pos
+		return int(self.left + x / self.spot_pixels), int(self.top + y / self.spot_pixels)
+
+	def clamp(self):
+		# Keeps the view over the grid
+		shown = self.width / self.spot_pixels
+		self.left = min(max(self.left, 0.0), max(0.0, self.rows - shown))
+		self.top = min(max(self.top, 0.0), max(0.0, self.rows - shown))
+
+	def pan(self, dx, dy):
+		# Moves the grid by dx, dy pixels, ie. following a mouse drag
+		self.left -= dx / self.spot_pixels
+		self.top -= dy / self.spot_pixels
+		self.clamp()
+
+	def zoom_at(self, pos, factor):
+		# Zooms by factor keeping the spot under pos where it is
+		x, y = pos
+		row = self.left + x / self.spot_pixels
+		col = self.top + y / self.spot_pixels
+		self.spot_pixels = min(max(self.spot_pixels * factor, self.width / self.rows), MAX_SPOT_PIXELS)
+		self.left = row - x / self.spot_pixels
+		self.top = col - y / self.spot_pixels
+		self.clamp()
+
+	def level(self):
+		# The level of detail whose blocks are at least MIN_BLOCK_PIXELS wide
+		level = 0
+		while self.spot_pixels * (1 << level) < MIN_BLOCK_PIXELS and (self.rows >> level) > 1:
+			level += 1
+		return level
+
+	def handle_event(self, event):
+		# Mouse wheel zooms, dragging with the middle mouse button pans and the arrow keys pan a little. Returns
+		# True if the view changed
+		if event.type == pygame.MOUSEWHEEL:
+			self.zoom_at(pygame.mouse.get_pos(), ZOOM_STEP if event.y > 0 else 1 / ZOOM_STEP)
+		elif event.type == pygame.MOUSEMOTION and event.buttons[1]:
+			self.pan(*event.rel)
+		elif event.type == pygame.KEYDOWN and event.key in (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN):
+			step = self.width / 10
+			self.pan({pygame.K_LEFT: step, pygame.K_RIGHT: -step}.get(event.key, 0), {pygame.K_UP: step, pygame.K_DOWN: -step}.get(event.key, 0))
+		else:
+			return False
+		return True
+
+
+
+###################################################
+### Drawing                                     ###
+###################################################
+def draw_viewport(win, lod, viewport):
+	# Draws the part of the grid inside the viewport
+	win.fill(S.WHITE)
+
+	level = viewport.level()
+	block = 1 << level # Spots per block
+	size = lod.sizes[level]
+	states = lod.levels[level]
+	block_pixels = viewport.spot_pixels * block
+
+	first_row = int(viewport.left) // block
+	first_col = int(viewport.top) // block
+	last_row = min(size - 1, int(viewport.left + viewport.width / viewport.spot_pixels) // block)
+	last_col = min(size - 1, int(viewport.top + viewport.width / viewport.spot_pixels) // block)
+
+	# The visible blocks become one pixel each of a surface drawn with STATE_COLORS as its palette, which is then
+	# scaled up to the block size. The surface's x is the row so each line of it is one col, every size'th state
+	# starting from that col
+	visible_rows = last_row - first_row + 1
+	visible_cols = last_col - first_col + 1
+	pixels = bytearray()
+	for col in range(first_col, last_col + 1):
+		pixels += states[first_row * size + col:(last_row + 1) * size:size]
+	surface = pygame.image.frombuffer(pixels.translate(TOP_STATE), (visible_rows, visible_cols), 'P')
+	surface.set_palette(STATE_COLORS)
+
+	x = int((first_row * block - viewport.left) * viewport.spot_pixels)
+	y = int((first_col * block - viewport.top) * viewport.spot_pixels)
+	right = int(((last_row + 1) * block - viewport.left) * viewport.spot_pixels)
+	bottom = int(((last_col + 1) * block - viewport.top) * viewport.spot_pixels)
+	win.blit(pygame.transform.scale(surface, (right - x, bottom - y)), (x, y))
+
+	if level == 0 and viewport.spot_pixels >= GRID_LINE_PIXELS:
+		for row in range(first_row, last_row + 2):
+			x = int((row - viewport.left) * viewport.spot_pixels)
+			pygame.draw.line(win, S.GREY, (x, 0), (x, viewport.width))
+		for col in range(first_col, last_col + 2):
+			y = int((col - viewport.top) * viewport.spot_pixels)
+			pygame.draw.line(win, S.GREY, (0, y), (viewport.width, y))
+
+	pygame.display.update()
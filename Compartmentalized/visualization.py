@@ -1,8 +1,18 @@
 import pygame
 import math
+import os
 import time
 import Spot as S
-import a_star_algorithm as asg
+import search_context as sc
+import search_trace as st
+import barrier_grid as bg
+import map_io
+import viewport as vp
+import live_search as ls
+import map_editing as me
+
+REFRESH_RATE = 60 # Frames a second drawn while a search runs in the background
+
 
 ###################################################
 ### Display and grid editing related  functions ###
@@ -22,22 +32,6 @@ def make_grid(rows, width):
 
 
 
-def reset_grid(grid):
-	# This is used to clear the grid of all non-barrier, start or end spots
-	for row in grid:
-		for spot in row:
-			if (spot.is_path() or spot.is_open() or spot.is_closed()):
-				spot.reset()
-
-
-def reset_end(grid, end):
-	# Temporary fix for issue that causes the end to be coloured as part of the path
-	# Called after the path is drawn to make the end the correct colour
-	row,col = end.get_pos()
-	grid[row][col].make_end()
-
-
-
 def draw_grid(win, rows, width):
 	# Iterates through the grid drawing the grid lines
 	gap = width // rows;
@@ -48,18 +42,32 @@ def draw_grid(win, rows, width):
 
 
 
-def draw_spots(win,grid):
-	# Iterates through the grid drawing all the spots
+def draw_spots(win, grid, context = None):
+	# Iterates through the grid drawing all the spots, if there is a search context its open, closed and path spots are shown
 	for row in grid:
 		for spot in row:
-			spot.draw(win)
-
+			if context is None:
+				spot.draw(win)
+			else:
+				spot.draw(win, context.color_of(spot))
+
+
+def draw(win, grid, rows, width, context = None, viewport = None, view = None):
+	# With a viewport only the part of the grid it shows is drawn, at its zoom (see viewport.py). view is the
+	# grid's GridView, the caller passes the spots it changes to view.update() so the frame doesn't have to look
+	# at every spot. Without one a GridView is built for this frame only
+	if viewport is not None:
+		if view is None:
+			view = vp.GridView(grid)
+		if view.context is not context:
+			view.set_context(context)
+		vp.draw_viewport(win, view.lod, viewport)
+		return
 
-def draw(win, grid, rows, width):
 	# Covers old frame
 	win.fill(S.WHITE)
 
-	draw_spots(win,grid) # Draw spots
+	draw_spots(win, grid, context) # Draw spots
 	draw_grid(win, rows, width) # Draw grid lines
 
 	pygame.display.update() # Update display
@@ -78,26 +86,110 @@ def get_clicked_pos(pos, rows, width):
 
 
 
-def count_traverse_points(grid):
-	# Iterates through the grid counting the number of traversed spots
-	point_count = 0
-	for row in grid:
-		for spot in row:
-			if spot.is_closed():
-				point_count += 1
+def apply_barriers(grid, barrier_grid, changed_rows, keep = ()):
+	# Makes the spots of the grid match the editor's BarrierGrid after a bulk edit, changed_rows is the (first, last)
+	# row the edit returned (None for no change) and only those rows are looked at. The spots in keep (the start and
+	# end) are left alone and cleared in barrier_grid again. Returns the spots that were changed
+	changed = []
+	if changed_rows is None:
+		return changed
+
+	rows = barrier_grid.rows
+	first_row, last_row = changed_rows
+	for spot in keep:
+		if spot is not None and first_row <= spot.row <= last_row:
+			barrier_grid.barriers[spot.row * rows + spot.col] = 0
+
+	for row in range(first_row, last_row + 1):
+		for col, value in enumerate(barrier_grid.barriers[row * rows:(row + 1) * rows]):
+			spot = grid[row][col]
+			if value == spot.is_barrier() or spot in keep:
+				continue
+			if value:
+				spot.make_barrier()
+			else:
+				spot.reset()
+			changed.append(spot)
 
-	return point_count
+	return changed
 
 
 
-def count_path_points(grid):
-	point_count = 0
-	for row in grid:
-		for spot in row:
-			if spot.is_path():
-				point_count += 1
+def count_traverse_points(context):
+	# The number of spots the search traversed
+	return len(context.closed_set)
+
+
+
+def count_path_points(context):
+	# The number of spots on the path, not counting the start and end
+	return len(context.path_set)
+
+
+
+def replay_trace(win, grid, rows, width, filename, events_per_frame = 1, frame_delay = 0, frame_dir = None, viewport = None, view = None):
+	# Plays back a trace written by search_trace.record_search() on a grid with the same barriers, drawing a frame
+	# every events_per_frame events and waiting frame_delay seconds between frames. If frame_dir is given each
+	# frame is also saved there as frame_00000.png, frame_00001.png, ... Returns the context of the finished replay
+	trace_rows, start_pos, end_pos, events = st.read_trace(filename)
+	if trace_rows != rows:
+		raise ValueError(filename + " was recorded on a grid with a different number of rows")
+
+	grid[start_pos[0]][start_pos[1]].make_start()
+	grid[end_pos[0]][end_pos[1]].make_end()
+
+	context = sc.SearchContext()
+	if viewport is not None:
+		# Each event only changes its own spot in the view
+		if view is None:
+			view = vp.GridView(grid)
+		view.set_context(context)
+		view.update([grid[start_pos[0]][start_pos[1]], grid[end_pos[0]][end_pos[1]]])
+
+	frame = 0
+	for i, (kind, pos) in enumerate(events):
+		st.apply_event(context, grid, kind, pos)
+		if view is not None:
+			view.update([grid[pos[0]][pos[1]]])
+		if (i + 1) % events_per_frame != 0 and i != len(events) - 1:
+			continue
+
+		# Allow the window to be closed part way through
+		for event in pygame.event.get():
+			if event.type == pygame.QUIT:
+				return context
+
+		draw(win, grid, rows, width, context, viewport, view)
+		if frame_dir is not None:
+			pygame.image.save(win, os.path.join(frame_dir, 'frame_%05d.png' % frame))
+		frame += 1
+		if frame_delay:
+			time.sleep(frame_delay)
+
+	return context
+
+
+
+def show_live_search(win, live, viewport, refresh_rate = REFRESH_RATE):
+	# Draws the state buffer of a running LiveSearch refresh_rate times a second until the search is done, the
+	# search runs in its own thread and never waits for a frame. Returns False if the window was closed, which
+	# also stops the search
+	clock = pygame.time.Clock()
+	lod = vp.LevelOfDetail(live.rows, live.snapshot())
+	while live.is_alive():
+		for event in pygame.event.get():
+			if event.type == pygame.QUIT:
+				live.stop()
+				return False
+			viewport.handle_event(event)
+
+		# Only the spots the search changed since the last frame are updated
+		for index, state in live.take_changes():
+			lod.set_state(index // live.rows, index % live.rows, state)
+		vp.draw_viewport(win, lod, viewport)
+		clock.tick(refresh_rate)
 
-	return point_count
+	return True
 
 
 
@@ -107,7 +199,10 @@ def count_path_points(grid):
 def a_star_main(win, width):
 	# Define constants and variables
 	ROWS = 50
+	TRACE_FILENAME = 'last_search.' + st.TRACE_EXTENSION # Where 't' records the search to
+	REPLAY_EVENTS_PER_FRAME = 8
 	grid = make_grid(ROWS, width)
+	barrier_grid = bg.BarrierGrid(ROWS) # The barriers of the grid, every edit below changes both
 
 	start = None
 	end = None
@@ -119,10 +214,15 @@ def a_star_main(win, width):
 	point_counts = []
 	path_counts = []
 	found_path = {}
+	context = None # The last search, its spots are drawn over the grid until the next search
+	viewport = vp.Viewport(ROWS, width) # Mouse wheel zooms, middle mouse drag and the arrow keys pan
+	view = vp.GridView(grid) # What the viewport draws, every spot changed below is passed to view.update()
+	drag_start = None # Spot where a shift or ctrl drag started, see the bulk editing below
+	drag_tool = 0 # Whether it was shift or ctrl
 
 	while run:
 		# Draws each frame
-		draw(win, grid, ROWS, width)
+		draw(win, grid, ROWS, width, context, viewport, view)
 
 		# Checks for user input
 		for event in pygame.event.get():
@@ -130,9 +230,36 @@ def a_star_main(win, width):
 			if event.type == pygame.QUIT:
 				run = False
 
-			if pygame.mouse.get_pressed()[0]: # Triggers on left mouse click
+			if viewport.handle_event(event):
+				continue
+
+			# Bulk editing (see map_editing.py): shift + left drag fills a rectangle, ctrl + left drag draws a line
+			# and shift + right click erases the whole wall under the mouse. Each is one change to barrier_grid and
+			# only the rows it changed are then copied back onto the spots
+			tool = pygame.key.get_mods() & (pygame.KMOD_SHIFT | pygame.KMOD_CTRL)
+			if event.type == pygame.MOUSEBUTTONDOWN and tool and event.button in (1, 3):
+				if event.button == 1:
+					drag_start = viewport.screen_to_spot(event.pos)
+					drag_tool = tool
+				elif tool & pygame.KMOD_SHIFT:
+					changed_rows = me.flood_erase(barrier_grid, viewport.screen_to_spot(event.pos))
+					view.update(apply_barriers(grid, barrier_grid, changed_rows))
+				continue
+
+			if event.type == pygame.MOUSEBUTTONUP and event.button == 1 and drag_start is not None:
+				if drag_tool & pygame.KMOD_SHIFT:
+					changed_rows = me.fill_rect(barrier_grid, drag_start, viewport.screen_to_spot(event.pos))
+				else:
+					changed_rows = me.draw_line(barrier_grid, drag_start, viewport.screen_to_spot(event.pos))
+				view.update(apply_barriers(grid, barrier_grid, changed_rows, (start, end)))
+				drag_start = None
+				continue
+
+			painting = drag_start is None and not tool # Single spots aren't painted while a bulk edit is under way
+
+			if painting and pygame.mouse.get_pressed()[0]: # Triggers on left mouse click
 				pos = pygame.mouse.get_pos() # Get mouses position
-				row, col = get_clicked_pos(pos, ROWS, width) # Determine the corresponding row col on grid
+				row, col = viewport.screen_to_spot(pos) # Determine the corresponding row col on grid
 				spot = grid[row][col]
 
 				if not start and spot != end:
@@ -151,9 +278,12 @@ def a_star_main(win, width):
 					# Turn an empty spot to a barrier
 					spot.make_barrier()
 
-			elif pygame.mouse.get_pressed()[2]: # Triggers on right mouse click
+				barrier_grid.barriers[row * ROWS + col] = 1 if spot.is_barrier() else 0
+				view.update([spot])
+
+			elif painting and pygame.mouse.get_pressed()[2]: # Triggers on right mouse click
 				pos = pygame.mouse.get_pos() # Get mouses position
-				row, col = get_clicked_pos(pos, ROWS, width) # Determine the corresponding row col on grid
+				row, col = viewport.screen_to_spot(pos) # Determine the corresponding row col on grid
 
 				# Turn any spot back to an empty spot
 				spot = grid[row][col]
@@ -166,6 +296,9 @@ def a_star_main(win, width):
 					# If the end is reset then reset the end
 					end = None
 
+				barrier_grid.barriers[row * ROWS + col] = 0
+				view.update([spot])
+
 			if event.type == pygame.KEYDOWN:
 				if event.key == pygame.K_SPACE and start and end: # Triggers if spacebar is pressed
 
@@ -176,32 +309,60 @@ def a_star_main(win, width):
 
 					# t0 = time.time() # Start timer for process
 
-					# a_star_pathfind(lambda: draw(win, grid, ROWS, width), grid, start, end, True)
+					# context = sc.SearchContext()
+					# a_star_pathfind(lambda: draw(win, grid, ROWS, width, context), grid, start, end, True, context = context)
 					
 					#times.append(time.time() - t0) # Record time taken
-					#point_counts.append(count_traverse_points(grid)) # Record spots traversed
-					#path_counts.append(count_path_points(grid)) # Record path length
+					#point_counts.append(count_traverse_points(context)) # Record spots traversed
+					#path_counts.append(count_path_points(context)) # Record path length
 
-					#reset_end(grid, end)
-					#draw(win, grid, ROWS, width)
+					#draw(win, grid, ROWS, width, context)
 
 					#time.sleep(2.5)
-					#reset_grid(grid) # Reset all non-barrier, start or end spots for visualization purposes
 
-					t0 = time.time() # Start timer for process
-					found_path = asg.a_star_pathfind(lambda: draw(win, grid, ROWS, width), grid, start, end, False)
-					times.append(time.time() - t0) # Record time taken
-					point_counts.append(count_traverse_points(grid)) # Record spots traversed
-					path_counts.append(count_path_points(grid)) # Record path length
+					# Each search gets a new context so there is nothing to reset on the grid between searches
+					# The search runs in its own thread while the display samples it, see live_search.py
+					live = ls.LiveSearch(grid, start, end, False)
+					live.start()
+					if not show_live_search(win, live, viewport):
+						run = False
+						break
 
-					reset_end(grid, end)
-					draw(win, grid, ROWS, width)
+					context = live.context
+					found_path = context.path[1:-1]
+					times.append(live.seconds) # Record time taken
+					point_counts.append(count_traverse_points(context)) # Record spots traversed
+					path_counts.append(count_path_points(context)) # Record path length
+
+					draw(win, grid, ROWS, width, context, viewport, view)
+
+				elif event.key == pygame.K_t and start and end: # Triggers if the 't' key is pressed
+					# Runs the search headless while recording it and then plays the recording back
+					for row in grid:
+						for spot in row:
+							spot.update_neighbours(grid)
+
+					found_path = st.record_search(grid, start, end, False, TRACE_FILENAME)[1:-1]
+					context = replay_trace(win, grid, ROWS, width, TRACE_FILENAME, REPLAY_EVENTS_PER_FRAME, viewport = viewport, view = view)
 
 				elif event.key == pygame.K_c: # Triggers if the 'c' key is pressed
 					# Resets the board to be only empty spots
 					start = None
 					end = None
+					context = None
+					grid = make_grid(ROWS, width)
+					barrier_grid = bg.BarrierGrid(ROWS)
+					view = vp.GridView(grid)
+
+				elif event.key in (pygame.K_m, pygame.K_n): # Triggers if the 'm' or 'n' key is pressed
+					# Replaces the board with a generated maze ('m') or random noise ('n')
+					start = None
+					end = None
+					context = None
 					grid = make_grid(ROWS, width)
+					barrier_grid = me.maze_map(ROWS) if event.key == pygame.K_m else me.noise_map(ROWS)
+					apply_barriers(grid, barrier_grid, (0, ROWS - 1))
+					view = vp.GridView(grid)
 
 				elif event.key == pygame.K_ESCAPE: # Alternative way to exit program
 					run = False
@@ -216,4 +377,88 @@ def a_star_main(win, width):
 	for l in path_counts:
 		print(l)
 
-	return found_path
\ No newline at end of file
+	return found_path
+
+
+
+###################################################
+### Viewer for maps of any size                 ###
+###################################################
+def map_viewer_main(win, width, map_filename, use_euclidean = False):
+	# Shows a saved map with the viewport so it can be zoomed and panned however large it is. Left click sets the
+	# start and then the end, space runs a headless search on a BarrierGrid and shows the spots it expanded and its
+	# path with its time and expansions in the window caption, 'c' clears the search
+	title = pygame.display.get_caption()[0]
+	rows, barriers = map_io.load_barriers(map_filename)
+	barrier_grid = bg.BarrierGrid.from_positions(rows, barriers)
+	lod = vp.LevelOfDetail.from_barrier_grid(barrier_grid)
+	viewport = vp.Viewport(rows, width)
+
+	start = None
+	end = None
+	shown = [] # Positions coloured by the last search
+	found_path = []
+	changed = True
+
+	def clear_search():
+		for pos in shown:
+			if pos != start and pos != end:
+				lod.set_state(pos[0], pos[1], vp.EMPTY)
+		shown.clear()
+
+	run = True
+	while run:
+		if changed:
+			vp.draw_viewport(win, lod, viewport)
+			changed = False
+
+		# Wait for something to happen rather than redrawing an unchanged frame
+		for event in [pygame.event.wait()] + pygame.event.get():
+			if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+				run = False
+
+			elif viewport.handle_event(event):
+				changed = True
+
+			elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+				row, col = viewport.screen_to_spot(event.pos)
+				if barrier_grid.is_barrier(row, col):
+					continue
+				clear_search()
+				if start is None or end is not None:
+					# A new start, which also drops the old end
+					for pos in (start, end):
+						if pos is not None:
+							lod.set_state(pos[0], pos[1], vp.EMPTY)
+					start = (row, col)
+					end = None
+					lod.set_state(row, col, vp.START)
+				else:
+					end = (row, col)
+					lod.set_state(row, col, vp.END)
+				changed = True
+
+			elif event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE and start and end:
+				clear_search()
+				expanded = []
+				t0 = time.time()
+				found_path = bg.a_star_positions(barrier_grid, start, end, use_euclidean, expanded = expanded)
+				pygame.display.set_caption(title + ' - %.4f seconds, %d expansions, %d spots on the path' % (time.time() - t0, len(expanded), len(found_path)))
+
+				for index in expanded:
+					shown.append(barrier_grid.get_pos(index))
+				shown.extend(found_path)
+				for pos in shown:
+					if pos != start and pos != end:
+						lod.set_state(pos[0], pos[1], vp.CLOSED)
+				for pos in found_path[1:-1]:
+					lod.set_state(pos[0], pos[1], vp.PATH)
+				changed = True
+
+			elif event.type == pygame.KEYDOWN and event.key == pygame.K_c:
+				clear_search()
+				pygame.display.set_caption(title)
+				changed = True
+
+	pygame.quit()
+	return found_path